@@ -5,9 +5,25 @@ Paquete modularizado para el examen parcial de Fundamentos de IA
 Módulos:
 - ontology: Definiciones conceptuales y estructuras de datos
 - environment: Entorno hexaédrico 3D
+- occupancy: Índice de ocupación por celda
+- conectividad: Componentes conexas del espacio libre
+- distancias: Campos de distancias BFS para la navegación de los robots
+- aleatorio: Flujos aleatorios independientes por entorno
+- storage: Almacenamiento compacto del grid (uint8 / 1 bit por celda)
+- octree: Octree disperso para mundos muy grandes
+- cache_mundos: Caché en disco de mundos generados
 - robot_agent: Agente robot con memoria interna
+- creencias: Mapa de creencias de la flota por bloques de celdas
+- decision: Jerarquía de reglas de los robots compilada en una tabla
+- aprendizaje: Confianza de las reglas aprendidas por la flota
+- bucles: Detección incremental de bucles en las últimas acciones
+- metricas: Métricas de racionalidad de la flota
 - monster_agent: Agente monstruo reflejo simple
 - simulator: Controlador de simulación y visualización
+- persistencia: Puntos de control (checkpoint / restore) de una simulación
+- trayectoria: Registro binario de trayectorias tick a tick
+- paralelo: Réplicas en paralelo sobre un mundo en memoria compartida
+- dominio: Un mundo repartido en losas entre procesos
 - main: Módulo principal que orquesta todo el sistema
 """
 
@@ -16,13 +32,29 @@ from .ontology import (
     Orientacion,
     Posicion,
     Percepcion,
-    MemoriaRobot
+    MemoriaRobot,
+    HistorialPercepcionAccion,
+    HistorialFlota
 )
 
+from .aleatorio import FlujoAleatorio
+from .occupancy import IndiceOcupacionVectorizado
+from .storage import GridEmpaquetado
+from .octree import GridOctree
+from .cache_mundos import CacheMundos
+from .distancias import CampoDistancias
+from .creencias import CreenciasFlota
+from .decision import TablaDecision, compilar_reglas
+from .aprendizaje import ReglasFlota
+from .bucles import DetectorBucles
+from .metricas import MetricasFlota
 from .environment import EntornoHexaedrico
-from .robot_agent import AgenteRobot
-from .monster_agent import AgenteMonstruo
+from .robot_agent import AgenteRobot, MotorRobots
+from .monster_agent import AgenteMonstruo, MotorMonstruos
 from .simulator import Simulador
+from .paralelo import MundoCompartido, ejecutar_replicas
+from .dominio import SimuladorDistribuido
+from .trayectoria import EscritorTrayectoria, LectorTrayectoria, ReproduccionTrayectoria
 from .visualizacion_pygame import VisualizadorPygame
 from .analisis_examen import AnalizadorExamen
 from .main import ejecutar_simulacion, crear_experimento_personalizado
@@ -37,16 +69,38 @@ __all__ = [
     'Posicion',
     'Percepcion',
     'MemoriaRobot',
+    'HistorialPercepcionAccion',
+    'HistorialFlota',
     
     # Entorno
     'EntornoHexaedrico',
+    'IndiceOcupacionVectorizado',
+    'GridEmpaquetado',
+    'GridOctree',
+    'CacheMundos',
+    'CampoDistancias',
+    'FlujoAleatorio',
     
     # Agentes
     'AgenteRobot',
+    'MotorRobots',
+    'CreenciasFlota',
+    'TablaDecision',
+    'compilar_reglas',
+    'ReglasFlota',
+    'DetectorBucles',
+    'MetricasFlota',
     'AgenteMonstruo',
+    'MotorMonstruos',
     
     # Simulación
     'Simulador',
+    'MundoCompartido',
+    'ejecutar_replicas',
+    'SimuladorDistribuido',
+    'EscritorTrayectoria',
+    'LectorTrayectoria',
+    'ReproduccionTrayectoria',
     'VisualizadorPygame',
     'AnalizadorExamen',
     
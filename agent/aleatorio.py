@@ -0,0 +1,68 @@
+"""
+FLUJOS ALEATORIOS
+Generadores independientes por entorno con valores pre-sorteados por bloques
+"""
+
+import numpy as np
+
+
+def semillas_entorno(seed=None) -> tuple:
+    """Semillas independientes (mundo, robots, monstruos) derivadas de la semilla de un entorno"""
+    return tuple(np.random.SeedSequence(seed).spawn(3))
+
+
+class FlujoAleatorio:
+    """
+    Flujo de números aleatorios propio de un entorno
+    - Envuelve un numpy.random.Generator independiente de los módulos globales
+      `random` y `np.random`: varios entornos pueden compartir proceso o hilos
+      y cada uno sigue siendo reproducible a partir de su semilla
+    - Los valores se sirven desde bloques pre-sorteados de uniformes en [0, 1):
+      una llamada a NumPy cada `tam_bloque` valores en lugar de una por consulta
+    """
+
+    def __init__(self, semilla=None, tam_bloque: int = 4096):
+        self.generador = np.random.default_rng(semilla)
+        self.tam_bloque = tam_bloque
+        self._bloque = np.empty(0, dtype=np.float64)
+        self._pos = 0
+
+    def _rellenar(self, n: int):
+        """Garantiza al menos n valores sin consumir en el bloque actual"""
+        restantes = self._bloque[self._pos:]
+        nuevos = self.generador.random(max(self.tam_bloque, n - len(restantes)))
+        self._bloque = np.concatenate((restantes, nuevos))
+        self._pos = 0
+
+    def uniformes(self, n: int) -> np.ndarray:
+        """n uniformes en [0, 1)"""
+        if self._pos + n > len(self._bloque):
+            self._rellenar(n)
+        valores = self._bloque[self._pos:self._pos + n]
+        self._pos += n
+        return valores
+
+    def enteros(self, k: int, n: int) -> np.ndarray:
+        """n enteros uniformes en [0, k)"""
+        return (self.uniformes(n) * k).astype(np.int64)
+
+    def random(self) -> float:
+        """Un uniforme en [0, 1), como random.random()"""
+        if self._pos >= len(self._bloque):
+            self._rellenar(1)
+        valor = float(self._bloque[self._pos])
+        self._pos += 1
+        return valor
+
+    def randint(self, a: int, b: int) -> int:
+        """Un entero uniforme en [a, b], como random.randint()"""
+        return a + int(self.random() * (b - a + 1))
+
+    def estado(self) -> tuple:
+        """(estado del generador, valores pre-sorteados aún sin consumir)"""
+        return self.generador.bit_generator.state, self._bloque[self._pos:].copy()
+
+    def fijar_estado(self, estado: tuple):
+        """Restaura un estado obtenido con estado(): la secuencia continúa idéntica"""
+        self.generador.bit_generator.state, self._bloque = estado[0], np.asarray(estado[1], dtype=np.float64)
+        self._pos = 0
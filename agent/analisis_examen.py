@@ -6,7 +6,7 @@ Módulo específico para análisis de racionalidad, episodios y cumplimiento de
 from typing import Dict, List, Tuple
 import numpy as np
 from .ontology import Posicion, Orientacion
-from .robot_agent import AgenteRobot
+from .robot_agent import AgenteRobot, contar_trigramas
 from .monster_agent import AgenteMonstruo
 
 
@@ -32,9 +32,10 @@ class AnalizadorExamen:
         total_movimientos = movimientos_exitosos + colisiones
         
         efectividad = movimientos_exitosos / max(total_movimientos, 1) if total_movimientos > 0 else 0
-        eficiencia_caza = robot.memoria.metricas_racionalidad.get('acciones_caza', 0) / max(len(robot.memoria.percepciones_acciones), 1)
+        total_acciones = robot.memoria.percepciones_acciones.total
+        eficiencia_caza = robot.memoria.metricas_racionalidad.get('acciones_caza', 0) / max(total_acciones, 1)
         adaptabilidad = len(robot.memoria.reglas_aprendidas) / 10.0
-        comunicacion = robot.memoria.metricas_racionalidad.get('comunicaciones_exitosas', 0) / max(len(robot.memoria.percepciones_acciones), 1)
+        comunicacion = robot.memoria.metricas_racionalidad.get('comunicaciones_exitosas', 0) / max(total_acciones, 1)
         
         return {
             'racionalidad_total': racionalidad,
@@ -43,7 +44,7 @@ class AnalizadorExamen:
             'adaptabilidad': min(adaptabilidad, 1.0),
             'eficiencia_comunicacion': comunicacion,
             'reglas_aprendidas': len(robot.memoria.reglas_aprendidas),
-            'total_acciones': len(robot.memoria.percepciones_acciones),
+            'total_acciones': total_acciones,
             'monstruos_destruidos': robot.monstruos_destruidos,
             'puntuacion': robot.puntuacion
         }
@@ -57,7 +58,7 @@ class AnalizadorExamen:
         
         # Análisis más detallado de patrones
         percepciones_acciones = robot.memoria.percepciones_acciones
-        if len(percepciones_acciones) < ventana:
+        if percepciones_acciones.total < ventana:
             return {
                 'es_episodico': True,
                 'en_bucle_infinito': False,
@@ -66,20 +67,23 @@ class AnalizadorExamen:
                 'razon': 'Datos insuficientes'
             }
         
-        # Obtener últimas acciones
-        ultimas_acciones = [accion for _, accion in percepciones_acciones[-ventana:]]
-        
-        # Calcular variabilidad de acciones
-        acciones_unicas = len(set(ultimas_acciones))
-        variabilidad = acciones_unicas / len(ultimas_acciones)
-        
-        # Detectar patrones repetitivos
-        patrones = {}
-        for i in range(len(ultimas_acciones) - 2):
-            patron = tuple(ultimas_acciones[i:i+3])
-            patrones[patron] = patrones.get(patron, 0) + 1
-        
-        patrones_repetidos = sum(1 for count in patrones.values() if count >= 2)
+        detector = robot.detector_bucles(ventana)
+        if detector is not None:
+            # Variabilidad y trigramas repetidos mantenidos por el motor en la ventana
+            variabilidad = float(detector.variabilidad([robot.id])[0])
+            patrones_repetidos = int(detector.patrones_repetidos([robot.id])[0])
+        else:
+            # Obtener últimas acciones (códigos)
+            ultimas_acciones = percepciones_acciones.ultimas_acciones(ventana)
+            
+            # Calcular variabilidad de acciones
+            acciones_unicas = len(np.unique(ultimas_acciones))
+            variabilidad = acciones_unicas / len(ultimas_acciones)
+            
+            # Detectar patrones repetitivos
+            patrones = contar_trigramas(ultimas_acciones)
+            
+            patrones_repetidos = int((patrones >= 2).sum())
         
         # Determinar si es episódico
         es_episodico = not en_bucle and variabilidad > 0.3
@@ -126,7 +130,7 @@ class AnalizadorExamen:
     
     def _verificar_episodico_robot(self) -> bool:
         """Verifica si el robot es episódico analizando todos los robots vivos"""
-        robots_vivos = [r for r in self.entorno.robots if r.vivo]
+        robots_vivos = self.entorno.robots_vivos()
         if not robots_vivos:
             return True
         
@@ -143,8 +147,10 @@ class AnalizadorExamen:
         """
         tabla = []
         percepciones_acciones = robot.memoria.percepciones_acciones
+        # El historial conserva solo los últimos registros: numerar desde el primero conservado
+        primera = percepciones_acciones.total - len(percepciones_acciones)
         
-        for i, (percepcion, accion) in enumerate(percepciones_acciones):
+        for i, (percepcion, accion) in enumerate(percepciones_acciones, start=primera):
             entrada = {
                 'iteracion': i + 1,
                 'orientacion': percepcion.orientacion.name,
@@ -186,7 +192,7 @@ class AnalizadorExamen:
             efectividades.append(efectividad)
         
         return {
-            'total_entradas': len(percepciones_acciones),
+            'total_entradas': percepciones_acciones.total,
             'patrones_identificados': len(patrones),
             'reglas_aprendidas': len(robot.memoria.reglas_aprendidas),
             'efectividad_promedio': sum(efectividades) / len(efectividades),
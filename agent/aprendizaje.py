@@ -0,0 +1,96 @@
+"""
+APRENDIZAJE DE REGLAS DE LOS ROBOTS
+Confianza por (robot, estado de percepción, acción) en un array denso de la flota
+"""
+
+from collections.abc import Mapping
+from typing import Iterator
+
+import numpy as np
+
+from .ontology import ACCIONES, BIT_MONSTRUO_CERCANO, BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA, BIT_COLISION
+
+
+# Estados de percepción (máscara de 4 bits) y su nombre en las claves de reglas_aprendidas
+N_ESTADOS = 16
+CLAVES_ESTADO = tuple('_'.join(str(bool(b & bit)) for bit in (BIT_MONSTRUO_CERCANO, BIT_ROBOT_DELANTE,
+                                                               BIT_MONSTRUO_EN_CELDA, BIT_COLISION))
+                      for b in range(N_ESTADOS))
+
+# Promedio ponderado con factor de olvido: confianza = OLVIDO * confianza + (1 - OLVIDO) * efectividad
+OLVIDO = 0.9
+
+
+class ReglasFlota:
+    """
+    Reglas aprendidas de toda la flota: confianza (0-1) de cada regla
+    "en este estado de percepción, esta acción" por robot
+    - Array float64 (robots, 16 estados, acciones); NaN = regla aún no aprendida
+    - La primera experiencia fija la confianza y las siguientes la
+      promedian con factor de olvido OLVIDO, para toda la flota en una
+      operación por tick (actualizar) o robot a robot (actualizar_uno)
+    - adaptabilidad resume las reglas de cada robot (término de racionalidad)
+    - exportar / restaurar sacan o precargan las reglas como un solo array
+    """
+
+    def __init__(self, n_robots: int, n_acciones: int = len(ACCIONES)):
+        self.confianza = np.full((n_robots, N_ESTADOS, n_acciones), np.nan)
+
+    def actualizar(self, ids: np.ndarray, estados: np.ndarray, acciones: np.ndarray, efectividad: np.ndarray):
+        """Una experiencia por robot (ids distintos)"""
+        actual = self.confianza[ids, estados, acciones]
+        self.confianza[ids, estados, acciones] = np.where(np.isnan(actual), efectividad,
+                                                          OLVIDO * actual + (1 - OLVIDO) * efectividad)
+
+    def actualizar_uno(self, id: int, estado: int, accion: int, efectividad: float):
+        actual = self.confianza[id, estado, accion]
+        self.confianza[id, estado, accion] = efectividad if np.isnan(actual) else \
+            OLVIDO * actual + (1 - OLVIDO) * efectividad
+
+    def n_reglas(self, ids=None) -> np.ndarray:
+        """Reglas aprendidas por robot"""
+        confianza = self.confianza if ids is None else self.confianza[ids]
+        return (~np.isnan(confianza)).sum(axis=(1, 2))
+
+    def adaptabilidad(self, ids=None) -> np.ndarray:
+        """min(reglas / 10, 1) * confianza media de las reglas aprendidas, por robot"""
+        confianza = self.confianza if ids is None else self.confianza[ids]
+        confianza = confianza.reshape(len(confianza), N_ESTADOS * confianza.shape[2])
+        aprendidas = ~np.isnan(confianza)
+        n = aprendidas.sum(axis=1)
+        media = np.where(aprendidas, confianza, 0.0).sum(axis=1) / np.maximum(n, 1)
+        return np.minimum(n / 10.0, 1.0) * media
+
+    def exportar(self) -> np.ndarray:
+        return self.confianza.copy()
+
+    def restaurar(self, confianza: np.ndarray):
+        """Precarga las reglas: (robots, 16, acciones) o (16, acciones) para toda la flota"""
+        self.confianza[...] = confianza
+
+
+class ReglasAprendidas(Mapping):
+    """
+    Vista con la interfaz del antiguo Dict[str, float] de un robot: clave
+    "cercano_delante_encelda_colision_ACCION" -> confianza
+    """
+
+    def __init__(self, reglas: ReglasFlota, id: int):
+        self.reglas = reglas
+        self.id = id
+
+    def __getitem__(self, clave: str) -> float:
+        *estado, accion = clave.split('_', 4)
+        estado = '_'.join(estado)
+        if estado in CLAVES_ESTADO and accion in ACCIONES:
+            valor = self.reglas.confianza[self.id, CLAVES_ESTADO.index(estado), ACCIONES.index(accion)]
+            if not np.isnan(valor):
+                return float(valor)
+        raise KeyError(clave)
+
+    def __len__(self) -> int:
+        return int(self.reglas.n_reglas([self.id])[0])
+
+    def __iter__(self) -> Iterator[str]:
+        aprendidas = np.argwhere(~np.isnan(self.reglas.confianza[self.id])).tolist()
+        return (f"{CLAVES_ESTADO[e]}_{ACCIONES[a]}" for e, a in aprendidas)
@@ -0,0 +1,165 @@
+"""
+DETECCIÓN DE BUCLES DE LOS ROBOTS
+Trigramas de acciones en una ventana deslizante por robot, mantenidos de forma incremental
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from .ontology import ACCIONES
+
+
+# Ventanas mantenidas por el motor: detectar_bucle_infinito (10) y analizar_episodico (15)
+VENTANAS_BUCLE = (10, 15)
+
+# Un trigrama que aparece UMBRAL_BUCLE veces en la ventana indica un bucle
+UMBRAL_BUCLE = 3
+
+
+class DetectorBucles:
+    """
+    Patrones de las últimas `ventana` acciones de cada robot de la flota
+    - Búfer circular por robot con el código del trigrama que cierra cada
+      acción ((a-2 * A + a-1) * A + a, la acción es el código módulo A) y
+      conteo de cada trigrama (A³) y de cada acción dentro de la ventana
+    - Añadir una acción suma el trigrama que cierra y resta el que sale de
+      la ventana: O(1) por robot, para toda la flota en una operación por
+      tick (registrar) o robot a robot (registrar_uno, acumulado hasta la
+      siguiente consulta o hasta juntar tantas acciones como robots: la
+      cola nunca pasa de un tick)
+    - Lleva por robot cuántos trigramas se repiten (>= 2 y >= UMBRAL_BUCLE
+      veces): en_bucle, patrones_repetidos y variabilidad se consultan en O(1)
+    """
+
+    def __init__(self, n_robots: int, ventana: int, n_acciones: int = len(ACCIONES)):
+        if not 3 <= ventana <= 255:
+            raise ValueError(f"Ventana fuera de rango (3-255): {ventana}")
+        self.ventana = ventana
+        self.n_acciones = n_acciones
+        self.n_trigramas = n_acciones ** 3
+        self.total = np.zeros(n_robots, dtype=np.int64)
+        self.codigos = np.zeros((n_robots, ventana), dtype=np.uint8)
+        self.trigramas = np.zeros((n_robots, self.n_trigramas), dtype=np.uint8)
+        self.acciones = np.zeros((n_robots, n_acciones), dtype=np.uint8)
+        self.repetidos = np.zeros(n_robots, dtype=np.int16)
+        self.en_umbral = np.zeros(n_robots, dtype=np.int16)
+        self._por_registrar: List[Tuple[int, int]] = []
+
+    def registrar(self, ids: np.ndarray, acciones: np.ndarray):
+        """Una acción por robot (ids distintos)"""
+        self._volcar()
+        self._registrar(np.asarray(ids, dtype=np.int64), np.asarray(acciones, dtype=np.int64))
+
+    def registrar_uno(self, id: int, accion: int):
+        self._por_registrar.append((id, accion))
+        if len(self._por_registrar) >= len(self.total):
+            self._volcar()
+
+    def _volcar(self):
+        """Aplica las acciones sueltas en bloques de ids crecientes (cada robot una vez por bloque)"""
+        if not self._por_registrar:
+            return
+        ids, acciones = np.array(self._por_registrar, dtype=np.int64).T
+        self._por_registrar = []
+        cortes = np.flatnonzero(np.diff(ids) <= 0) + 1
+        for i, a in zip(np.split(ids, cortes), np.split(acciones, cortes)):
+            self._registrar(i, a)
+
+    def _registrar(self, ids: np.ndarray, acciones: np.ndarray):
+        W, A = self.ventana, self.n_acciones
+        total = self.total[ids]
+        fila = ids * W
+        codigos = self.codigos.ravel()
+        trigramas = self.trigramas.ravel()
+        conteo_acciones = self.acciones.ravel()
+        # Con la ventana llena sale el trigrama que empieza en la acción más
+        # antigua (el que se cerró dos acciones después) y con él esa acción
+        llena = (total >= W).astype(np.int16)
+        saliente = codigos[fila + (total + 2) % W].astype(np.int64)
+        i = ids * self.n_trigramas + saliente
+        antes = trigramas[i].astype(np.int16)
+        quedan = antes - llena
+        trigramas[i] = quedan
+        conteo_acciones[ids * A + saliente // (A * A)] -= llena.astype(np.uint8)
+        # Entra la acción nueva y el trigrama que cierra con las dos anteriores
+        codigo = (codigos[fila + (total - 1) % W].astype(np.int64) * A + acciones) % self.n_trigramas
+        i = ids * self.n_trigramas + codigo
+        previo = trigramas[i].astype(np.int16)
+        despues = previo + (total >= 2)
+        trigramas[i] = despues
+        conteo_acciones[ids * A + acciones] += 1
+        codigos[fila + total % W] = codigo
+        self.total[ids] = total + 1
+        # Cruces de los umbrales de repetición (en un sentido al salir y en otro al entrar)
+        self.repetidos[ids] += ((quedan >= 2).astype(np.int16) - (antes >= 2) +
+                                (despues >= 2) - (previo >= 2))
+        self.en_umbral[ids] += ((quedan >= UMBRAL_BUCLE).astype(np.int16) - (antes >= UMBRAL_BUCLE) +
+                                (despues >= UMBRAL_BUCLE) - (previo >= UMBRAL_BUCLE))
+
+    def registradas(self, id: int) -> int:
+        """Acciones registradas de un robot (para alinearlo con su historial)"""
+        self._volcar()
+        return int(self.total[id])
+
+    def en_bucle(self, ids=None) -> np.ndarray:
+        """Algún trigrama se repite UMBRAL_BUCLE veces en la ventana (con al menos dos ventanas de historial)"""
+        self._volcar()
+        total = self.total if ids is None else self.total[ids]
+        en_umbral = self.en_umbral if ids is None else self.en_umbral[ids]
+        return (total >= 2 * self.ventana) & (en_umbral > 0)
+
+    def patrones_repetidos(self, ids=None) -> np.ndarray:
+        """Trigramas que aparecen al menos dos veces en la ventana, por robot"""
+        self._volcar()
+        return (self.repetidos if ids is None else self.repetidos[ids]).astype(np.int64)
+
+    def variabilidad(self, ids=None) -> np.ndarray:
+        """Acciones distintas / acciones en la ventana, por robot (1 sin historial)"""
+        self._volcar()
+        total = self.total if ids is None else self.total[ids]
+        distintas = np.count_nonzero(self.acciones if ids is None else self.acciones[ids], axis=1)
+        return np.where(total > 0, distintas / np.maximum(np.minimum(total, self.ventana), 1), 1.0)
+
+    def reconstruir(self, id: int, acciones: np.ndarray, total: int):
+        """Rehace la ventana de un robot a partir de sus últimas acciones (las de su historial) y su total"""
+        self._volcar()
+        W, A = self.ventana, self.n_acciones
+        acciones = np.asarray(acciones, dtype=np.int64)[-W:]
+        # Códigos de trigrama de cada acción (las dos previas a la ventana ya no se conocen: 0)
+        previas = np.r_[0, 0, acciones]
+        codigos = (previas[:-2] * A + previas[1:-1]) * A + acciones
+        self.total[id] = total
+        self.codigos[id] = 0
+        self.codigos[id, np.arange(total - len(acciones), total) % W] = codigos
+        trigramas = np.bincount(codigos[2:], minlength=self.n_trigramas)
+        self.trigramas[id] = trigramas
+        self.acciones[id] = np.bincount(acciones, minlength=A)
+        self.repetidos[id] = np.count_nonzero(trigramas >= 2)
+        self.en_umbral[id] = np.count_nonzero(trigramas >= UMBRAL_BUCLE)
+
+    def exportar(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(total, códigos de la ventana) por robot; los conteos se derivan de ellos"""
+        self._volcar()
+        return self.total.copy(), self.codigos.copy()
+
+    def restaurar(self, total: np.ndarray, codigos: np.ndarray):
+        """Precarga las ventanas y recalcula sus conteos para toda la flota"""
+        self._por_registrar = []
+        W, A = self.ventana, self.n_acciones
+        self.total[:] = total
+        self.codigos[:] = codigos
+        # Ventanas en orden cronológico; las de robots con menos de W acciones empiezan en W - total
+        n = len(self.total)
+        k = np.arange(W)
+        ordenados = self.codigos[np.arange(n)[:, None], (self.total[:, None] - W + k) % W].astype(np.int64)
+        validos = k >= W - np.minimum(self.total, W)[:, None]
+        filas = np.broadcast_to(np.arange(n)[:, None], ordenados.shape)
+        # Trigramas que empiezan dentro de la ventana: los de la tercera acción en adelante
+        completos = k >= W - np.minimum(self.total, W)[:, None] + 2
+        self.trigramas[:] = np.bincount(filas[completos] * self.n_trigramas + ordenados[completos],
+                                        minlength=self.trigramas.size).reshape(self.trigramas.shape)
+        self.acciones[:] = np.bincount(filas[validos] * A + ordenados[validos] % A,
+                                       minlength=self.acciones.size).reshape(self.acciones.shape)
+        self.repetidos[:] = np.count_nonzero(self.trigramas >= 2, axis=1)
+        self.en_umbral[:] = np.count_nonzero(self.trigramas >= UMBRAL_BUCLE, axis=1)
@@ -0,0 +1,131 @@
+"""
+CACHÉ DE MUNDOS EN DISCO
+Mundos generados direccionados por sus parámetros y abiertos con memoria mapeada
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from .octree import GridOctree
+from .storage import GridEmpaquetado, construir_vecindad
+
+
+VERSION = 1
+
+
+class CacheMundos:
+    """
+    Caché en disco de mundos generados, direccionada por contenido
+    - Clave: hash de (N, pvacio, seed, almacenamiento); el mismo mundo se
+      reutiliza con cualquier número de robots y monstruos
+    - Cada entrada guarda el grid en su almacenamiento, el índice de celdas
+      libres, las tablas de vecindad (grid denso) y el estado del generador
+      del mundo tras generarlo, para sortear los agentes igual que sin caché
+    - Los arrays se abren con np.load(mmap_mode='r'): sin copia ni regeneración
+    - Tamaño acotado a max_bytes con expulsión LRU (fecha de modificación
+      de la entrada, renovada en cada acierto)
+    """
+
+    def __init__(self, directorio: str, max_bytes: int = 4 << 30):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    @staticmethod
+    def clave(N: int, pvacio: float, seed: int, almacenamiento: str) -> str:
+        parametros = json.dumps([VERSION, N, float(pvacio), seed, almacenamiento])
+        return hashlib.sha256(parametros.encode()).hexdigest()[:32]
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave)
+
+    def cargar(self, clave: str) -> Optional[tuple]:
+        """(grid, libre, mascaras, libres, estado del generador) o None si no está en caché"""
+        ruta = self._ruta(clave)
+        try:
+            with open(os.path.join(ruta, 'meta.json')) as f:
+                meta = json.load(f)
+            arrays = {nombre: np.load(os.path.join(ruta, f'{nombre}.npy'), mmap_mode='r')
+                      for nombre in meta['arrays']}
+            os.utime(ruta)
+        except FileNotFoundError:
+            # Ausente o expulsada por otro proceso mientras se abría
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+
+        if 'hijos' in arrays:
+            grid = GridOctree(meta['N'], arrays['hijos'], meta['profundidad'])
+        elif 'bits' in arrays:
+            grid = GridEmpaquetado(meta['N'])
+            grid._bits = arrays['bits']
+        else:
+            grid = arrays['grid']
+        if 'libre' in arrays:
+            libre, mascaras = arrays['libre'], arrays['mascaras']
+        else:
+            libre, mascaras = construir_vecindad(grid)
+        return grid, libre, mascaras, arrays.get('libres'), meta['estado_rng']
+
+    def guardar(self, clave: str, grid, libre, mascaras, libres: Optional[np.ndarray], estado_rng: dict):
+        """Escribe una entrada de forma atómica (directorio temporal + rename) y aplica el límite"""
+        if isinstance(grid, GridOctree):
+            arrays, meta = {'hijos': grid._hijos}, {'profundidad': grid.profundidad}
+        elif isinstance(grid, GridEmpaquetado):
+            arrays, meta = {'bits': grid._bits}, {}
+        else:
+            arrays, meta = {'grid': grid, 'libre': libre, 'mascaras': mascaras}, {}
+        if libres is not None:
+            arrays['libres'] = libres
+        meta.update(N=grid.shape[0], arrays=list(arrays), estado_rng=estado_rng)
+
+        temporal = tempfile.mkdtemp(prefix='.tmp-', dir=self.directorio)
+        for nombre, array in arrays.items():
+            np.save(os.path.join(temporal, f'{nombre}.npy'), np.asarray(array))
+        with open(os.path.join(temporal, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        try:
+            os.rename(temporal, self._ruta(clave))
+        except OSError:
+            # Otro proceso guardó el mismo mundo antes
+            shutil.rmtree(temporal, ignore_errors=True)
+        self._expulsar()
+
+    def _entradas(self) -> list:
+        """(última utilización, bytes, ruta) de cada entrada"""
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            if nombre.startswith('.') or not os.path.isdir(ruta):
+                continue
+            try:
+                tam = sum(e.stat().st_size for e in os.scandir(ruta))
+                entradas.append((os.stat(ruta).st_mtime, tam, ruta))
+            except FileNotFoundError:
+                continue
+        return entradas
+
+    def tamaño(self) -> int:
+        return sum(tam for _, tam, _ in self._entradas())
+
+    def _expulsar(self):
+        """Borra las entradas menos recientes hasta no superar max_bytes"""
+        entradas = sorted(self._entradas())
+        total = sum(tam for _, tam, _ in entradas)
+        for _, tam, ruta in entradas:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(ruta, ignore_errors=True)
+            total -= tam
+
+    def vaciar(self):
+        for _, _, ruta in self._entradas():
+            shutil.rmtree(ruta, ignore_errors=True)
@@ -0,0 +1,67 @@
+"""
+CONECTIVIDAD DEL ESPACIO LIBRE
+Componentes conexas de las zonas libres (union-find vectorizado)
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+def etiquetar_componentes(libre: np.ndarray, desplazamientos: tuple) -> np.ndarray:
+    """
+    Etiqueta por celda acolchada de su componente conexa de zona libre
+    (-1 fuera del espacio libre). Las etiquetas son 0..k-1 en orden de la
+    primera celda de cada componente.
+    Union-find por rondas sobre todas las aristas a la vez: cada raíz se
+    engancha a la menor raíz vecina y después se comprimen los caminos.
+    """
+    celdas = np.flatnonzero(libre)
+    n = len(celdas)
+    tipo = np.int32 if n < 2 ** 31 else np.int64
+    compacto = np.full(libre.size, -1, dtype=tipo)
+    compacto[celdas] = np.arange(n, dtype=tipo)
+
+    # Aristas entre celdas libres vecinas (una por par: solo desplazamientos positivos)
+    origenes, destinos = [], []
+    for d in desplazamientos:
+        if d > 0:
+            a = celdas[libre[celdas + d]]
+            origenes.append(compacto[a])
+            destinos.append(compacto[a + d])
+    a = np.concatenate(origenes) if origenes else np.empty(0, dtype=tipo)
+    b = np.concatenate(destinos) if destinos else np.empty(0, dtype=tipo)
+
+    padre = np.arange(n, dtype=tipo)
+    while len(a):
+        ra, rb = padre[a], padre[b]
+        distintas = ra != rb
+        # Aristas dentro de una misma componente ya no aportan nada
+        a, b, ra, rb = a[distintas], b[distintas], ra[distintas], rb[distintas]
+        if not len(a):
+            break
+        np.minimum.at(padre, np.maximum(ra, rb), np.minimum(ra, rb))
+        while True:
+            abuelo = padre[padre]
+            if np.array_equal(abuelo, padre):
+                break
+            padre = abuelo
+
+    # Renumerar las raíces en orden
+    raices, etiquetas_compactas = np.unique(padre, return_inverse=True)
+    etiquetas = np.full(libre.size, -1, dtype=tipo)
+    etiquetas[celdas] = etiquetas_compactas
+    return etiquetas
+
+
+def estadisticas_componentes(etiquetas: np.ndarray, tamaños: np.ndarray, celdas_robots: np.ndarray,
+                             celdas_monstruos: np.ndarray) -> Dict:
+    """Resumen de las componentes y de qué agentes (vivos) pueden alcanzarse entre sí"""
+    con_robots = np.unique(etiquetas[celdas_robots])
+    alcanzables = np.isin(etiquetas[celdas_monstruos], con_robots)
+    return {
+        'componentes_libres': len(tamaños),
+        'tamaño_componente_mayor': int(tamaños.max()) if len(tamaños) else 0,
+        'componentes_con_robots': len(con_robots),
+        'monstruos_inalcanzables': int((~alcanzables).sum()),
+    }
@@ -0,0 +1,228 @@
+"""
+MAPA DE CREENCIAS DE LOS ROBOTS
+Código int8 por (robot, celda) almacenado por bloques, con consultas vectorizadas
+"""
+
+from typing import Dict, Iterator, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .ontology import Posicion
+
+if TYPE_CHECKING:
+    from .environment import EntornoHexaedrico
+
+
+# Códigos de creencia y su nombre en la interfaz de MemoriaRobot.mapa_creencias
+DESCONOCIDA, VISITADA, ZONA_VACIA = 0, 1, 2
+ESTADOS_CREENCIA = (None, "visitado", "zona_vacia")
+CODIGO_ESTADO = {"visitado": VISITADA, "zona_vacia": ZONA_VACIA}
+
+# Lado de los bloques cúbicos de celdas (BLOQUE celdas por bloque)
+LADO_BLOQUE = 8
+BLOQUE = LADO_BLOQUE ** 3
+
+
+class CreenciasFlota:
+    """
+    Creencias de toda la flota: un código int8 por (robot, celda acolchada)
+    - 0 desconocida, 1 visitada, 2 zona vacía (choque con el Vacuscopio)
+    - Se guardan por bloques cúbicos de 8x8x8 celdas que solo se reservan
+      cuando el robot anota alguna celda del bloque: en mundos pequeños
+      equivale a una rejilla densa por robot y en mundos grandes a un mapa
+      disperso que sigue la zona que el robot ha recorrido
+    - Bloques localizados por búsqueda binaria sobre las claves
+      id * n_bloques + bloque, en orden; lecturas y escrituras vectorizadas
+      para arrays de (ids, celdas) y un diccionario para las consultas sueltas
+    """
+
+    def __init__(self, n_robots: int, N: int):
+        self.n_robots = n_robots
+        self.N = N
+        self.lado = N + 2
+        self.n_celdas = self.lado ** 3
+        self.bloques_por_eje = -(-self.lado // LADO_BLOQUE)
+        self.n_bloques = self.bloques_por_eje ** 3
+        self.vaciar()
+
+    def vaciar(self):
+        self._claves = np.empty(0, dtype=np.int64)
+        self._filas = np.empty(0, dtype=np.int64)
+        self._datos = np.zeros((16, BLOQUE), dtype=np.int8)
+        self._fila_de: Dict[int, int] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._fila_de) * BLOQUE + self._claves.nbytes + self._filas.nbytes
+
+    def _ubicar(self, celdas):
+        """(bloque, posición dentro del bloque) de celdas acolchadas (escalares o arrays)"""
+        L, b = self.lado, self.bloques_por_eje
+        x, resto = divmod(celdas, L * L)
+        y, z = divmod(resto, L)
+        bloque = ((x >> 3) * b + (y >> 3)) * b + (z >> 3)
+        return bloque, ((x & 7) << 6) | ((y & 7) << 3) | (z & 7)
+
+    def _buscar(self, claves: np.ndarray) -> np.ndarray:
+        """Fila de cada clave de bloque (-1 si no está reservado)"""
+        if len(self._claves) == 0:
+            return np.full(len(claves), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self._claves, claves), len(self._claves) - 1)
+        return np.where(self._claves[i] == claves, self._filas[i], -1)
+
+    def _reservar(self, claves: np.ndarray) -> np.ndarray:
+        """Reserva bloques a cero para claves nuevas, distintas y ordenadas; retorna sus filas"""
+        n = len(self._fila_de)
+        filas = np.arange(n, n + len(claves), dtype=np.int64)
+        if n + len(claves) > len(self._datos):
+            datos = np.zeros((max(2 * len(self._datos), n + len(claves)), BLOQUE), dtype=np.int8)
+            datos[:n] = self._datos[:n]
+            self._datos = datos
+        posiciones = np.searchsorted(self._claves, claves)
+        self._claves = np.insert(self._claves, posiciones, claves)
+        self._filas = np.insert(self._filas, posiciones, filas)
+        self._fila_de.update(zip(claves.tolist(), filas.tolist()))
+        return filas
+
+    def leer(self, ids: np.ndarray, celdas: np.ndarray) -> np.ndarray:
+        """Código de creencia de cada robot ids[i] sobre celdas[i]"""
+        bloque, j = self._ubicar(np.asarray(celdas, dtype=np.int64))
+        filas = self._buscar(np.asarray(ids, dtype=np.int64) * self.n_bloques + bloque)
+        return np.where(filas >= 0, self._datos[filas, j], DESCONOCIDA).astype(np.int8)
+
+    def escribir(self, ids: np.ndarray, celdas: np.ndarray, codigo: int):
+        """Fija el código de creencia de cada robot ids[i] sobre celdas[i]"""
+        celdas = np.asarray(celdas, dtype=np.int64)
+        if len(celdas) == 0:
+            return
+        bloque, j = self._ubicar(celdas)
+        claves = np.asarray(ids, dtype=np.int64) * self.n_bloques + bloque
+        filas = self._buscar(claves)
+        faltan = filas < 0
+        if faltan.any():
+            nuevas, inversa = np.unique(claves[faltan], return_inverse=True)
+            filas[faltan] = self._reservar(nuevas)[inversa]
+        self._datos[filas, j] = codigo
+
+    def codigo(self, id: int, celda: int) -> int:
+        bloque, j = self._ubicar(celda)
+        fila = self._fila_de.get(id * self.n_bloques + bloque)
+        return DESCONOCIDA if fila is None else int(self._datos[fila, j])
+
+    def anotar(self, id: int, celda: int, codigo: int):
+        bloque, j = self._ubicar(celda)
+        clave = id * self.n_bloques + bloque
+        fila = self._fila_de.get(clave)
+        if fila is None:
+            fila = int(self._reservar(np.array([clave], dtype=np.int64))[0])
+        self._datos[fila, j] = codigo
+
+    def _bloques_de(self, id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(índices de bloque, filas) del robot, en orden"""
+        a, b = np.searchsorted(self._claves, [id * self.n_bloques, (id + 1) * self.n_bloques])
+        return self._claves[a:b] - id * self.n_bloques, self._filas[a:b]
+
+    def celdas(self, id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(celdas, códigos) con creencia del robot, en orden de celda"""
+        bloques, filas = self._bloques_de(id)
+        datos = self._datos[filas]
+        i, j = np.nonzero(datos)
+        b = self.bloques_por_eje
+        bx, resto = np.divmod(bloques[i], b * b)
+        by, bz = np.divmod(resto, b)
+        x, y, z = bx << 3 | j >> 6, by << 3 | (j >> 3) & 7, bz << 3 | j & 7
+        celdas = (x * self.lado + y) * self.lado + z
+        orden = np.argsort(celdas)
+        return celdas[orden], datos[i, j][orden]
+
+    def conteos(self, codigo: int) -> np.ndarray:
+        """Celdas con el código dado por robot (toda la flota en una pasada)"""
+        por_fila = (self._datos[self._filas] == codigo).sum(axis=1)
+        return np.bincount(self._claves // self.n_bloques, weights=por_fila,
+                           minlength=self.n_robots).astype(np.int64)
+
+    def fraccion_explorada(self, n_libres: int) -> np.ndarray:
+        """Fracción de la zona libre visitada por cada robot"""
+        return self.conteos(VISITADA) / max(n_libres, 1)
+
+    def exportar(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(claves, bloques) en orden de clave"""
+        return self._claves.copy(), self._datos[self._filas]
+
+    def restaurar(self, claves: np.ndarray, bloques: np.ndarray):
+        self.vaciar()
+        self._reservar(np.asarray(claves, dtype=np.int64))
+        self._datos[self._filas] = bloques
+
+
+class _VistaCreencias:
+    """Creencias de un robot direccionadas por Posicion (incluido el borde acolchado)"""
+
+    def __init__(self, creencias: CreenciasFlota, id: int, entorno: 'EntornoHexaedrico'):
+        self.creencias = creencias
+        self.id = id
+        self.entorno = entorno
+
+    def _codigo(self, pos: Posicion) -> int:
+        n = self.creencias.N
+        if not (-1 <= pos.x <= n and -1 <= pos.y <= n and -1 <= pos.z <= n):
+            return DESCONOCIDA
+        return self.creencias.codigo(self.id, self.entorno.celda_de(pos))
+
+    def _celdas(self, codigo: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        celdas, codigos = self.creencias.celdas(self.id)
+        if codigo is not None:
+            celdas, codigos = celdas[codigos == codigo], codigos[codigos == codigo]
+        return celdas, codigos
+
+
+class MapaCreencias(_VistaCreencias):
+    """Vista con la interfaz del antiguo Dict[Posicion, str] ("visitado" / "zona_vacia")"""
+
+    def __contains__(self, pos: Posicion) -> bool:
+        return self._codigo(pos) != DESCONOCIDA
+
+    def __getitem__(self, pos: Posicion) -> str:
+        codigo = self._codigo(pos)
+        if codigo == DESCONOCIDA:
+            raise KeyError(pos)
+        return ESTADOS_CREENCIA[codigo]
+
+    def __setitem__(self, pos: Posicion, estado: str):
+        self.creencias.anotar(self.id, self.entorno.celda_de(pos), CODIGO_ESTADO[estado])
+
+    def get(self, pos: Posicion, defecto=None):
+        codigo = self._codigo(pos)
+        return defecto if codigo == DESCONOCIDA else ESTADOS_CREENCIA[codigo]
+
+    def __len__(self) -> int:
+        return len(self._celdas()[0])
+
+    def items(self) -> Iterator[Tuple[Posicion, str]]:
+        celdas, codigos = self._celdas()
+        return ((self.entorno.posicion_de(c), ESTADOS_CREENCIA[e]) for c, e in zip(celdas.tolist(), codigos.tolist()))
+
+    def __iter__(self) -> Iterator[Posicion]:
+        return (pos for pos, _ in self.items())
+
+    def keys(self) -> Iterator[Posicion]:
+        return iter(self)
+
+    def values(self) -> Iterator[str]:
+        return (estado for _, estado in self.items())
+
+
+class ZonasVaciasConocidas(_VistaCreencias):
+    """Vista con la interfaz del antiguo set de Posicion de zonas vacías conocidas"""
+
+    def __contains__(self, pos: Posicion) -> bool:
+        return self._codigo(pos) == ZONA_VACIA
+
+    def add(self, pos: Posicion):
+        self.creencias.anotar(self.id, self.entorno.celda_de(pos), ZONA_VACIA)
+
+    def __len__(self) -> int:
+        return len(self._celdas(ZONA_VACIA)[0])
+
+    def __iter__(self) -> Iterator[Posicion]:
+        return (self.entorno.posicion_de(c) for c in self._celdas(ZONA_VACIA)[0].tolist())
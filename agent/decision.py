@@ -0,0 +1,88 @@
+"""
+TABLA DE DECISIÓN DE LOS ROBOTS
+Jerarquía de reglas compilada en una tabla indexada por una clave de bits
+"""
+
+from typing import Callable, Union
+
+import numpy as np
+
+from .ontology import ACCIONES, CODIGO_ACCION
+
+
+# Condiciones de la clave de decisión, del bit 0 al 6. Las tres primeras
+# coinciden con los bits de percepción de ontology (BIT_MONSTRUO_CERCANO,
+# BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA)
+CONDICIONES = ('monstruo_cercano', 'robot_delante', 'monstruo_en_celda',
+               'vacia_conocida', 'visitada', 'libre_adelante', 'id_menor')
+N_CLAVES = 1 << len(CONDICIONES)
+
+
+def clave_decision(monstruo_cercano, robot_delante, monstruo_en_celda, vacia_conocida, visitada,
+                   libre_adelante, id_menor):
+    """Clave de la tabla a partir de las condiciones (booleanos sueltos o arrays de la flota)"""
+    return (monstruo_cercano * 1 | robot_delante * 2 | monstruo_en_celda * 4 | vacia_conocida * 8 |
+            visitada * 16 | libre_adelante * 32 | id_menor * 64)
+
+
+def _codigo(accion: Union[int, str]) -> int:
+    return CODIGO_ACCION[accion] if isinstance(accion, str) else int(accion)
+
+
+class TablaDecision:
+    """
+    Jerarquía de reglas compilada: para cada clave de condiciones
+    - `accion`, `alternativa` y `probabilidad` de tomar la alternativa
+      (las ramas estocásticas de las reglas; 0 en las entradas deterministas)
+    - resolver decide toda la flota con una consulta por array
+    - resolver_uno decide un robot y solo consume un aleatorio si su
+      entrada es estocástica
+    """
+
+    def __init__(self, accion: np.ndarray, alternativa: np.ndarray, probabilidad: np.ndarray):
+        self.accion = np.asarray(accion, dtype=np.int8)
+        self.alternativa = np.asarray(alternativa, dtype=np.int8)
+        self.probabilidad = np.asarray(probabilidad, dtype=np.float64)
+        # Las mismas tablas como listas para el ciclo de un solo robot
+        self._entradas = list(zip(self.accion.tolist(), self.alternativa.tolist(), self.probabilidad.tolist()))
+
+    def resolver(self, claves: np.ndarray, uniformes: np.ndarray) -> np.ndarray:
+        """Acción de cada robot a partir de su clave y un uniforme en [0, 1)"""
+        return np.where(uniformes < self.probabilidad[claves], self.alternativa[claves],
+                        self.accion[claves]).astype(np.int8)
+
+    def resolver_uno(self, clave: int, rng) -> int:
+        accion, alternativa, probabilidad = self._entradas[clave]
+        if probabilidad <= 0.0:
+            return accion
+        if probabilidad >= 1.0:
+            return alternativa
+        return alternativa if rng.random() < probabilidad else accion
+
+    def describir(self, clave: int) -> str:
+        """Condiciones activas y decisión de una entrada, con nombres de acción"""
+        activas = [c for i, c in enumerate(CONDICIONES) if clave >> i & 1]
+        accion, alternativa, probabilidad = self._entradas[clave]
+        decision = ACCIONES[accion]
+        if probabilidad > 0.0:
+            decision += f" / {ACCIONES[alternativa]} (p={probabilidad:g})"
+        return f"{' & '.join(activas) or '-'} → {decision}"
+
+
+def compilar_reglas(reglas: Callable[..., Union[int, str, tuple]]) -> TablaDecision:
+    """
+    Evalúa un conjunto de reglas en las N_CLAVES combinaciones de condiciones.
+    `reglas` recibe las CONDICIONES como argumentos con nombre y retorna una
+    acción (código o nombre) o una terna (acción, alternativa, probabilidad
+    de la alternativa)
+    """
+    accion = np.empty(N_CLAVES, dtype=np.int8)
+    alternativa = np.empty(N_CLAVES, dtype=np.int8)
+    probabilidad = np.zeros(N_CLAVES, dtype=np.float64)
+    for clave in range(N_CLAVES):
+        resultado = reglas(**{c: bool(clave >> i & 1) for i, c in enumerate(CONDICIONES)})
+        if not isinstance(resultado, tuple):
+            resultado = (resultado, resultado, 0.0)
+        accion[clave], alternativa[clave] = _codigo(resultado[0]), _codigo(resultado[1])
+        probabilidad[clave] = resultado[2]
+    return TablaDecision(accion, alternativa, probabilidad)
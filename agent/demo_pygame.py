@@ -9,7 +9,7 @@ import os
 # Agregar el directorio padre al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agent import EntornoHexaedrico, VisualizadorPygame
+from agent import EntornoHexaedrico, VisualizadorPygame, ReproduccionTrayectoria
 
 
 def demo_basico():
@@ -113,6 +113,30 @@ def demo_muchos_agentes():
     visualizador.ejecutar_con_visualizacion(max_iteraciones=1000)
 
 
+def demo_reproduccion(ruta: str = "trayectoria.bin"):
+    """Demo que registra una ejecución sin ventana y luego la reproduce"""
+    print("\n=== DEMO: REPRODUCCIÓN DE UNA EJECUCIÓN REGISTRADA ===\n")
+    
+    entorno = EntornoHexaedrico(
+        N=8,
+        pfree=0.85,
+        pvacio=0.15,
+        n_robots=10,
+        n_monstruos=15,
+        seed=456
+    )
+    
+    registro = entorno.registrar_trayectoria(ruta, intervalo_clave=100)
+    for _ in range(2000):
+        entorno.actualizar()
+    registro.cerrar()
+    
+    fuente = ReproduccionTrayectoria(ruta)
+    visualizador = VisualizadorPygame(fuente, ancho=1400, alto=900)
+    visualizador.ejecutar_reproduccion(ticks_por_segundo=20)
+    fuente.cerrar()
+
+
 def menu_principal():
     """Menú de selección de demos"""
     while True:
@@ -123,6 +147,7 @@ def menu_principal():
         print("2. Demo Mundo Grande (7x7x7, 5 robots, 8 monstruos)")
         print("3. Demo Mundo Pequeño (3x3x3, 2 robots, 3 monstruos)")
         print("4. Demo Muchos Agentes (8x8x8, 10 robots, 15 monstruos)")
+        print("5. Demo Reproducción (registrar 2000 iteraciones y reproducirlas)")
         print("0. Salir")
         print("="*60)
         
@@ -137,6 +162,8 @@ def menu_principal():
                 demo_mundo_pequeño()
             elif opcion == "4":
                 demo_muchos_agentes()
+            elif opcion == "5":
+                demo_reproduccion()
             elif opcion == "0":
                 print("\n¡Hasta luego!")
                 break
@@ -161,6 +188,8 @@ if __name__ == "__main__":
             demo_mundo_pequeño()
         elif demo_num == "4":
             demo_muchos_agentes()
+        elif demo_num == "5":
+            demo_reproduccion()
         else:
             print(f"❌ Demo {demo_num} no existe")
     else:
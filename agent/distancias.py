@@ -0,0 +1,166 @@
+"""
+CAMPOS DE DISTANCIAS
+Distancias BFS multi-fuente sobre la zona libre, con actualización incremental
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class CampoDistancias:
+    """
+    Distancia por zona libre (6-vecindad) de cada celda acolchada a la fuente más cercana
+    - BFS multi-fuente vectorizado por niveles, truncado a `radio`: las celdas
+      más lejanas (y las que no son libres) valen radio + 1
+    - quitar_fuentes y bloquear (celdas que dejan de ser transitables)
+      acumulan cambios; al consultar se recalcula solo la bola de radio
+      `radio` alrededor de las celdas cambiadas, sembrada desde su borde: el
+      coste por tick no depende del tamaño del mundo
+    - `direcciones` limita los pasos a un subconjunto simétrico de los 6
+      desplazamientos (p. ej. los que los robots pueden encarar)
+    - Con `olvido`, una celda quitada vuelve a ser fuente si pasan `olvido`
+      ticks (avanzar_tick) sin quitarla de nuevo: patrulla de zonas no revisadas
+    """
+
+    def __init__(self, libre: np.ndarray, desplazamientos: tuple, fuentes: np.ndarray, radio: int = 12,
+                 direcciones: tuple = None, olvido: int = None):
+        self.libre = libre
+        self.desplazamientos = np.array(desplazamientos, dtype=np.int64)
+        self.usables = np.zeros(len(desplazamientos), dtype=bool)
+        self.usables[list(range(len(desplazamientos)) if direcciones is None else direcciones)] = True
+        self._pasos = self.desplazamientos[self.usables]
+        self.radio = radio
+        self.lejos = radio + 1
+        self.fuentes = fuentes & libre
+        self.distancia = np.full(libre.size, self.lejos, dtype=np.int16)
+        self._marca = np.zeros(libre.size, dtype=bool)
+        self._pendientes = []
+        self._bloqueadas = []
+        
+        # Tick de la última vez que se quitó cada celda y celdas quitadas por tick
+        self.olvido = olvido
+        self.tick = 0
+        self.visita = np.full(libre.size, -1, dtype=np.int32) if olvido else None
+        self._quitadas_por_tick = deque([[]])
+
+        semillas = np.flatnonzero(self.fuentes)
+        self.distancia[semillas] = 0
+        self._propagar(semillas, np.zeros(len(semillas), dtype=np.int64))
+
+    def _vecinos_libres(self, celdas: np.ndarray) -> np.ndarray:
+        vecinos = (celdas[:, None] + self._pasos).ravel()
+        return vecinos[self.libre[vecinos]]
+
+    def _propagar(self, celdas: np.ndarray, distancias: np.ndarray):
+        """BFS por niveles desde semillas con distancia ya asignada (cada una entra en su nivel)"""
+        orden = np.argsort(distancias, kind='stable')
+        celdas, distancias = celdas[orden], distancias[orden]
+        cortes = np.searchsorted(distancias, np.arange(self.radio + 1))
+        frontera = np.empty(0, dtype=np.int64)
+        for nivel in range(self.radio):
+            frontera = np.concatenate((frontera, celdas[cortes[nivel]:cortes[nivel + 1]]))
+            if not len(frontera):
+                if cortes[nivel + 1] == len(celdas):
+                    break
+                continue
+            vecinos = self._vecinos_libres(frontera)
+            frontera = np.unique(vecinos[self.distancia[vecinos] > nivel + 1])
+            self.distancia[frontera] = nivel + 1
+
+    def quitar_fuentes(self, celdas: np.ndarray):
+        """Las celdas dejan de ser fuente (se aplica en la siguiente consulta)"""
+        celdas = np.array(celdas, dtype=np.int64)  # Copia: el llamador puede reutilizar su array
+        self._pendientes.append(celdas)
+        if self.olvido:
+            self.visita[celdas] = self.tick
+            self._quitadas_por_tick[-1].append(celdas)
+    
+    def bloquear(self, celdas: np.ndarray):
+        """Las celdas dejan de ser transitables (y fuente); se aplica en la siguiente consulta"""
+        celdas = np.array(celdas, dtype=np.int64)
+        celdas = celdas[self.libre[celdas]]
+        if len(celdas):
+            self.libre[celdas] = False
+            self._bloqueadas.append(celdas)
+    
+    def avanzar_tick(self):
+        """Pasa un tick: vuelven a ser fuente las celdas no quitadas en los últimos `olvido` ticks"""
+        if not self.olvido:
+            return
+        self.tick += 1
+        self._quitadas_por_tick.append([])
+        if len(self._quitadas_por_tick) <= self.olvido:
+            return
+        antiguas = self._quitadas_por_tick.popleft()
+        if antiguas:
+            antiguas = np.unique(np.concatenate(antiguas))
+            self.agregar_fuentes(antiguas[self.visita[antiguas] == self.tick - self.olvido])
+    
+    def agregar_fuentes(self, celdas: np.ndarray):
+        """Las celdas pasan a ser fuente: las distancias solo pueden bajar, basta propagar desde ellas"""
+        self.sincronizar()
+        celdas = np.asarray(celdas, dtype=np.int64)
+        celdas = celdas[self.libre[celdas] & ~self.fuentes[celdas]]
+        self.fuentes[celdas] = True
+        self.distancia[celdas] = 0
+        self._propagar(celdas, np.zeros(len(celdas), dtype=np.int64))
+    
+    def restaurar_olvido(self, visita: np.ndarray, tick: int):
+        """Reconstruye el reloj de olvido a partir de los ticks de última visita"""
+        self.visita[...] = visita
+        self.tick = tick
+        inicio = max(0, tick - self.olvido + 1)
+        ventana = np.flatnonzero(self.visita >= inicio)
+        self._quitadas_por_tick = deque([[ventana[self.visita[ventana] == t]] for t in range(inicio, tick + 1)])
+
+    def sincronizar(self):
+        """Aplica los cambios de fuentes pendientes"""
+        if not self._pendientes and not self._bloqueadas:
+            return
+        quitadas = np.unique(np.concatenate(self._pendientes + self._bloqueadas))
+        self._pendientes = []
+        quitadas = quitadas[self.fuentes[quitadas] | ~self.libre[quitadas]]
+        self._bloqueadas = []
+        if not len(quitadas):
+            return
+        self.fuentes[quitadas] = False
+
+        # Bola de radio `radio` (por zona libre) alrededor de las celdas quitadas:
+        # fuera de ella ninguna distancia truncada depende de ellas
+        region = [quitadas]
+        self._marca[quitadas] = True
+        frontera = quitadas
+        for _ in range(self.radio):
+            vecinos = self._vecinos_libres(frontera)
+            frontera = np.unique(vecinos[~self._marca[vecinos]])
+            if not len(frontera):
+                break
+            self._marca[frontera] = True
+            region.append(frontera)
+        region = np.concatenate(region)
+
+        # Recalcular la región desde sus fuentes y desde el borde exterior
+        self.distancia[region] = self.lejos
+        fuentes = region[self.fuentes[region]]
+        self.distancia[fuentes] = 0
+        borde = self._vecinos_libres(region)
+        borde = np.unique(borde[~self._marca[borde]])
+        borde = borde[self.distancia[borde] < self.lejos]
+        self._marca[region] = False
+        self._propagar(np.concatenate((fuentes, borde)),
+                       np.concatenate((np.zeros(len(fuentes), dtype=np.int64), self.distancia[borde])))
+
+    def direccion_descendente(self, celdas: np.ndarray, preferida: np.ndarray) -> np.ndarray:
+        """
+        Dirección (índice en DIRECCIONES) hacia el vecino de menor distancia, o -1
+        si ninguno está más cerca de una fuente; en empate gana `preferida`
+        """
+        self.sincronizar()
+        propia = self.distancia[celdas]
+        vecinos = np.where(self.usables, self.distancia[celdas[:, None] + self.desplazamientos],
+                           np.iinfo(self.distancia.dtype).max)
+        menor = vecinos.min(axis=1)
+        direccion = np.where(vecinos[np.arange(len(celdas)), preferida] == menor,
+                             preferida, vecinos.argmin(axis=1))
+        return np.where(menor < propia, direccion, -1)
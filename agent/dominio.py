@@ -0,0 +1,391 @@
+"""
+DESCOMPOSICIÓN ESPACIAL DEL MUNDO
+Un único entorno repartido en losas de X entre procesos trabajadores
+"""
+
+import multiprocessing as mp
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .aleatorio import FlujoAleatorio
+from .creencias import DESCONOCIDA, VISITADA, ZONA_VACIA
+from .monster_agent import sortear_destinos
+from .paralelo import MundoCompartido
+from .robot_agent import (decidir_acciones, emparejar_victimas, empaquetar_bits, menor_id_por_celda,
+                          TABLA_PUNTUACION, VACUUMATOR, MOVER_ADELANTE, ROTAR_90)
+
+if TYPE_CHECKING:
+    from .environment import EntornoHexaedrico
+
+
+CAMPOS_ROBOTS = ('gid', 'celda', 'orientacion', 'vivo', 'puntuacion',
+                 'monstruos_destruidos', 'movimientos', 'colisiones', 'relativa', 'ultima_celda')
+CAMPOS_MONSTRUOS = ('gid', 'celda', 'K', 'p', 'vivo')
+
+# Id "sin robot" en las consultas de menor id por celda
+_SIN_ROBOT = np.iinfo(np.int64).max
+
+
+def _en_ordenado(ordenado: np.ndarray, valores: np.ndarray) -> np.ndarray:
+    """valores[i] está en el array ordenado (búsqueda binaria)"""
+    if len(ordenado) == 0:
+        return np.zeros(np.shape(valores), dtype=bool)
+    i = np.minimum(np.searchsorted(ordenado, valores), len(ordenado) - 1)
+    return ordenado[i] == valores
+
+
+def _seleccionar(agentes: Dict[str, np.ndarray], mascara: np.ndarray) -> Dict[str, np.ndarray]:
+    return {campo: valores[mascara] for campo, valores in agentes.items()}
+
+
+def _unir(partes: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {campo: np.concatenate([p[campo] for p in partes]) for campo in partes[0]}
+
+
+class _Losa:
+    """
+    Estado de un trabajador: los agentes cuya celda cae en x0 <= x < x1
+    - Capas fantasma con los robots (celda, id) y monstruos (celda) vivos de
+      las capas contiguas de las losas vecinas
+    - Creencias por robot (celdas conocidas, zonas vacías), que migran con él
+    - Cada paso retorna las experiencias de sus robots (gid, orientación,
+      bits de percepción, acción) para que el coordinador las registre
+    """
+
+    def __init__(self, mundo: MundoCompartido, x0: int, x1: int, tablas: tuple,
+                 robots: Dict, monstruos: Dict, creencias: Dict, semilla: np.random.SeedSequence):
+        self.libre, self.mascaras = mundo.libre, mundo.mascaras
+        self.L = mundo.N + 2
+        self.x0, self.x1 = x0, x1
+        self.adelante, self.visibles, self.rotacion, self.vector, self.desplazamientos, self.tabla_decision = tablas
+        self.robots, self.monstruos, self.creencias = robots, monstruos, creencias
+        semilla_robots, semilla_monstruos = semilla.spawn(2)
+        self.rng_robots = FlujoAleatorio(semilla_robots)
+        self.rng_monstruos = FlujoAleatorio(semilla_monstruos)
+        self.fantasmas_robots = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self.fantasmas_monstruos = np.empty(0, dtype=np.int64)
+
+    def _x(self, celdas: np.ndarray) -> np.ndarray:
+        return celdas // (self.L * self.L) - 1
+
+    def halo(self) -> tuple:
+        """Capas de frontera (izquierda x0, derecha x1-1) para las losas vecinas"""
+        r, m = self.robots, self.monstruos
+        xr, xm = self._x(r['celda']), self._x(m['celda'])
+        capas = []
+        for x in (self.x0, self.x1 - 1):
+            en_r = r['vivo'] & (xr == x)
+            capas.append({'robots': (r['celda'][en_r], r['gid'][en_r]),
+                          'monstruos': m['celda'][m['vivo'] & (xm == x)]})
+        return tuple(capas)
+
+    def fijar_fantasmas(self, capas: List[Dict]):
+        capas = [c for c in capas if c is not None]
+        self.fantasmas_robots = (
+            np.concatenate([c['robots'][0] for c in capas] + [np.empty(0, dtype=np.int64)]),
+            np.concatenate([c['robots'][1] for c in capas] + [np.empty(0, dtype=np.int64)]))
+        self.fantasmas_monstruos = np.concatenate([c['monstruos'] for c in capas] + [np.empty(0, dtype=np.int64)])
+
+    def paso(self, iteracion: int) -> tuple:
+        """Robots y luego monstruos; retorna los migrantes (izquierda, derecha), estadísticas y experiencias"""
+        experiencias = self._paso_robots()
+        self._paso_monstruos(iteracion)
+        # Las estadísticas cuentan también los agentes que migran en esta barrera
+        estadisticas = self.estadisticas()
+        return self._extraer_migrantes() + (estadisticas, experiencias)
+
+    def _paso_robots(self) -> tuple:
+        """Mismo paso síncrono que MotorRobots.paso, con los sensores leyendo las capas fantasma"""
+        r, m = self.robots, self.monstruos
+        filas = np.flatnonzero(r['vivo'])
+        if len(filas) == 0:
+            vacio = np.empty(0, dtype=np.int64)
+            return vacio, vacio, vacio, vacio
+        gid, celda, orient = r['gid'][filas], r['celda'][filas], r['orientacion'][filas]
+        adelante = celda + self.adelante[orient]
+        libre_adelante = self.libre[adelante]
+
+        celdas_monstruos = np.sort(np.concatenate((m['celda'][m['vivo']], self.fantasmas_monstruos)))
+        monstruo_en_celda = _en_ordenado(celdas_monstruos, celda)
+        visibles = celda[:, None] + self.visibles[orient]
+        monstruo_cercano = (self.libre[visibles] & _en_ordenado(celdas_monstruos, visibles)).any(axis=1)
+        celdas_fantasma, gids_fantasma = self.fantasmas_robots
+        menor_id_delante = menor_id_por_celda(np.concatenate((celda, celdas_fantasma)),
+                                              np.concatenate((gid, gids_fantasma)), adelante, _SIN_ROBOT)
+        robot_delante = libre_adelante & (menor_id_delante != _SIN_ROBOT)
+
+        creencias = [self.creencias[g] for g in gid.tolist()]
+        destinos = adelante.tolist()
+        vacia_conocida = np.fromiter((d in c[1] for d, c in zip(destinos, creencias)), dtype=bool, count=len(filas))
+        visitada = np.fromiter((d in c[0] for d, c in zip(destinos, creencias)), dtype=bool,
+                               count=len(filas)) & ~vacia_conocida
+
+        accion = decidir_acciones(gid, menor_id_delante, monstruo_en_celda, robot_delante,
+                                  monstruo_cercano, libre_adelante, vacia_conocida, visitada,
+                                  self.rng_robots.uniformes(len(filas)), self.tabla_decision)
+
+        mueve = accion == MOVER_ADELANTE
+        exito = mueve & libre_adelante
+        colision = mueve & ~libre_adelante
+        rota = accion == ROTAR_90
+
+        r['celda'][filas[exito]] = adelante[exito]
+        r['relativa'][filas[exito]] += self.vector[orient[exito]]
+        r['ultima_celda'][filas[exito]] = celda[exito]
+        r['movimientos'][filas[exito]] += 1
+        r['colisiones'][filas[colision]] += 1
+        bits = empaquetar_bits(monstruo_cercano, robot_delante, monstruo_en_celda, colision)
+        r['puntuacion'][filas] += TABLA_PUNTUACION[accion, bits]
+        lados = self.rng_robots.enteros(4, int(rota.sum()))
+        r['orientacion'][filas[rota]] = self.rotacion[orient[rota], lados]
+
+        for i in np.flatnonzero(mueve).tolist():
+            creencias[i][0].add(destinos[i])
+        for i in np.flatnonzero(colision).tolist():
+            creencias[i][1].add(destinos[i])
+
+        vacuumator = filas[accion == VACUUMATOR]
+        if len(vacuumator):
+            self._vacuumator(vacuumator)
+        return gid, orient, bits, accion
+
+    def _vacuumator(self, filas: np.ndarray):
+        r, m = self.robots, self.monstruos
+        celdas = r['celda'][filas]
+        candidatos = np.flatnonzero(m['vivo'] & np.isin(m['celda'], celdas))
+        fila_de = dict(zip(m['gid'][candidatos].tolist(), candidatos.tolist()))
+        victimas = emparejar_victimas(celdas, r['gid'][filas], m['celda'][candidatos], m['gid'][candidatos])
+
+        caza = victimas >= 0
+        m['vivo'][[fila_de[v] for v in victimas[caza].tolist()]] = False
+        r['monstruos_destruidos'][filas[caza]] += 1
+        r['puntuacion'][filas[caza]] += 1000
+        r['vivo'][filas] = False
+
+    def _paso_monstruos(self, iteracion: int):
+        """Mismo paso que MotorMonstruos.paso (no depende de otros agentes)"""
+        m = self.monstruos
+        filas = np.flatnonzero(m['vivo'])
+        filas = filas[iteracion % m['K'][filas] == 0]
+        filas = filas[self.rng_monstruos.uniformes(len(filas)) < m['p'][filas]]
+        origenes = m['celda'][filas]
+        pueden, destinos = sortear_destinos(origenes, self.mascaras[origenes],
+                                            self.desplazamientos, self.rng_monstruos)
+        m['celda'][filas[pueden]] = destinos
+
+    def _extraer_migrantes(self) -> tuple:
+        """Separa los agentes que han salido de la losa (solo pueden ir a una vecina)"""
+        migrantes = []
+        xr, xm = self._x(self.robots['celda']), self._x(self.monstruos['celda'])
+        for fuera_r, fuera_m in ((xr < self.x0, xm < self.x0), (xr >= self.x1, xm >= self.x1)):
+            robots = _seleccionar(self.robots, fuera_r)
+            migrantes.append({'robots': robots,
+                              'creencias': {g: self.creencias.pop(g) for g in robots['gid'].tolist()},
+                              'monstruos': _seleccionar(self.monstruos, fuera_m)})
+        quedan_r = (xr >= self.x0) & (xr < self.x1)
+        quedan_m = (xm >= self.x0) & (xm < self.x1)
+        self.robots = _seleccionar(self.robots, quedan_r)
+        self.monstruos = _seleccionar(self.monstruos, quedan_m)
+        return tuple(migrantes)
+
+    def recibir(self, migrantes: List[Dict]):
+        for llegada in migrantes:
+            if llegada is None:
+                continue
+            self.robots = _unir([self.robots, llegada['robots']])
+            self.monstruos = _unir([self.monstruos, llegada['monstruos']])
+            self.creencias.update(llegada['creencias'])
+
+    def estadisticas(self) -> tuple:
+        r = self.robots
+        return (int(r['vivo'].sum()), int(self.monstruos['vivo'].sum()),
+                int(r['monstruos_destruidos'].sum()), int(r['puntuacion'].sum()))
+
+
+def _trabajador(conexion, descriptor: tuple, x0: int, x1: int, tablas: tuple,
+                robots: Dict, monstruos: Dict, creencias: Dict, semilla):
+    """Bucle de un proceso trabajador: atiende las órdenes del coordinador"""
+    mundo = MundoCompartido.adjuntar(descriptor)
+    losa = _Losa(mundo, x0, x1, tablas, robots, monstruos, creencias, semilla)
+    try:
+        while True:
+            orden, *args = conexion.recv()
+            if orden == 'halo':
+                losa.recibir(args[0])
+                conexion.send(losa.halo())
+            elif orden == 'paso':
+                losa.fijar_fantasmas(args[1])
+                conexion.send(losa.paso(args[0]))
+            elif orden == 'fin':
+                conexion.send((losa.robots, losa.monstruos, losa.creencias))
+                break
+    finally:
+        losa = None
+        mundo.cerrar()
+
+
+class SimuladorDistribuido:
+    """
+    Ejecuta un EntornoHexaedrico repartido en losas de X entre procesos
+    - El terreno se comparte en memoria (MundoCompartido); cada trabajador es
+      dueño de los agentes de su losa
+    - Antes de cada iteración, intercambio de halo: cada losa recibe como capa
+      fantasma los agentes vivos de las capas contiguas, que leen los sensores
+      junto a la frontera
+    - Cada iteración conserva el orden de actualizar(): primero los robots
+      (paso síncrono, mismas reglas que MotorRobots), luego los monstruos
+    - En la barrera de fin de iteración, los agentes que cruzan una frontera
+      migran a la losa vecina con su estado y sus creencias
+    - Tras cada iteración el coordinador registra en el motor las
+      experiencias de todas las losas (reglas aprendidas, historial,
+      métricas y ventanas de bucles); al terminar, el estado de los agentes
+      (con la posición relativa de cada robot) se vuelca en el entorno
+    - No reparte la estrategia 'gradiente' (rechazada) ni escribe el
+      registro de trayectoria del entorno
+    - Cada trabajador tiene sus propios flujos aleatorios: los resultados son
+      reproducibles para una semilla y un número de procesos dados
+    """
+
+    def __init__(self, entorno: 'EntornoHexaedrico', procesos: Optional[int] = None, seed: Optional[int] = None):
+        if not isinstance(entorno.mascaras, np.ndarray):
+            raise ValueError("La descomposición en losas requiere el almacenamiento 'denso'")
+        if entorno.campo_exploracion is not None:
+            raise ValueError("La estrategia 'gradiente' no se reparte en losas")
+        self.entorno = entorno
+        self.procesos = max(1, min(procesos or mp.cpu_count(), entorno.N))
+        self.seed = seed
+        self.historial_estadisticas = []
+
+    def _repartir(self) -> List[tuple]:
+        """Arrays de agentes y creencias de cada losa"""
+        entorno = self.entorno
+        motor_r, motor_m = entorno.motor_robots, entorno.motor_monstruos
+        L = entorno.N + 2
+        robots = {'gid': np.arange(len(motor_r)), 'celda': motor_r.celda, 'orientacion': motor_r.orientacion,
+                  'vivo': motor_r.vivo, 'puntuacion': motor_r.puntuacion,
+                  'monstruos_destruidos': motor_r.monstruos_destruidos,
+                  'movimientos': motor_r.movimientos, 'colisiones': motor_r.colisiones,
+                  'relativa': motor_r.relativa, 'ultima_celda': motor_r.ultima_celda}
+        monstruos = {'gid': np.arange(len(motor_m)), 'celda': motor_m.celda, 'K': motor_m.K,
+                     'p': motor_m.p, 'vivo': motor_m.vivo}
+
+        creencias = {}
+        for g in range(len(motor_r)):
+            celdas, codigos = motor_r.creencias.celdas(g)
+            creencias[g] = (set(celdas[codigos != DESCONOCIDA].tolist()), set(celdas[codigos == ZONA_VACIA].tolist()))
+
+        cortes = np.linspace(0, entorno.N, self.procesos + 1).astype(int)
+        xr, xm = robots['celda'] // (L * L) - 1, monstruos['celda'] // (L * L) - 1
+        losas = []
+        for x0, x1 in zip(cortes[:-1], cortes[1:]):
+            en_r, en_m = (xr >= x0) & (xr < x1), (xm >= x0) & (xm < x1)
+            parte_r = _seleccionar(robots, en_r)
+            losas.append((int(x0), int(x1), parte_r, _seleccionar(monstruos, en_m),
+                          {g: creencias[g] for g in parte_r['gid'].tolist()}))
+        return losas
+
+    def _volcar(self, estados: List[tuple]):
+        """Escribe en el entorno el estado final de todas las losas"""
+        motor_r, motor_m = self.entorno.motor_robots, self.entorno.motor_monstruos
+        robots = _unir([e[0] for e in estados])
+        monstruos = _unir([e[1] for e in estados])
+        for campo in CAMPOS_ROBOTS[1:]:
+            getattr(motor_r, campo)[robots['gid']] = robots[campo]
+        for campo in CAMPOS_MONSTRUOS[1:]:
+            getattr(motor_m, campo)[monstruos['gid']] = monstruos[campo]
+
+        motor_r.creencias.vaciar()
+        for _, _, creencias in estados:
+            for g, (conocidas, vacias) in creencias.items():
+                # Las zonas vacías también están entre las conocidas: se escriben después
+                motor_r.creencias.escribir(np.full(len(conocidas), g), list(conocidas), VISITADA)
+                motor_r.creencias.escribir(np.full(len(vacias), g), list(vacias), ZONA_VACIA)
+        motor_r.reconstruir()
+        motor_m.reconstruir()
+
+    def ejecutar(self, max_iteraciones: int = 100, verbose: bool = True) -> Dict:
+        """Ejecuta la simulación distribuida con las condiciones de parada de Simulador.ejecutar"""
+        entorno = self.entorno
+        motor_r = entorno.motor_robots
+        mundo = entorno.mundo if isinstance(entorno.mundo, MundoCompartido) else \
+            MundoCompartido.publicar(np.asarray(entorno.grid), entorno.libre, entorno.mascaras, 0)
+        tablas = (motor_r._adelante, motor_r._visibles, motor_r._rotacion, motor_r._vector,
+                  np.array(entorno.desplazamientos, dtype=np.int64), motor_r.tabla_decision)
+        semillas = np.random.SeedSequence(self.seed).spawn(self.procesos)
+
+        conexiones, procesos = [], []
+        for (x0, x1, robots, monstruos, creencias), semilla in zip(self._repartir(), semillas):
+            propia, remota = mp.Pipe()
+            proceso = mp.Process(target=_trabajador, daemon=True,
+                                 args=(remota, mundo.descriptor, x0, x1, tablas,
+                                       robots, monstruos, creencias, semilla))
+            proceso.start()
+            conexiones.append(propia)
+            procesos.append(proceso)
+
+        try:
+            halos = self._ronda(conexiones, 'halo', [[] for _ in conexiones])
+            stats = entorno.estadisticas()
+            for _ in range(max_iteraciones):
+                self.historial_estadisticas.append(stats)
+                if verbose and len(self.historial_estadisticas) % 10 == 1:
+                    print(f"Iter {stats['iteracion']:3d} | Robots: {stats['robots_vivos']} | "
+                          f"Monstruos: {stats['monstruos_vivos']} | "
+                          f"Destruidos: {stats['monstruos_destruidos']} | "
+                          f"Puntuación: {stats['puntuacion_total']}")
+                if stats['monstruos_vivos'] == 0 or stats['robots_vivos'] == 0:
+                    break
+
+                entorno.iteracion += 1
+                resultados = self._ronda(conexiones, 'paso', [
+                    (entorno.iteracion, [self._vecina(halos, i - 1, 1), self._vecina(halos, i + 1, 0)])
+                    for i in range(len(conexiones))])
+                halos = self._ronda(conexiones, 'halo', [
+                    [self._vecina(resultados, i - 1, 1), self._vecina(resultados, i + 1, 0)]
+                    for i in range(len(conexiones))])
+
+                motor_r.registrar_experiencias(*self._experiencias(resultados), entorno.iteracion)
+                robots_vivos, monstruos_vivos, destruidos, puntuacion = np.sum([r[2] for r in resultados], axis=0)
+                stats = {'iteracion': entorno.iteracion, 'robots_vivos': int(robots_vivos),
+                         'monstruos_vivos': int(monstruos_vivos), 'monstruos_destruidos': int(destruidos),
+                         'puntuacion_total': int(puntuacion)}
+
+            for conexion in conexiones:
+                conexion.send(('fin',))
+            self._volcar([conexion.recv() for conexion in conexiones])
+        finally:
+            for proceso in procesos:
+                proceso.join(timeout=5)
+            if mundo is not entorno.mundo:
+                mundo.cerrar()
+
+        stats = entorno.estadisticas()
+        return {
+            'iteraciones_totales': stats['iteracion'],
+            'monstruos_destruidos': stats['monstruos_destruidos'],
+            'tasa_exito': stats['monstruos_destruidos'] / max(len(entorno.monstruos), 1) * 100,
+            'robots_supervivientes': stats['robots_vivos'],
+            'puntuacion_final': stats['puntuacion_total'],
+            'eficiencia': stats['monstruos_destruidos'] / max(stats['iteracion'], 1),
+            'procesos': self.procesos
+        }
+
+    @staticmethod
+    def _experiencias(resultados: list) -> tuple:
+        """(gids, orientaciones, bits, acciones) de todas las losas, por gid creciente"""
+        gid, orient, bits, accion = (np.concatenate(c) for c in zip(*(r[3] for r in resultados)))
+        orden = np.argsort(gid)
+        return gid[orden], orient[orden], bits[orden], accion[orden]
+
+    @staticmethod
+    def _vecina(valores: list, i: int, lado: int):
+        """Lo que la losa i envía por su lado 0 (izquierda) o 1 (derecha); None fuera del mundo"""
+        return valores[i][lado] if 0 <= i < len(valores) else None
+
+    @staticmethod
+    def _ronda(conexiones: list, orden: str, argumentos: list) -> list:
+        """Envía una orden a cada trabajador y espera todas las respuestas (barrera)"""
+        for conexion, args in zip(conexiones, argumentos):
+            conexion.send((orden,) + (args if isinstance(args, tuple) else (args,)))
+        return [conexion.recv() for conexion in conexiones]
@@ -3,15 +3,25 @@ ENTORNO HEXAEDRICO 3D
 Gestión del mundo de operación para robots y monstruos
 """
 
-import random
 import numpy as np
 from typing import List, Dict, TYPE_CHECKING
 
-from .ontology import TipoCelda, Posicion
+from .ontology import TipoCelda, Posicion, Orientacion
+from .aleatorio import FlujoAleatorio, semillas_entorno
+from .conectividad import etiquetar_componentes, estadisticas_componentes
+from .decision import TablaDecision, compilar_reglas
+from .distancias import CampoDistancias
+from .storage import (crear_grid, indices_libres, construir_vecindad,
+                      desplazamientos_vecinos, indices_acolchados, DIRECCIONES)
 
 if TYPE_CHECKING:
     from .robot_agent import AgenteRobot
     from .monster_agent import AgenteMonstruo
+    from .trayectoria import EscritorTrayectoria
+
+
+# Ticks sin paso de robots tras los que una celda vuelve a atraer a la estrategia 'gradiente'
+OLVIDO_EXPLORACION = 60
 
 
 class EntornoHexaedrico:
@@ -19,110 +29,313 @@ class EntornoHexaedrico:
     Entorno de operación 3D
     - Mundo NxNxN con zonas libres y vacías
     - Rodeado por zona vacía impenetrable
+    - Grid en uint8 ('denso'), empaquetado a 1 bit por celda ('bits')
+      u octree disperso para mundos muy grandes ('octree')
+    - Con robots_vectorizados, la flota de robots actúa en un solo paso
+      síncrono de MotorRobots en lugar de robot a robot
+    - Con `mundo` (p. ej. un MundoCompartido) reutiliza un grid ya construido
+      y solo sortea los agentes a partir de la semilla
+    - registrar_trayectoria vuelca cada tick a un registro binario en disco
+    - Con `cache` (CacheMundos) y una semilla, el mundo se abre desde disco si
+      ya se generó con los mismos (N, pvacio, seed, almacenamiento)
+    - `componentes` etiqueta una sola vez las regiones conexas de zona libre
+      (solo con el grid 'denso': en los compactos exigiría materializar el
+      mundo); mision_posible indica si algún robot vivo puede llegar a algún monstruo
+    - Con estrategia='gradiente' mantiene un campo de distancias, sobre las
+      creencias de la flota, a la zona no visitada y no descartada como
+      vacía, que los robots siguen al explorar
+    - fraccion_explorada resume las creencias de toda la flota en una pasada
+    - Con `reglas` (función de reglas o TablaDecision) los robots deciden con
+      esa jerarquía compilada en lugar de la del examen
     """
     
     def __init__(self, N: int, pfree: float, pvacio: float, 
-                 n_robots: int, n_monstruos: int, seed: int = None):
-        if seed:
-            random.seed(seed)
-            np.random.seed(seed)
-        
+                 n_robots: int, n_monstruos: int, seed: int = None,
+                 almacenamiento: str = 'denso', robots_vectorizados: bool = False,
+                 mundo=None, cache=None, estrategia: str = 'exploracion', reglas=None):
         self.N = N
         self.pfree = pfree
         self.pvacio = pvacio
         self.iteracion = 0
-        
-        # Crear grid 3D (0=libre, 1=vacío)
-        self.grid = np.zeros((N, N, N), dtype=int)
+        self.robots_vectorizados = robots_vectorizados
+        self.trayectoria = None
+        self._componentes = None
+        self.estrategia = estrategia
+        self.campo_exploracion = None
         
         # Generar zonas vacías aleatoriamente
         total_celdas = N * N * N
         n_vacias = int(total_celdas * pvacio)
         
-        posiciones_todas = [(x, y, z) for x in range(N) for y in range(N) for z in range(N)]
-        posiciones_vacias = random.sample(posiciones_todas, n_vacias)
-        
-        for x, y, z in posiciones_vacias:
-            self.grid[x, y, z] = TipoCelda.ZONA_VACIA.value
+        # Flujos aleatorios independientes (mundo, robots, monstruos) derivados
+        # de la semilla: no se usan los generadores globales de random / np.random
+        semilla_mundo, semilla_robots, semilla_monstruos = semillas_entorno(seed)
+        self._rng_mundo = np.random.default_rng(semilla_mundo)
+        self.rng_robots = FlujoAleatorio(semilla_robots)
+        self.rng_monstruos = FlujoAleatorio(semilla_monstruos)
         
-        # Inicializar agentes
-        self.robots: List['AgenteRobot'] = []
-        self.monstruos: List['AgenteMonstruo'] = []
-        
-        # Colocar robots
-        posiciones_libres = [(x, y, z) for x, y, z in posiciones_todas 
-                             if self.grid[x, y, z] == TipoCelda.ZONA_LIBRE.value]
-        
-        # Importar aquí para evitar importaciones circulares
-        from .ontology import Orientacion
-        from .robot_agent import AgenteRobot
-        from .monster_agent import AgenteMonstruo
-        
-        for i in range(n_robots):
-            if not posiciones_libres:
-                break
-            pos = random.choice(posiciones_libres)
-            posiciones_libres.remove(pos)
+        self.almacenamiento = almacenamiento
+        self.mundo = mundo
+        libres = clave = None
+        if mundo is None and cache is not None and seed is not None:
+            clave = cache.clave(N, pvacio, seed, almacenamiento)
+        entrada = cache.cargar(clave) if clave is not None else None
+        if entrada is not None:
+            # Mundo en caché: mismo grid y mismo estado del generador que al generarlo
+            self.grid, self.libre, self.mascaras, libres, estado_rng = entrada
+            self._rng_mundo.bit_generator.state = estado_rng
+        elif mundo is None:
+            indices_vacios = self._generar_indices_vacios(total_celdas, n_vacias)
             
-            orientacion = random.choice(list(Orientacion))
-            robot = AgenteRobot(i, Posicion(*pos), orientacion, self)
-            self.robots.append(robot)
-        
-        # Colocar monstruos
-        for i in range(n_monstruos):
-            if not posiciones_libres:
-                break
-            pos = random.choice(posiciones_libres)
-            posiciones_libres.remove(pos)
+            # Crear grid 3D (0=libre, 1=vacío)
+            self.grid = crear_grid(N, indices_vacios, almacenamiento)
             
-            monstruo = AgenteMonstruo(i, Posicion(*pos), self)
-            self.monstruos.append(monstruo)
+            # Grid acolchado (borde de zona vacía) con máscaras de movimientos
+            # válidos y tablas de sensores por orientación: las celdas se
+            # identifican por índice lineal en (N+2)³ y no requieren comprobar límites
+            self.libre, self.mascaras = construir_vecindad(self.grid)
+            
+            if clave is not None:
+                if almacenamiento != 'octree':
+                    libres = indices_libres(self.grid)
+                cache.guardar(clave, self.grid, self.libre, self.mascaras, libres,
+                              self._rng_mundo.bit_generator.state)
+        else:
+            if mundo.N != N:
+                raise ValueError(f"El mundo dado es de {mundo.N}³ celdas, no de {N}³")
+            self.grid, self.libre, self.mascaras = mundo.grid, mundo.libre, mundo.mascaras
+            n_vacias = mundo.n_vacias
+        self.n_libres = total_celdas - n_vacias
+        
+        self._preparar_sensores()
+        
+        # Colocar robots y monstruos: un único sorteo sin reemplazo de celdas libres
+        celdas = self._sortear_celdas_libres(n_robots + n_monstruos, total_celdas - n_vacias, libres)
+        codigos_orientacion = self._rng_mundo.integers(len(Orientacion), size=n_robots)
+        celdas_robots = indices_acolchados(celdas[:n_robots], N)
+        self._crear_agentes(celdas_robots, codigos_orientacion[:len(celdas_robots)],
+                            indices_acolchados(celdas[n_robots:], N))
+        if reglas is not None:
+            self.motor_robots.tabla_decision = reglas if isinstance(reglas, TablaDecision) else compilar_reglas(reglas)
+        self._preparar_estrategia()
         
         print(f"✓ Entorno creado: {N}x{N}x{N}")
         print(f"  - Zonas vacías: {n_vacias} ({pvacio*100:.1f}%)")
         print(f"  - Robots: {len(self.robots)}")
         print(f"  - Monstruos: {len(self.monstruos)}")
     
+    def _preparar_sensores(self):
+        """Tablas de desplazamientos de los sensores por orientación"""
+        self.desplazamientos = desplazamientos_vecinos(self.N)
+        self.desplazamiento_adelante = {
+            o: self.desplazamientos[DIRECCIONES.index(o.value)] for o in Orientacion
+        }
+        # Monstroscopio: los 5 vecinos visibles (todos menos la parte posterior)
+        self.desplazamientos_visibles = {
+            o: tuple(d for d in self.desplazamientos if d != -self.desplazamiento_adelante[o])
+            for o in Orientacion
+        }
+    
+    def _crear_agentes(self, celdas_robots: np.ndarray, codigos_orientacion: np.ndarray,
+                       celdas_monstruos: np.ndarray):
+        """Crea los motores de robots y monstruos (celdas acolchadas) y sus vistas"""
+        # Importar aquí para evitar importaciones circulares
+        from .robot_agent import AgenteRobot, MotorRobots
+        from .monster_agent import AgenteMonstruo, MotorMonstruos
+        
+        # Robots: estado en el motor vectorizado, AgenteRobot son vistas sobre él
+        self.motor_robots = MotorRobots(self, celdas_robots, codigos_orientacion)
+        self.ocupacion_robots = self.motor_robots.ocupacion
+        self.robots: List['AgenteRobot'] = [AgenteRobot(i, self.motor_robots) for i in range(len(self.motor_robots))]
+        self.motor_robots.robots = self.robots
+        
+        # Monstruos: su estado vive en el motor vectorizado y los
+        # AgenteMonstruo son vistas sobre él
+        self.motor_monstruos = MotorMonstruos(self, celdas_monstruos)
+        self.ocupacion_monstruos = self.motor_monstruos.ocupacion
+        self.monstruos: List['AgenteMonstruo'] = [AgenteMonstruo(i, self.motor_monstruos)
+                                                  for i in range(len(self.motor_monstruos))]
+    
+    def _preparar_estrategia(self, campo: tuple = None):
+        """
+        Crea el campo de distancias de la estrategia 'gradiente' sobre las
+        creencias de la flota, no sobre el mundo real: es transitable todo el
+        interior salvo las zonas vacías con las que algún robot ha chocado
+        (se bloquean al descubrirlas) y son fuente las celdas transitables que
+        ningún robot ha pisado en los últimos OLVIDO_EXPLORACION ticks.
+        `campo` = (transitables, fuentes, ticks de última visita, tick) al restaurar.
+        """
+        from .robot_agent import ESTRATEGIAS
+        if self.estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estrategia desconocida: {self.estrategia!r} (opciones: {ESTRATEGIAS})")
+        if self.estrategia != 'gradiente':
+            return
+        L = self.N + 2
+        if campo is None:
+            transitable = np.zeros((L, L, L), dtype=bool)
+            transitable[1:-1, 1:-1, 1:-1] = True
+            transitable = transitable.reshape(-1)
+            fuentes = transitable.copy()
+        else:
+            transitable, fuentes = campo[0], campo[1]
+        motor = self.motor_robots
+        # Solo las direcciones que un robot puede llegar a encarar rotando
+        encarables = tuple(np.flatnonzero((motor._lado_hacia >= 0).any(axis=0)))
+        self.campo_exploracion = CampoDistancias(transitable, self.desplazamientos, fuentes,
+                                                 direcciones=encarables, olvido=OLVIDO_EXPLORACION)
+        if campo is None:
+            self.campo_exploracion.quitar_fuentes(motor.celda)
+        else:
+            self.campo_exploracion.restaurar_olvido(campo[2], campo[3])
+    
+    def _generar_indices_vacios(self, total_celdas: int, n_vacias: int) -> np.ndarray:
+        """
+        Sortea las zonas vacías como índices planos del grid en una sola pasada.
+        Muestreo sin reemplazo: conserva exactamente n_vacias celdas y es
+        reproducible a partir de la semilla.
+        """
+        return self._rng_mundo.choice(total_celdas, size=n_vacias, replace=False)
+    
+    def _sortear_celdas_libres(self, k: int, n_libres: int, libres: np.ndarray = None) -> np.ndarray:
+        """
+        Sortea k celdas libres distintas (índices planos) en un solo paso.
+        Con el octree o un mundo dado se usa muestreo por rechazo vectorizado
+        para no enumerar (ni copiar) las celdas libres de mundos enormes.
+        `libres` es el índice de celdas libres si ya se conoce (caché de mundos).
+        """
+        k = min(k, n_libres)
+        if self.almacenamiento != 'octree' and self.mundo is None:
+            if libres is None:
+                libres = indices_libres(self.grid)
+            return libres[self._rng_mundo.choice(len(libres), size=k, replace=False)]
+        
+        elegidas = np.empty(0, dtype=np.int64)
+        while len(elegidas) < k:
+            faltan = k - len(elegidas)
+            candidatas = self._rng_mundo.integers(self.grid.size, size=2 * faltan + 16)
+            x, y, z = np.unravel_index(candidatas, self.grid.shape)
+            candidatas = candidatas[self.grid[x, y, z] == TipoCelda.ZONA_LIBRE.value]
+            # Quitar repetidas conservando el orden del sorteo
+            candidatas = np.concatenate((elegidas, candidatas))
+            _, primeras = np.unique(candidatas, return_index=True)
+            elegidas = candidatas[np.sort(primeras)][:k]
+        return elegidas
+    
+    def celda_de(self, pos: Posicion) -> int:
+        """Índice lineal acolchado de una posición"""
+        L = self.N + 2
+        return ((pos.x + 1) * L + (pos.y + 1)) * L + (pos.z + 1)
+    
+    def posicion_de(self, celda: int) -> Posicion:
+        """Posición correspondiente a un índice lineal acolchado"""
+        L = self.N + 2
+        xy, z = divmod(celda, L)
+        x, y = divmod(xy, L)
+        return Posicion(x - 1, y - 1, z - 1)
+    
+    def _dentro(self, pos: Posicion) -> bool:
+        return 0 <= pos.x < self.N and 0 <= pos.y < self.N and 0 <= pos.z < self.N
+    
     def es_posicion_valida(self, pos: Posicion) -> bool:
         """Verifica si una posición está dentro de los límites y es zona libre"""
-        if pos.x < 0 or pos.x >= self.N or pos.y < 0 or pos.y >= self.N or pos.z < 0 or pos.z >= self.N:
+        if not self._dentro(pos):
             return False  # Fuera del mundo (zona vacía impenetrable)
-        return self.grid[pos.x, pos.y, pos.z] == TipoCelda.ZONA_LIBRE.value
+        return bool(self.libre[self.celda_de(pos)])
     
     def obtener_vecinos(self, pos: Posicion) -> List[Posicion]:
         """Obtiene las 6 posiciones adyacentes (sin diagonales)"""
         vecinos = []
-        for dx, dy, dz in [(1,0,0), (-1,0,0), (0,1,0), (0,-1,0), (0,0,1), (0,0,-1)]:
+        for dx, dy, dz in DIRECCIONES:
             nueva_pos = Posicion(pos.x + dx, pos.y + dy, pos.z + dz)
             vecinos.append(nueva_pos)
         return vecinos
     
     def hay_monstruo_en(self, pos: Posicion) -> bool:
         """Verifica si hay un monstruo en la posición"""
-        return any(m.posicion == pos and m.vivo for m in self.monstruos)
+        return self._dentro(pos) and self.ocupacion_monstruos.hay_agente_en(self.celda_de(pos))
     
     def hay_robot_en(self, pos: Posicion) -> bool:
         """Verifica si hay un robot en la posición"""
-        return any(r.posicion == pos and r.vivo for r in self.robots)
+        return self._dentro(pos) and self.ocupacion_robots.hay_agente_en(self.celda_de(pos))
     
     def actualizar(self):
         """Ejecuta una iteración del entorno"""
         self.iteracion += 1
         
         # Primero, todos los robots perciben y deciden
-        for robot in [r for r in self.robots if r.vivo]:
-            robot.ejecutar_ciclo()
+        if self.robots_vectorizados:
+            self.motor_robots.paso()
+        else:
+            for id in self.motor_robots.ids_vivos().tolist():
+                self.robots[id].ejecutar_ciclo()
+        
+        # Luego, los monstruos actúan según su frecuencia (todos en un paso vectorizado)
+        self.motor_monstruos.paso(self.iteracion)
         
-        # Luego, los monstruos actúan según su frecuencia
-        for monstruo in [m for m in self.monstruos if m.vivo]:
-            monstruo.ejecutar_ciclo(self.iteracion)
+        if self.campo_exploracion is not None:
+            self.campo_exploracion.avanzar_tick()
+        
+        if self.trayectoria is not None:
+            self.trayectoria.registrar()
+    
+    def registrar_trayectoria(self, ruta: str, intervalo_clave: int = 1000,
+                              guardar_grid: bool = True) -> 'EscritorTrayectoria':
+        """Empieza a volcar cada tick a un registro binario (cerrarlo con .cerrar())"""
+        from .trayectoria import EscritorTrayectoria
+        self.trayectoria = EscritorTrayectoria(ruta, self, intervalo_clave, guardar_grid)
+        return self.trayectoria
+    
+    def robots_vivos(self) -> List['AgenteRobot']:
+        """Robots vivos, en orden de id"""
+        return [self.robots[i] for i in self.motor_robots.ids_vivos().tolist()]
+    
+    def monstruos_vivos(self) -> List['AgenteMonstruo']:
+        """Monstruos vivos, en orden de id"""
+        return [self.monstruos[i] for i in self.motor_monstruos.ids_vivos().tolist()]
+    
+    @property
+    def componentes(self) -> np.ndarray:
+        """
+        Componente conexa de zona libre de cada celda acolchada (-1 si no es
+        libre); se calcula una vez. Ocupa 4 bytes por celda, por lo que los
+        almacenamientos compactos ('bits', 'octree') la rechazan.
+        """
+        if self._componentes is None:
+            if self.almacenamiento != 'denso':
+                raise ValueError(f"El etiquetado de componentes necesita almacenamiento 'denso' "
+                                 f"(el entorno usa {self.almacenamiento!r})")
+            self._componentes = etiquetar_componentes(self.libre, self.desplazamientos)
+            self.tamaños_componentes = np.bincount(self._componentes[self._componentes >= 0])
+        return self._componentes
+    
+    def _celdas_vivas(self) -> tuple:
+        motor_r, motor_m = self.motor_robots, self.motor_monstruos
+        return motor_r.celda[motor_r.vivo], motor_m.celda[motor_m.vivo]
+    
+    def mision_posible(self) -> bool:
+        """Algún robot vivo comparte componente conexa con algún monstruo vivo"""
+        celdas_robots, celdas_monstruos = self._celdas_vivas()
+        return bool(np.isin(self.componentes[celdas_monstruos], self.componentes[celdas_robots]).any())
+    
+    def estadisticas_componentes(self) -> Dict:
+        """
+        Número y tamaño de las componentes libres y monstruos vivos fuera del
+        alcance de los robots (vacío si las componentes aún no se han etiquetado)
+        """
+        if self._componentes is None:
+            return {}
+        return estadisticas_componentes(self.componentes, self.tamaños_componentes, *self._celdas_vivas())
+    
+    def fraccion_explorada(self) -> np.ndarray:
+        """Fracción de la zona libre visitada por cada robot (según sus creencias)"""
+        return self.motor_robots.creencias.fraccion_explorada(self.n_libres)
     
     def estadisticas(self) -> Dict:
-        """Retorna estadísticas del estado actual"""
+        """Retorna estadísticas del estado actual (contadores incrementales, O(1))"""
         return {
             'iteracion': self.iteracion,
-            'robots_vivos': sum(1 for r in self.robots if r.vivo),
-            'monstruos_vivos': sum(1 for m in self.monstruos if m.vivo),
-            'monstruos_destruidos': sum(r.monstruos_destruidos for r in self.robots),
-            'puntuacion_total': sum(r.puntuacion for r in self.robots)
+            'robots_vivos': self.motor_robots.n_vivos,
+            'monstruos_vivos': self.motor_monstruos.n_vivos,
+            'monstruos_destruidos': self.motor_robots.monstruos_destruidos_total,
+            'puntuacion_total': int(self.motor_robots.puntuacion_total)
         }
@@ -0,0 +1,79 @@
+"""
+MÉTRICAS DE RACIONALIDAD DE LOS ROBOTS
+Experiencias por (robot, acción, estado de percepción) en un array denso de la flota
+"""
+
+from collections.abc import Mapping
+from typing import Iterator
+
+import numpy as np
+
+from .ontology import ACCIONES
+from .aprendizaje import N_ESTADOS
+
+
+# Métricas que cuentan los robots (claves de metricas_racionalidad)
+METRICAS = ('movimientos_exitosos', 'colisiones', 'acciones_caza', 'comunicaciones_exitosas')
+COLUMNA_METRICA = {nombre: j for j, nombre in enumerate(METRICAS)}
+
+
+class MetricasFlota:
+    """
+    Métricas de racionalidad de toda la flota
+    - Array int32 (robots, acciones * 16 estados) con las veces que cada
+      robot ha tomado cada acción con cada estado de percepción
+    - `tabla` (acciones, 16, métricas) dice qué métricas incrementa cada
+      experiencia: los conteos por métrica son el producto de ambos
+    - registrar suma una experiencia por robot a toda la flota con una sola
+      escritura por tick; registrar_uno, la de un robot
+    - exportar / restaurar sacan o precargan las experiencias como un solo array
+    """
+
+    def __init__(self, n_robots: int, tabla: np.ndarray):
+        self.tabla = np.asarray(tabla, dtype=np.int64).reshape(len(ACCIONES) * N_ESTADOS, len(METRICAS))
+        self.experiencias = np.zeros((n_robots, len(ACCIONES) * N_ESTADOS), dtype=np.int32)
+
+    def registrar(self, ids: np.ndarray, acciones: np.ndarray, bits: np.ndarray):
+        """Una experiencia por robot (ids distintos)"""
+        columnas = acciones.astype(np.int64) * N_ESTADOS + bits
+        self.experiencias.ravel()[ids * self.experiencias.shape[1] + columnas] += 1
+
+    def registrar_uno(self, id: int, accion: int, bits: int):
+        self.experiencias[id, accion * N_ESTADOS + bits] += 1
+
+    def conteos(self, ids=None) -> np.ndarray:
+        """Conteo de cada métrica (robots, métricas)"""
+        return (self.experiencias if ids is None else self.experiencias[ids]) @ self.tabla
+
+    def exportar(self) -> np.ndarray:
+        return self.experiencias.copy()
+
+    def restaurar(self, experiencias: np.ndarray):
+        self.experiencias[...] = experiencias
+
+
+class MetricasRacionalidad(Mapping):
+    """
+    Vista con la interfaz del antiguo Dict[str, int] de un robot: solo
+    aparecen las métricas que ya ha incrementado alguna vez
+    """
+
+    def __init__(self, metricas: MetricasFlota, id: int):
+        self.metricas = metricas
+        self.id = id
+
+    def _fila(self) -> np.ndarray:
+        return self.metricas.conteos([self.id])[0]
+
+    def __getitem__(self, nombre: str) -> int:
+        j = COLUMNA_METRICA.get(nombre)
+        valor = 0 if j is None else int(self._fila()[j])
+        if valor == 0:
+            raise KeyError(nombre)
+        return valor
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._fila()))
+
+    def __iter__(self) -> Iterator[str]:
+        return (METRICAS[j] for j in np.flatnonzero(self._fila()).tolist())
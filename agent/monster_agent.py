@@ -3,47 +3,167 @@ AGENTE MONSTRUO
 Implementación del agente reflejo simple para monstruos
 """
 
-import random
+import numpy as np
 from typing import TYPE_CHECKING
 
 from .ontology import Posicion
+from .occupancy import IndiceOcupacionVectorizado
+from .storage import NUM_DIRECCIONES, TABLA_DIRECCIONES
 
 if TYPE_CHECKING:
     from .environment import EntornoHexaedrico
 
 
+def sortear_destinos(origenes: np.ndarray, mascaras: np.ndarray, desplazamientos: np.ndarray,
+                     rng) -> tuple:
+    """
+    Elige uniformemente un vecino libre para cada origen según su máscara de
+    movimientos. Retorna (pueden, destinos): los orígenes sin vecinos libres
+    se quedan quietos y no consumen números aleatorios.
+    """
+    mascaras = np.asarray(mascaras, dtype=np.int64)
+    n_opciones = NUM_DIRECCIONES[mascaras]
+    pueden = n_opciones > 0
+    k = (rng.uniformes(int(pueden.sum())) * n_opciones[pueden]).astype(np.int64)
+    return pueden, origenes[pueden] + desplazamientos[TABLA_DIRECCIONES[mascaras[pueden], k]]
+
+
+class MotorMonstruos:
+    """
+    Motor vectorizado de la población de monstruos
+    - Estado en arrays NumPy: celda (índice lineal acolchado), K, p y vivo
+    - En cada iteración mueve en un solo paso a todos los monstruos a los que
+      les toca (iteracion % K == 0), eligiendo uniformemente entre los
+      vecinos libres según la máscara de movimientos de su celda
+    - Mantiene el número de vivos y un orden de iteración compacto sin muertos
+    """
+
+    def __init__(self, entorno: 'EntornoHexaedrico', celdas: np.ndarray, K: int = 3, p: float = 0.7):
+        n = len(celdas)
+        self.entorno = entorno
+        self.celda = np.asarray(celdas, dtype=np.int64)
+        self.K = np.full(n, K, dtype=np.int64)  # Frecuencia de operación
+        self.p = np.full(n, p, dtype=np.float64)  # Probabilidad de movimiento
+        self.vivo = np.ones(n, dtype=bool)
+        self.n_vivos = n
+        self._ids_vivos = np.arange(n)
+        self._compactar = False
+        self._desplazamientos = np.array(entorno.desplazamientos, dtype=np.int64)
+
+        # Los arrays se modifican siempre en el sitio: el índice los comparte
+        n_celdas = (entorno.N + 2) ** 3 if isinstance(entorno.mascaras, np.ndarray) else None
+        self.ocupacion = IndiceOcupacionVectorizado(self.celda, self.vivo, n_celdas)
+
+    def __len__(self) -> int:
+        return len(self.celda)
+
+    def mover(self, id: int, celda: int):
+        """Traslada un monstruo a otra celda manteniendo el índice de ocupación"""
+        if self.vivo[id]:
+            self.ocupacion.mover(id, int(self.celda[id]), celda)
+        self.celda[id] = celda
+
+    def fijar_vivo(self, id: int, valor: bool):
+        """Al morir (o revivir) se retira (o registra) en el índice de ocupación"""
+        if valor and not self.vivo[id]:
+            self.ocupacion.agregar(id, int(self.celda[id]))
+            self.n_vivos += 1
+            self._ids_vivos = None
+        elif not valor and self.vivo[id]:
+            self.ocupacion.quitar(id, int(self.celda[id]))
+            self.n_vivos -= 1
+            self._compactar = True
+        self.vivo[id] = valor
+
+    def reconstruir(self):
+        """Recalcula índice de ocupación y contadores tras reescribir los arrays de estado"""
+        self.ocupacion.reconstruir()
+        self.n_vivos = int(self.vivo.sum())
+        self._ids_vivos = None
+
+    def ids_vivos(self) -> np.ndarray:
+        """Ids de los monstruos vivos en orden; los muertos se compactan fuera al pedirlos"""
+        if self._ids_vivos is None:
+            self._ids_vivos = np.flatnonzero(self.vivo)
+        elif self._compactar:
+            self._ids_vivos = self._ids_vivos[self.vivo[self._ids_vivos]]
+        self._compactar = False
+        return self._ids_vivos
+
+    def paso(self, iteracion: int, ids: np.ndarray = None):
+        """
+        Lógica reflejo simple para todos los monstruos (o solo los `ids` dados):
+        Si (iteracion % K == 0) y random() < p → Mover aleatoriamente
+        """
+        if ids is None:
+            ids = self.ids_vivos()
+            ids = ids[iteracion % self.K[ids] == 0]
+        else:
+            ids = ids[self.vivo[ids] & (iteracion % self.K[ids] == 0)]
+
+        # Acción: movimiento aleatorio con probabilidad p
+        ids = ids[self.entorno.rng_monstruos.uniformes(len(ids)) < self.p[ids]]
+        origenes = self.celda[ids]
+
+        # Sin vecinos libres: se queda quieto
+        pueden, destinos = sortear_destinos(origenes, self.entorno.mascaras[origenes],
+                                            self._desplazamientos, self.entorno.rng_monstruos)
+        ids, origenes = ids[pueden], origenes[pueden]
+
+        self.celda[ids] = destinos
+        self.ocupacion.mover_lote(origenes, destinos)
+
+
 class AgenteMonstruo:
     """
     Agente reflejo simple
     - Movimiento aleatorio cada K iteraciones con probabilidad p
     - Sin memoria ni objetivos
+    - Vista sobre su fila en MotorMonstruos (el estado vive en arrays)
     """
-    
-    def __init__(self, id: int, posicion: Posicion, entorno: 'EntornoHexaedrico', K: int = 3, p: float = 0.7):
+
+    def __init__(self, id: int, motor: MotorMonstruos):
         self.id = id
-        self.posicion = posicion
-        self.entorno = entorno
-        self.K = K  # Frecuencia de operación
-        self.p = p  # Probabilidad de movimiento
-        self.vivo = True
-    
+        self.motor = motor
+        self.entorno = motor.entorno
+
+    @property
+    def posicion(self) -> Posicion:
+        return self.entorno.posicion_de(int(self.motor.celda[self.id]))
+
+    @posicion.setter
+    def posicion(self, nueva: Posicion):
+        self.motor.mover(self.id, self.entorno.celda_de(nueva))
+
+    @property
+    def vivo(self) -> bool:
+        return bool(self.motor.vivo[self.id])
+
+    @vivo.setter
+    def vivo(self, valor: bool):
+        self.motor.fijar_vivo(self.id, valor)
+
+    @property
+    def K(self) -> int:
+        """Frecuencia de operación"""
+        return int(self.motor.K[self.id])
+
+    @K.setter
+    def K(self, valor: int):
+        self.motor.K[self.id] = valor
+
+    @property
+    def p(self) -> float:
+        """Probabilidad de movimiento"""
+        return float(self.motor.p[self.id])
+
+    @p.setter
+    def p(self, valor: float):
+        self.motor.p[self.id] = valor
+
     def ejecutar_ciclo(self, iteracion: int):
         """
         Lógica reflejo simple:
         Si (iteracion % K == 0) y random() < p → Mover aleatoriamente
         """
-        if not self.vivo:
-            return
-        
-        # Condición: cada K iteraciones
-        if iteracion % self.K != 0:
-            return
-        
-        # Acción: movimiento aleatorio con probabilidad p
-        if random.random() < self.p:
-            vecinos = self.entorno.obtener_vecinos(self.posicion)
-            vecinos_validos = [v for v in vecinos if self.entorno.es_posicion_valida(v)]
-            
-            if vecinos_validos:
-                nueva_pos = random.choice(vecinos_validos)
-                self.posicion = nueva_pos
+        self.motor.paso(iteracion, np.array([self.id]))
@@ -0,0 +1,126 @@
+"""
+ÍNDICE DE OCUPACIÓN
+Registro por celda de los agentes vivos que la ocupan
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class IndiceOcupacionVectorizado:
+    """
+    Índice de ocupación para poblaciones guardadas en arrays (motores vectorizados)
+    - Conteo por celda en un array denso (o diccionario si el mundo no es
+      denso), con consultas y movimientos en lote
+    - Los ids de cada celda forman una lista doblemente enlazada (primer id
+      por celda, siguiente y anterior por agente): agregar, quitar y mover de
+      un agente la mantienen en O(1) y ocupantes recorre solo esa celda
+    - Los movimientos en lote solo actualizan los conteos; las listas se
+      vuelven a enlazar en una pasada vectorizada en la siguiente consulta
+      de ids (como mucho una vez por tick)
+    - Los arrays de la población (celdas, vivos) los modifica el motor en el sitio
+    """
+
+    def __init__(self, celdas: np.ndarray, vivos: np.ndarray, n_celdas: Optional[int] = None):
+        self._celdas = celdas
+        self._vivos = vivos
+        self._n_celdas = n_celdas
+        self.reconstruir()
+
+    def reconstruir(self):
+        """Recalcula los conteos a partir de los arrays de la población"""
+        if self._n_celdas is not None:
+            self._conteo = np.bincount(self._celdas[self._vivos], minlength=self._n_celdas).astype(np.int32)
+        else:
+            self._conteo = Counter(self._celdas[self._vivos].tolist())
+        self._enlazadas = False
+
+    def _enlazar(self):
+        """Listas de ids por celda a partir de los arrays de la población (ids en orden dentro de cada celda)"""
+        ids = np.flatnonzero(self._vivos)
+        orden = np.argsort(self._celdas[ids], kind='stable')
+        ids, celdas = ids[orden], self._celdas[ids[orden]]
+        misma = celdas[1:] == celdas[:-1]
+        siguiente = np.full(len(self._celdas), -1, dtype=np.int64)
+        anterior = np.full(len(self._celdas), -1, dtype=np.int64)
+        siguiente[ids[:-1][misma]] = ids[1:][misma]
+        anterior[ids[1:][misma]] = ids[:-1][misma]
+        primeros = np.r_[True, ~misma] if len(ids) else np.empty(0, dtype=bool)
+        self._primero: Dict[int, int] = dict(zip(celdas[primeros].tolist(), ids[primeros].tolist()))
+        self._siguiente: List[int] = siguiente.tolist()
+        self._anterior: List[int] = anterior.tolist()
+        self._enlazadas = True
+
+    @property
+    def denso(self) -> bool:
+        return isinstance(self._conteo, np.ndarray)
+
+    def agregar(self, id: int, celda: int):
+        self._conteo[celda] += 1
+        if self._enlazadas:
+            primero = self._primero.get(celda, -1)
+            self._siguiente[id], self._anterior[id] = primero, -1
+            if primero >= 0:
+                self._anterior[primero] = id
+            self._primero[celda] = id
+
+    def quitar(self, id: int, celda: int):
+        self._conteo[celda] -= 1
+        if not self.denso and self._conteo[celda] == 0:
+            del self._conteo[celda]
+        if self._enlazadas:
+            anterior, siguiente = self._anterior[id], self._siguiente[id]
+            if anterior >= 0:
+                self._siguiente[anterior] = siguiente
+            elif siguiente >= 0:
+                self._primero[celda] = siguiente
+            else:
+                del self._primero[celda]
+            if siguiente >= 0:
+                self._anterior[siguiente] = anterior
+
+    def mover(self, id: int, origen: int, destino: int):
+        self.quitar(id, origen)
+        self.agregar(id, destino)
+
+    def mover_lote(self, origenes: np.ndarray, destinos: np.ndarray):
+        """Registra en bloque los movimientos origen[i] -> destino[i]"""
+        self._enlazadas = False
+        if self.denso:
+            uno = np.int32(1)  # Mismo dtype que el conteo: ufunc.at usa el camino rápido
+            np.subtract.at(self._conteo, origenes, uno)
+            np.add.at(self._conteo, destinos, uno)
+            return
+        for origen, destino in zip(origenes.tolist(), destinos.tolist()):
+            self._conteo[origen] -= 1
+            if self._conteo[origen] == 0:
+                del self._conteo[origen]
+            self._conteo[destino] += 1
+
+    def hay_agente_en(self, celda: int) -> bool:
+        return self._conteo[celda] > 0
+
+    def conteo(self, celda: int) -> int:
+        return int(self._conteo[celda])
+
+    def conteos(self, celdas: np.ndarray) -> np.ndarray:
+        """Número de agentes en cada una de las celdas dadas"""
+        if self.denso:
+            return self._conteo[celdas]
+        return np.array([self._conteo.get(c, 0) for c in np.ravel(celdas).tolist()],
+                        dtype=np.int32).reshape(np.shape(celdas))
+
+    def ocupantes(self, celda: int) -> List[int]:
+        """Ids de los agentes vivos en la celda (en orden de id)"""
+        if not self.hay_agente_en(celda):
+            return []
+        if not self._enlazadas:
+            self._enlazar()
+        ids = []
+        id = self._primero.get(celda, -1)
+        while id >= 0:
+            ids.append(id)
+            id = self._siguiente[id]
+        return sorted(ids)
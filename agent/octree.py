@@ -0,0 +1,200 @@
+"""
+OCTREE DISPERSO DEL MUNDO
+Almacenamiento jerárquico para mundos muy grandes y mayoritariamente libres
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from .ontology import TipoCelda
+
+
+# Códigos de hoja en la tabla de hijos (valores >= 0 son índices de nodo)
+HOJA_LIBRE = -1
+HOJA_VACIA = -2
+
+
+def codigo_morton(x: np.ndarray, y: np.ndarray, z: np.ndarray, profundidad: int) -> np.ndarray:
+    """Intercala los bits de (x, y, z): cada grupo de 3 bits es un octante (x<<2 | y<<1 | z)"""
+    x, y, z = (np.asarray(c, dtype=np.uint64) for c in (x, y, z))
+    codigo = np.zeros(x.shape, dtype=np.uint64)
+    for b in range(profundidad):
+        b64 = np.uint64(b)
+        uno = np.uint64(1)
+        codigo |= ((x >> b64) & uno) << np.uint64(3 * b + 2)
+        codigo |= ((y >> b64) & uno) << np.uint64(3 * b + 1)
+        codigo |= ((z >> b64) & uno) << np.uint64(3 * b)
+    return codigo
+
+
+class GridOctree:
+    """
+    Grid 3D como octree disperso con nodos homogéneos colapsados
+    - Regiones enteramente libres o vacías se guardan como una sola hoja
+    - La memoria escala con la superficie de las zonas vacías, no con N³
+    - Consultas puntuales y de vecindad en O(log N)
+    - Consultas de región: hay_vacio_en_caja, bloque
+    - Se indexa como un array NxNxN (solo lectura)
+    """
+
+    def __init__(self, N: int, hijos: np.ndarray, profundidad: int):
+        self.N = N
+        self.shape = (N, N, N)
+        self.ndim = 3
+        self.dtype = np.dtype(np.uint8)
+        self.profundidad = profundidad
+        self._hijos = hijos
+
+    @staticmethod
+    def profundidad_para(N: int) -> int:
+        """Niveles necesarios para cubrir N celdas por eje (raíz de lado 2^profundidad)"""
+        return max(1, int(N - 1).bit_length())
+
+    @classmethod
+    def desde_indices(cls, N: int, indices_vacios: np.ndarray) -> 'GridOctree':
+        """
+        Construye el octree a partir de los índices planos de las celdas vacías.
+        Se construye de arriba abajo, un nivel por pasada vectorizada sobre los
+        códigos Morton ordenados.
+        """
+        profundidad = cls.profundidad_para(N)
+        x, y, z = np.unravel_index(np.asarray(indices_vacios, dtype=np.int64), (N, N, N))
+        activos = np.sort(codigo_morton(x, y, z, profundidad))
+
+        niveles = [np.full((1, 8), HOJA_LIBRE, dtype=np.int32)]  # raíz = nodo 0
+        prefijos = np.zeros(1, dtype=np.uint64)
+        n_nodos = 1
+
+        for nivel in range(profundidad, 0, -1):
+            if len(activos) == 0:
+                break
+            # Prefijo de cada código a la altura de los hijos (lado 2^(nivel-1))
+            hijo = activos >> np.uint64(3 * (nivel - 1))
+            inicios = np.concatenate(([0], np.flatnonzero(np.diff(hijo)) + 1))
+            cuentas = np.diff(np.append(inicios, len(hijo)))
+            unicos = hijo[inicios]
+
+            fila_padre = np.searchsorted(prefijos, unicos >> np.uint64(3))
+            octante = (unicos & np.uint64(7)).astype(np.int64)
+            mixtos = cuentas != 8 ** (nivel - 1)
+            n_mixtos = int(mixtos.sum())
+
+            valores = np.full(len(unicos), HOJA_VACIA, dtype=np.int32)
+            valores[mixtos] = n_nodos + np.arange(n_mixtos, dtype=np.int32)
+            niveles[-1][fila_padre, octante] = valores
+
+            n_nodos += n_mixtos
+            niveles.append(np.full((n_mixtos, 8), HOJA_LIBRE, dtype=np.int32))
+            prefijos = unicos[mixtos]
+            activos = activos[np.repeat(mixtos, cuentas)]
+
+        return cls(N, np.concatenate(niveles), profundidad)
+
+    @classmethod
+    def desde_denso(cls, grid: np.ndarray) -> 'GridOctree':
+        """Construye el octree a partir de un grid denso NxNxN"""
+        indices = np.flatnonzero(np.asarray(grid).reshape(-1) == TipoCelda.ZONA_VACIA.value)
+        return cls.desde_indices(grid.shape[0], indices)
+
+    @property
+    def size(self) -> int:
+        return self.N ** 3
+
+    @property
+    def nbytes(self) -> int:
+        return self._hijos.nbytes
+
+    @property
+    def n_nodos(self) -> int:
+        return len(self._hijos)
+
+    def valor_en(self, x: int, y: int, z: int) -> int:
+        """Tipo de celda en (x, y, z): descenso de la raíz a la hoja, O(log N)"""
+        nodo = 0
+        for nivel in range(self.profundidad - 1, -1, -1):
+            octante = ((x >> nivel) & 1) << 2 | ((y >> nivel) & 1) << 1 | ((z >> nivel) & 1)
+            nodo = int(self._hijos[nodo, octante])
+            if nodo < 0:
+                return TipoCelda.ZONA_VACIA.value if nodo == HOJA_VACIA else TipoCelda.ZONA_LIBRE.value
+        return TipoCelda.ZONA_LIBRE.value
+
+    def valores_en(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de valor_en para arrays de coordenadas"""
+        x, y, z = np.broadcast_arrays(*(np.asarray(c, dtype=np.int64) for c in (x, y, z)))
+        nodo = np.zeros(x.shape, dtype=np.int64)
+        for nivel in range(self.profundidad - 1, -1, -1):
+            activos = nodo >= 0
+            octante = ((x >> nivel) & 1) << 2 | ((y >> nivel) & 1) << 1 | ((z >> nivel) & 1)
+            nodo[activos] = self._hijos[nodo[activos], octante[activos]]
+        return (nodo == HOJA_VACIA).astype(np.uint8)
+
+    def _recorrer(self, minimo: Tuple[int, int, int], maximo: Tuple[int, int, int]):
+        """Recorre las hojas vacías que intersecan la caja [minimo, maximo)"""
+        pila = [(0, 0, 0, 0, 1 << self.profundidad)]
+        while pila:
+            nodo, ox, oy, oz, lado = pila.pop()
+            mitad = lado >> 1
+            for octante in range(8):
+                hx = ox + ((octante >> 2) & 1) * mitad
+                hy = oy + ((octante >> 1) & 1) * mitad
+                hz = oz + (octante & 1) * mitad
+                if (hx >= maximo[0] or hx + mitad <= minimo[0] or
+                        hy >= maximo[1] or hy + mitad <= minimo[1] or
+                        hz >= maximo[2] or hz + mitad <= minimo[2]):
+                    continue
+                hijo = int(self._hijos[nodo, octante])
+                if hijo == HOJA_VACIA:
+                    yield (hx, hy, hz, mitad)
+                elif hijo >= 0:
+                    pila.append((hijo, hx, hy, hz, mitad))
+
+    def hay_vacio_en_caja(self, minimo: Tuple[int, int, int], maximo: Tuple[int, int, int]) -> bool:
+        """Verifica si existe alguna zona vacía en la caja [minimo, maximo)"""
+        for _ in self._recorrer(minimo, maximo):
+            return True
+        return False
+
+    def bloque(self, minimo: Tuple[int, int, int], maximo: Tuple[int, int, int]) -> np.ndarray:
+        """Materializa la caja [minimo, maximo) como array denso uint8"""
+        forma = tuple(max(0, hi - lo) for lo, hi in zip(minimo, maximo))
+        denso = np.zeros(forma, dtype=np.uint8)
+        for hx, hy, hz, lado in self._recorrer(minimo, maximo):
+            denso[max(hx, minimo[0]) - minimo[0]:min(hx + lado, maximo[0]) - minimo[0],
+                  max(hy, minimo[1]) - minimo[1]:min(hy + lado, maximo[1]) - minimo[1],
+                  max(hz, minimo[2]) - minimo[2]:min(hz + lado, maximo[2]) - minimo[2]] = \
+                TipoCelda.ZONA_VACIA.value
+        return denso
+
+    def __getitem__(self, clave):
+        if not isinstance(clave, tuple):
+            clave = (clave,)
+        clave = clave + (slice(None),) * (3 - len(clave))
+        if all(isinstance(k, (int, np.integer)) for k in clave):
+            x, y, z = (int(k) + self.N if k < 0 else int(k) for k in clave)
+            return self.valor_en(x, y, z)
+        if all(isinstance(k, (int, np.integer, np.ndarray, list)) for k in clave):
+            return self.valores_en(*(np.asarray(k) % self.N for k in clave))
+
+        # Cortes: materializar la caja que los contiene y recortar
+        ejes, quitar = [], []
+        for eje, k in enumerate(clave):
+            if isinstance(k, (int, np.integer)):
+                ejes.append(np.array([k % self.N]))
+                quitar.append(eje)
+            else:
+                ejes.append(np.arange(*k.indices(self.N)))
+        if any(len(e) == 0 for e in ejes):
+            return np.zeros([len(e) for i, e in enumerate(ejes) if i not in quitar], dtype=np.uint8)
+        minimo = tuple(int(e.min()) for e in ejes)
+        maximo = tuple(int(e.max()) + 1 for e in ejes)
+        denso = self.bloque(minimo, maximo)
+        recorte = denso[np.ix_(*(e - lo for e, lo in zip(ejes, minimo)))]
+        return recorte.reshape([len(e) for i, e in enumerate(ejes) if i not in quitar])
+
+    def __setitem__(self, clave, valor):
+        raise TypeError("GridOctree es de solo lectura: constrúyalo con desde_indices o desde_denso")
+
+    def __array__(self, dtype=None, copy=None):
+        denso = self.bloque((0, 0, 0), self.shape)
+        return denso if dtype is None else denso.astype(dtype)
@@ -5,7 +5,9 @@ Definiciones conceptuales y estructuras de datos base
 
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional, Dict
+from typing import Iterator, List, Tuple, Optional, Dict
+
+import numpy as np
 
 
 class TipoCelda(Enum):
@@ -24,21 +26,17 @@ class Orientacion(Enum):
     ABAJO = (0, 0, -1)   # -Z
     
     def rotar_90(self, eje_rotacion: int = 0):
-        """Rota 90 grados en uno de los 4 lados del robot"""
-        rotaciones = {
-            0: Orientacion.ESTE,
-            1: Orientacion.NORTE,
-            2: Orientacion.OESTE,
-            3: Orientacion.SUR
-        }
-        if self in [Orientacion.ARRIBA, Orientacion.ABAJO]:
-            return rotaciones.get(eje_rotacion, Orientacion.NORTE)
-        return rotaciones.get(eje_rotacion, self)
+        """Rota 90 grados en uno de los 4 lados del robot (consulta en TABLA_ROTACION)"""
+        if 0 <= eje_rotacion < 4:
+            return ORIENTACIONES[TABLA_ROTACION[CODIGO_ORIENTACION[self]][eje_rotacion]]
+        # Lado fuera de rango: se conserva la orientación (las verticales pasan a NORTE)
+        return Orientacion.NORTE if self in (Orientacion.ARRIBA, Orientacion.ABAJO) else self
 
 
 @dataclass
 class Posicion:
-    """Posición en el espacio 3D"""
+    """Posición en el espacio 3D (tipo de frontera: el motor trabaja con índices de celda)"""
+    __slots__ = ('x', 'y', 'z')
     x: int
     y: int
     z: int
@@ -63,12 +61,201 @@ class Percepcion:
     monstruo_en_celda: bool   # Energómetro Espectral
     robot_delante: bool       # Roboscanner
     iteracion: int
+    
+    @classmethod
+    def desde_bits(cls, orientacion: int, bits: int, iteracion: int) -> 'Percepcion':
+        """Percepción a partir del código de orientación y la máscara de bits"""
+        return cls(
+            orientacion=ORIENTACIONES[orientacion],
+            monstruo_cercano=bool(bits & BIT_MONSTRUO_CERCANO),
+            colision_zona_vacia=bool(bits & BIT_COLISION),
+            monstruo_en_celda=bool(bits & BIT_MONSTRUO_EN_CELDA),
+            robot_delante=bool(bits & BIT_ROBOT_DELANTE),
+            iteracion=iteracion
+        )
+
+
+# Códigos enteros de orientaciones y acciones (motor vectorizado, historial, registros)
+ORIENTACIONES = tuple(Orientacion)
+CODIGO_ORIENTACION = {o: i for i, o in enumerate(ORIENTACIONES)}
+ACCIONES = ("VACUUMATOR", "MOVER_ADELANTE", "ROTAR_90", "ESPERAR")
+CODIGO_ACCION = {a: i for i, a in enumerate(ACCIONES)}
+VACUUMATOR, MOVER_ADELANTE, ROTAR_90, ESPERAR = range(len(ACCIONES))
+
+# Tablas por código de orientación: vector de avance y orientación resultante
+# de ROTAR_90 hacia cada uno de los 4 lados (ESTE, NORTE, OESTE, SUR)
+VECTOR_ORIENTACION = tuple(o.value for o in ORIENTACIONES)
+TABLA_ROTACION = tuple(tuple(CODIGO_ORIENTACION[o] for o in (Orientacion.ESTE, Orientacion.NORTE,
+                                                             Orientacion.OESTE, Orientacion.SUR))
+                       for _ in ORIENTACIONES)
+
+# Bits de percepción (monstruo_cercano, robot_delante, monstruo_en_celda, colision_zona_vacia)
+BIT_MONSTRUO_CERCANO, BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA, BIT_COLISION = 1, 2, 4, 8
+
+# Registros que conserva el historial percepción-acción de cada robot
+CAPACIDAD_HISTORIAL = 1024
+
+
+def bits_percepcion(p: Percepcion) -> int:
+    """Máscara de 4 bits de las percepciones booleanas"""
+    return (p.monstruo_cercano * BIT_MONSTRUO_CERCANO | p.robot_delante * BIT_ROBOT_DELANTE |
+            p.monstruo_en_celda * BIT_MONSTRUO_EN_CELDA | p.colision_zona_vacia * BIT_COLISION)
+
+
+def _codificar(orientaciones, bits, acciones):
+    """Código uint16 de un registro: bits de percepción (0-3), orientación (4-6) y acción (7-9)"""
+    return np.asarray(bits, dtype=np.uint16) | np.asarray(orientaciones, dtype=np.uint16) << 4 | \
+        np.asarray(acciones, dtype=np.uint16) << 7
+
+
+class HistorialFlota:
+    """
+    Historial percepción-acción de toda la flota (búfer circular por columnas)
+    - Cada registro son 6 bytes: un código uint16 con los bits de percepción
+      (0-3), la orientación (4-6) y la acción (7-9), y la iteración (int32)
+    - Arrays (robots, ancho): el ancho crece por duplicación hasta
+      `capacidad` y después cada robot sobrescribe en círculo sus registros
+      más antiguos: con la capacidad por defecto unos 6 KB por robot sea
+      cual sea la duración de la simulación
+    - `total` cuenta por robot todos los registros añadidos, también los ya descartados
+    - registrar añade un registro por robot a toda la flota en una operación
+      por tick; registrar_uno, el de un robot
+    """
+
+    def __init__(self, n_robots: int, capacidad: int = CAPACIDAD_HISTORIAL):
+        self.capacidad = capacidad
+        self.total = np.zeros(n_robots, dtype=np.int64)
+        inicial = min(capacidad, 16)
+        self._codigo = np.zeros((n_robots, inicial), dtype=np.uint16)
+        self._iteracion = np.zeros((n_robots, inicial), dtype=np.int32)
+
+    def _ampliar(self, posicion: int):
+        """Ensancha los arrays hasta que quepa la posición dada (sin superar la capacidad)"""
+        ancho = self._codigo.shape[1]
+        if posicion < ancho or ancho == self.capacidad:
+            return
+        nuevo = min(max(2 * ancho, posicion + 1), self.capacidad)
+        for nombre in ('_codigo', '_iteracion'):
+            viejo = getattr(self, nombre)
+            ampliado = np.zeros((len(viejo), nuevo), dtype=viejo.dtype)
+            ampliado[:, :ancho] = viejo
+            setattr(self, nombre, ampliado)
+
+    def registrar(self, ids: np.ndarray, orientaciones: np.ndarray, bits: np.ndarray, acciones: np.ndarray,
+                  iteracion: int):
+        """Un registro por robot (ids distintos) en la misma iteración"""
+        total = self.total[ids]
+        if len(total):
+            self._ampliar(int(total.max()))
+        posicion = total % self.capacidad
+        self._codigo[ids, posicion] = _codificar(orientaciones, bits, acciones)
+        self._iteracion[ids, posicion] = iteracion
+        self.total[ids] = total + 1
+
+    def registrar_uno(self, id: int, orientacion: int, bits: int, accion: int, iteracion: int):
+        total = int(self.total[id])
+        self._ampliar(total)
+        posicion = total % self.capacidad
+        self._codigo[id, posicion] = bits | orientacion << 4 | accion << 7
+        self._iteracion[id, posicion] = iteracion
+        self.total[id] = total + 1
+
+    def longitud(self, id: int) -> int:
+        """Registros conservados de un robot"""
+        return min(int(self.total[id]), self.capacidad)
+
+    def indices(self, id: int, n: Optional[int] = None) -> np.ndarray:
+        """Posiciones en la fila del robot de sus últimos n registros, en orden cronológico"""
+        total = int(self.total[id])
+        n = min(total, self.capacidad) if n is None else min(n, total, self.capacidad)
+        return np.arange(total - n, total) % self.capacidad
+
+    def exportar(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(total, códigos, iteraciones) de toda la flota"""
+        return self.total.copy(), self._codigo.copy(), self._iteracion.copy()
+
+    def restaurar(self, total: np.ndarray, codigos: np.ndarray, iteraciones: np.ndarray, capacidad: int):
+        self.capacidad = capacidad
+        self.total[:] = total
+        self._codigo = np.array(codigos, dtype=np.uint16)
+        self._iteracion = np.array(iteraciones, dtype=np.int32)
+
+
+class HistorialPercepcionAccion:
+    """
+    Historial percepción-acción de un robot: vista sobre su fila de un
+    HistorialFlota (uno propio de un solo robot si no se da la flota)
+    - Las consultas de ventana (ultimas_acciones, ultimos) devuelven arrays;
+      indexar o iterar reconstruye pares (Percepcion, acción) como la lista original
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD_HISTORIAL, flota: Optional[HistorialFlota] = None, id: int = 0):
+        self.flota = HistorialFlota(1, capacidad) if flota is None else flota
+        self.id = id
+
+    @property
+    def capacidad(self) -> int:
+        return self.flota.capacidad
+
+    @property
+    def total(self) -> int:
+        return int(self.flota.total[self.id])
+
+    def __len__(self) -> int:
+        return self.flota.longitud(self.id)
+
+    def registrar(self, orientacion: int, bits: int, accion: int, iteracion: int):
+        """Añade un registro a partir de sus códigos"""
+        self.flota.registrar_uno(self.id, orientacion, bits, accion, iteracion)
+
+    def append(self, registro: Tuple[Percepcion, str]):
+        percepcion, accion = registro
+        self.registrar(CODIGO_ORIENTACION[percepcion.orientacion], bits_percepcion(percepcion),
+                       CODIGO_ACCION[accion], percepcion.iteracion)
+
+    def ultimas_acciones(self, n: int) -> np.ndarray:
+        """Códigos de las últimas n acciones"""
+        return (self.flota._codigo[self.id, self.flota.indices(self.id, n)] >> 7).astype(np.int8)
+
+    def ultimos(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(orientaciones, bits de percepción, acciones, iteraciones) de los últimos n registros (todos si None)"""
+        indices = self.flota.indices(self.id, n)
+        codigo = self.flota._codigo[self.id, indices]
+        return (((codigo >> 4) & 7).astype(np.int8), (codigo & 15).astype(np.uint8),
+                (codigo >> 7).astype(np.int8), self.flota._iteracion[self.id, indices].astype(np.int64))
+
+    def restaurar(self, orientaciones, bits, acciones, iteraciones, total: Optional[int] = None):
+        """Sustituye el contenido por los registros dados (los más recientes, si no caben)"""
+        flota = self.flota
+        codigo = _codificar(orientaciones, bits, acciones)[-flota.capacidad:]
+        iteraciones = np.asarray(iteraciones, dtype=np.int32)[-flota.capacidad:]
+        total = max(len(codigo), total or 0)
+        flota._ampliar(flota.capacidad - 1 if total > len(codigo) else len(codigo) - 1)
+        indices = np.arange(total - len(codigo), total) % flota.capacidad
+        flota._codigo[self.id, indices] = codigo
+        flota._iteracion[self.id, indices] = iteraciones
+        flota.total[self.id] = total
+
+    def _registro(self, i: int) -> Tuple[Percepcion, str]:
+        codigo = int(self.flota._codigo[self.id, i])
+        return (Percepcion.desde_bits((codigo >> 4) & 7, codigo & 15, int(self.flota._iteracion[self.id, i])),
+                ACCIONES[codigo >> 7])
+
+    def __getitem__(self, clave):
+        indices = self.flota.indices(self.id)
+        if isinstance(clave, slice):
+            return [self._registro(i) for i in indices[clave].tolist()]
+        return self._registro(int(indices[clave]))
+
+    def __iter__(self) -> Iterator[Tuple[Percepcion, str]]:
+        return (self._registro(i) for i in self.flota.indices(self.id).tolist())
 
 
 @dataclass
 class MemoriaRobot:
     """Memoria interna del agente Robot"""
-    percepciones_acciones: List[Tuple[Percepcion, str]] = field(default_factory=list)
+    percepciones_acciones: HistorialPercepcionAccion = field(default_factory=HistorialPercepcionAccion)
+    # AgenteRobot sustituye ambos por vistas sobre las creencias de la flota (CreenciasFlota)
     mapa_creencias: Dict[Posicion, str] = field(default_factory=dict)
     posicion_relativa: Posicion = field(default_factory=lambda: Posicion(0, 0, 0))
     zonas_vacias_conocidas: set = field(default_factory=set)
@@ -0,0 +1,133 @@
+"""
+EJECUCIÓN PARALELA DE RÉPLICAS
+Mundo construido una vez en memoria compartida y réplicas en un pool de procesos
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .aleatorio import semillas_entorno
+from .storage import crear_grid, construir_vecindad
+
+
+class MundoCompartido:
+    """
+    Mundo (grid, libre y máscaras acolchados) publicado en multiprocessing.shared_memory
+    - Lo construye una vez el proceso principal con `crear`
+    - Los trabajadores se adjuntan por nombre con `adjuntar` y ven arrays de
+      solo lectura sobre el mismo bloque: ninguna copia por proceso
+    - Se pasa a EntornoHexaedrico(..., mundo=...) en lugar de generar el grid
+    """
+
+    def __init__(self, memoria: shared_memory.SharedMemory, N: int, n_vacias: int, propietario: bool):
+        self.memoria = memoria
+        self.N = N
+        self.n_vacias = n_vacias
+        self._propietario = propietario
+
+        celdas, acolchadas = N ** 3, (N + 2) ** 3
+        buffer = memoria.buf
+        self.grid = np.ndarray((N, N, N), dtype=np.uint8, buffer=buffer)
+        self.libre = np.ndarray(acolchadas, dtype=bool, buffer=buffer, offset=celdas)
+        self.mascaras = np.ndarray(acolchadas, dtype=np.uint8, buffer=buffer, offset=celdas + acolchadas)
+        if not propietario:
+            for array in (self.grid, self.libre, self.mascaras):
+                array.flags.writeable = False
+
+    @staticmethod
+    def nbytes_para(N: int) -> int:
+        return N ** 3 + 2 * (N + 2) ** 3
+
+    @classmethod
+    def crear(cls, N: int, pvacio: float, seed: Optional[int] = None) -> 'MundoCompartido':
+        """Construye el mundo que tendría EntornoHexaedrico(N, ..., pvacio, seed=seed)"""
+        total_celdas = N ** 3
+        n_vacias = int(total_celdas * pvacio)
+        rng = np.random.default_rng(semillas_entorno(seed)[0])
+        grid = crear_grid(N, rng.choice(total_celdas, size=n_vacias, replace=False))
+        return cls.publicar(grid, *construir_vecindad(grid), n_vacias)
+
+    @classmethod
+    def publicar(cls, grid: np.ndarray, libre: np.ndarray, mascaras: np.ndarray,
+                 n_vacias: int) -> 'MundoCompartido':
+        """Copia a memoria compartida un mundo denso ya construido"""
+        N = grid.shape[0]
+        memoria = shared_memory.SharedMemory(create=True, size=cls.nbytes_para(N))
+        mundo = cls(memoria, N, n_vacias, propietario=True)
+        mundo.grid[...] = grid
+        mundo.libre[...] = libre
+        mundo.mascaras[...] = mascaras
+        return mundo
+
+    @property
+    def descriptor(self) -> tuple:
+        """Datos (serializables) para adjuntarse desde otro proceso"""
+        return (self.memoria.name, self.N, self.n_vacias)
+
+    @classmethod
+    def adjuntar(cls, descriptor: tuple) -> 'MundoCompartido':
+        nombre, N, n_vacias = descriptor
+        return cls(shared_memory.SharedMemory(name=nombre), N, n_vacias, propietario=False)
+
+    def cerrar(self):
+        """Suelta los arrays y la memoria; el propietario además la libera"""
+        self.grid = self.libre = self.mascaras = None
+        self.memoria.close()
+        if self._propietario:
+            self.memoria.unlink()
+
+    def __enter__(self) -> 'MundoCompartido':
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# Mundo al que está adjunto cada proceso trabajador
+_mundo_trabajador: Optional[MundoCompartido] = None
+
+
+def _iniciar_trabajador(descriptor: tuple):
+    global _mundo_trabajador
+    _mundo_trabajador = MundoCompartido.adjuntar(descriptor)
+
+
+def _ejecutar_replica(config: Dict, seed: int) -> Dict:
+    from .environment import EntornoHexaedrico
+    from .simulator import Simulador
+
+    salida = io.StringIO() if config['silencioso'] else None
+    with contextlib.redirect_stdout(salida) if salida else contextlib.nullcontext():
+        entorno = EntornoHexaedrico(
+            N=_mundo_trabajador.N, pfree=config['pfree'], pvacio=config['pvacio'],
+            n_robots=config['n_robots'], n_monstruos=config['n_monstruos'], seed=seed,
+            robots_vectorizados=config['robots_vectorizados'], mundo=_mundo_trabajador
+        )
+        return Simulador(entorno).ejecutar(config['max_iteraciones'], verbose=False)
+
+
+def ejecutar_replicas(N: int, pfree: float, pvacio: float, n_robots: int, n_monstruos: int,
+                      semillas: Sequence[int], seed_mundo: Optional[int] = None,
+                      max_iteraciones: int = 100, procesos: Optional[int] = None,
+                      robots_vectorizados: bool = False, silencioso: bool = True) -> List[Dict]:
+    """
+    Ejecuta una réplica de Simulador.ejecutar por semilla de agentes sobre un
+    único mundo (construido con seed_mundo) compartido entre procesos.
+    Retorna los reportes en el orden de `semillas`.
+    """
+    config = {
+        'pfree': pfree, 'pvacio': pvacio, 'n_robots': n_robots, 'n_monstruos': n_monstruos,
+        'max_iteraciones': max_iteraciones, 'robots_vectorizados': robots_vectorizados,
+        'silencioso': silencioso,
+    }
+    procesos = procesos or min(len(semillas), os.cpu_count() or 1)
+    with MundoCompartido.crear(N, pvacio, seed_mundo) as mundo:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                 initargs=(mundo.descriptor,)) as pool:
+            return list(pool.map(_ejecutar_replica, [config] * len(semillas), semillas))
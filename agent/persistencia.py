@@ -0,0 +1,182 @@
+"""
+PUNTOS DE CONTROL
+Guardado y restauración del estado completo de una simulación en un contenedor NumPy (.npz)
+"""
+
+import json
+from typing import Dict, TYPE_CHECKING
+
+import numpy as np
+
+from .aleatorio import FlujoAleatorio
+from .decision import TablaDecision
+from .octree import GridOctree
+from .storage import GridEmpaquetado, construir_vecindad
+
+if TYPE_CHECKING:
+    from .environment import EntornoHexaedrico
+    from .simulator import Simulador
+
+
+# Versión del formato: cualquier cambio en las claves o arrays guardados la incrementa
+VERSION = 2
+
+CAMPOS_ROBOTS = ('celda', 'orientacion', 'vivo', 'puntuacion', 'monstruos_destruidos',
+                 'movimientos', 'colisiones')
+CAMPOS_MONSTRUOS = ('celda', 'K', 'p', 'vivo')
+
+
+def _memorias_a_columnas(entorno: 'EntornoHexaedrico') -> Dict[str, np.ndarray]:
+    """
+    MemoriaRobot de cada robot como columnas: historial y métricas son los
+    arrays de la flota y las comunicaciones (iteración, robot, acción) de
+    cada robot van en JSON, que conserva el tipo de cada campo
+    """
+    motor_r = entorno.motor_robots
+    columnas = {
+        'mem_comunicaciones': np.array(json.dumps([r._memoria.comunicaciones_robots for r in entorno.robots])),
+        'mem_relativa': motor_r.relativa,
+        'mem_ultima': motor_r.ultima_celda,
+        'mem_experiencias': motor_r.metricas.experiencias,
+    }
+    columnas['mem_hist_total'], columnas['mem_hist_codigo'], columnas['mem_hist_iteracion'] = \
+        motor_r.historial.exportar()
+    return columnas
+
+
+def _columnas_a_memorias(entorno: 'EntornoHexaedrico', datos, capacidad_historial: int) -> None:
+    motor_r = entorno.motor_robots
+    motor_r.relativa[...] = datos['mem_relativa']
+    motor_r.ultima_celda[...] = datos['mem_ultima']
+    motor_r.reglas.restaurar(datos['reglas_confianza'])
+    motor_r.metricas.restaurar(datos['mem_experiencias'])
+    motor_r.historial.restaurar(datos['mem_hist_total'], datos['mem_hist_codigo'], datos['mem_hist_iteracion'],
+                                 capacidad_historial)
+
+    # Creencias, posiciones, reglas, historial y métricas viven en el motor; aquí solo las comunicaciones
+    comunicaciones = json.loads(str(datos['mem_comunicaciones']))
+    for robot, propias in zip(entorno.robots, comunicaciones):
+        robot._memoria.comunicaciones_robots = [tuple(c) for c in propias]
+
+
+def guardar_checkpoint(simulador: 'Simulador', ruta: str):
+    """Escribe en `ruta` el estado completo de la simulación (formato .npz sin comprimir)"""
+    entorno = simulador.entorno
+    motor_r, motor_m = entorno.motor_robots, entorno.motor_monstruos
+    grid = entorno.grid
+    estado_robots, estado_monstruos = entorno.rng_robots.estado(), entorno.rng_monstruos.estado()
+    historial = simulador.historial_estadisticas
+    claves_historial = list(historial[0]) if historial else []
+
+    meta = {
+        'version': VERSION, 'N': entorno.N, 'pfree': entorno.pfree, 'pvacio': entorno.pvacio,
+        'almacenamiento': entorno.almacenamiento, 'robots_vectorizados': entorno.robots_vectorizados,
+        'iteracion': entorno.iteracion, 'n_libres': entorno.n_libres,
+        'rng_mundo': entorno._rng_mundo.bit_generator.state,
+        'rng_robots': estado_robots[0], 'rng_monstruos': estado_monstruos[0],
+        'profundidad_octree': getattr(grid, 'profundidad', None),
+        'claves_historial': claves_historial,
+        'estrategia': entorno.estrategia,
+        'tick_campo': entorno.campo_exploracion.tick if entorno.campo_exploracion is not None else 0,
+        'capacidad_historial': motor_r.historial.capacidad,
+    }
+    arrays = {
+        'meta': np.array(json.dumps(meta)),
+        'rng_robots_bloque': estado_robots[1],
+        'rng_monstruos_bloque': estado_monstruos[1],
+    }
+    arrays['creencias_claves'], arrays['creencias_bloques'] = motor_r.creencias.exportar()
+    arrays['reglas_confianza'] = motor_r.reglas.confianza
+    for ventana, detector in motor_r.bucles.items():
+        arrays[f'bucles_{ventana}_total'], arrays[f'bucles_{ventana}_codigos'] = detector.exportar()
+    tabla = motor_r.tabla_decision
+    arrays['decision_accion'], arrays['decision_alternativa'] = tabla.accion, tabla.alternativa
+    arrays['decision_probabilidad'] = tabla.probabilidad
+    if entorno.campo_exploracion is not None:
+        entorno.campo_exploracion.sincronizar()
+        arrays['campo_transitable'] = np.packbits(entorno.campo_exploracion.libre)
+        arrays['campo_fuentes'] = np.packbits(entorno.campo_exploracion.fuentes)
+        arrays['campo_visita'] = entorno.campo_exploracion.visita
+    if isinstance(grid, GridEmpaquetado):
+        arrays['grid_bits'] = grid._bits
+    elif isinstance(grid, GridOctree):
+        arrays['grid_hijos'] = grid._hijos
+    else:
+        arrays['grid'] = np.asarray(grid)
+    for campo in CAMPOS_ROBOTS:
+        arrays[f'robots_{campo}'] = getattr(motor_r, campo)
+    for campo in CAMPOS_MONSTRUOS:
+        arrays[f'monstruos_{campo}'] = getattr(motor_m, campo)
+    for clave in claves_historial:
+        arrays[f'historial_{clave}'] = np.array([s[clave] for s in historial])
+
+    arrays.update(_memorias_a_columnas(entorno))
+    with open(ruta, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def cargar_checkpoint(ruta: str) -> 'Simulador':
+    """Reconstruye un Simulador (con su entorno) a partir de un punto de control"""
+    from .environment import EntornoHexaedrico
+    from .simulator import Simulador
+
+    with np.load(ruta) as datos:
+        meta = json.loads(str(datos['meta']))
+        if meta['version'] != VERSION:
+            raise ValueError(f"Versión de punto de control no soportada: {meta['version']}")
+        N = meta['N']
+
+        entorno = EntornoHexaedrico.__new__(EntornoHexaedrico)
+        entorno.N, entorno.pfree, entorno.pvacio = N, meta['pfree'], meta['pvacio']
+        entorno.n_libres = meta['n_libres']
+        entorno.iteracion = meta['iteracion']
+        entorno.robots_vectorizados = meta['robots_vectorizados']
+        entorno.almacenamiento = meta['almacenamiento']
+        entorno.mundo = None
+        entorno.trayectoria = None
+        entorno._componentes = None
+        entorno.estrategia = meta['estrategia']
+        entorno.campo_exploracion = None
+
+        entorno._rng_mundo = np.random.default_rng()
+        entorno._rng_mundo.bit_generator.state = meta['rng_mundo']
+        entorno.rng_robots, entorno.rng_monstruos = FlujoAleatorio(), FlujoAleatorio()
+        entorno.rng_robots.fijar_estado((meta['rng_robots'], datos['rng_robots_bloque']))
+        entorno.rng_monstruos.fijar_estado((meta['rng_monstruos'], datos['rng_monstruos_bloque']))
+
+        if 'grid_bits' in datos:
+            entorno.grid = GridEmpaquetado(N)
+            entorno.grid._bits = datos['grid_bits']
+        elif 'grid_hijos' in datos:
+            entorno.grid = GridOctree(N, datos['grid_hijos'], meta['profundidad_octree'])
+        else:
+            entorno.grid = datos['grid']
+        entorno.libre, entorno.mascaras = construir_vecindad(entorno.grid)
+        entorno._preparar_sensores()
+        entorno._crear_agentes(datos['robots_celda'], datos['robots_orientacion'], datos['monstruos_celda'])
+
+        motor_r, motor_m = entorno.motor_robots, entorno.motor_monstruos
+        for campo in CAMPOS_ROBOTS:
+            getattr(motor_r, campo)[...] = datos[f'robots_{campo}']
+        for campo in CAMPOS_MONSTRUOS:
+            getattr(motor_m, campo)[...] = datos[f'monstruos_{campo}']
+        motor_r.reconstruir()
+        motor_m.reconstruir()
+        motor_r.tabla_decision = TablaDecision(datos['decision_accion'], datos['decision_alternativa'],
+                                               datos['decision_probabilidad'])
+        motor_r.creencias.restaurar(datos['creencias_claves'], datos['creencias_bloques'])
+
+        _columnas_a_memorias(entorno, datos, meta['capacidad_historial'])
+        for ventana, detector in motor_r.bucles.items():
+            detector.restaurar(datos[f'bucles_{ventana}_total'], datos[f'bucles_{ventana}_codigos'])
+        if entorno.estrategia == 'gradiente':
+            n_celdas = (N + 2) ** 3
+            entorno._preparar_estrategia((np.unpackbits(datos['campo_transitable'], count=n_celdas).astype(bool),
+                                          np.unpackbits(datos['campo_fuentes'], count=n_celdas).astype(bool),
+                                          datos['campo_visita'], meta['tick_campo']))
+
+        simulador = Simulador(entorno)
+        claves = meta['claves_historial']
+        columnas = [datos[f'historial_{clave}'].tolist() for clave in claves]
+        simulador.historial_estadisticas = [dict(zip(claves, fila)) for fila in zip(*columnas)]
+    return simulador
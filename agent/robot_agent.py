@@ -3,362 +3,788 @@ AGENTE ROBOT MONSTRUICIDA
 Implementación del agente con memoria interna para robots
 """
 
-import random
-from typing import TYPE_CHECKING
+import numpy as np
+from typing import List, TYPE_CHECKING
 
-from .ontology import Posicion, Orientacion, Percepcion, MemoriaRobot
+from .ontology import (Posicion, Orientacion, Percepcion, MemoriaRobot, HistorialFlota, HistorialPercepcionAccion,
+                       ORIENTACIONES, CODIGO_ORIENTACION, ACCIONES, CODIGO_ACCION, VACUUMATOR, MOVER_ADELANTE,
+                       ROTAR_90, VECTOR_ORIENTACION, TABLA_ROTACION, BIT_MONSTRUO_CERCANO,
+                       BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA, BIT_COLISION, bits_percepcion)
+from .occupancy import IndiceOcupacionVectorizado
+from .creencias import CreenciasFlota, MapaCreencias, ZonasVaciasConocidas, VISITADA, ZONA_VACIA
+from .decision import TablaDecision, clave_decision, compilar_reglas
+from .aprendizaje import ReglasFlota, ReglasAprendidas
+from .metricas import MetricasFlota, MetricasRacionalidad, METRICAS
+from .bucles import DetectorBucles, VENTANAS_BUCLE
+from .storage import DIRECCIONES
 
 if TYPE_CHECKING:
     from .environment import EntornoHexaedrico
 
 
+# Estrategias de exploración (regla 4): al azar o siguiendo el campo de
+# distancias hacia la zona que la flota aún no ha visitado ni sabe vacía
+ESTRATEGIAS = ("exploracion", "gradiente")
+
+
+def _metricas_accion(accion: int, bits: int) -> tuple:
+    """Métricas de racionalidad que incrementa una acción con esas percepciones"""
+    metricas = []
+    if accion == MOVER_ADELANTE:
+        metricas.append('colisiones' if bits & BIT_COLISION else 'movimientos_exitosos')
+    if accion in (MOVER_ADELANTE, ROTAR_90):
+        if bits & BIT_MONSTRUO_CERCANO:
+            metricas.append('acciones_caza')
+        if bits & BIT_ROBOT_DELANTE:
+            metricas.append('comunicaciones_exitosas')
+    return tuple(metricas)
+
+
+# Tablas por (código de acción, bits de percepción tras actuar):
+# - efectividad (0-1) con la que se aprende la regla
+# - variación de puntuación (sin los +1000 por monstruo destruido)
+# - métricas de racionalidad que se incrementan
+_BITS = np.arange(16)
+TABLA_EFECTIVIDAD = np.full((len(ACCIONES), 16), 0.5)
+TABLA_EFECTIVIDAD[VACUUMATOR, (_BITS & BIT_MONSTRUO_EN_CELDA) > 0] = 1.0   # Acción perfecta
+TABLA_EFECTIVIDAD[MOVER_ADELANTE] = np.where(_BITS & BIT_COLISION, 0.1, 0.8)  # Colisión / movimiento exitoso
+TABLA_EFECTIVIDAD[ROTAR_90, (_BITS & BIT_ROBOT_DELANTE) > 0] = 0.7      # Evasión exitosa
+TABLA_PUNTUACION = np.zeros((len(ACCIONES), 16), dtype=np.int64)
+TABLA_PUNTUACION[VACUUMATOR] = -1000
+TABLA_PUNTUACION[MOVER_ADELANTE] = np.where(_BITS & BIT_COLISION, -50, -10)
+TABLA_PUNTUACION[ROTAR_90] = -10
+TABLA_METRICAS = np.array([[[m in _metricas_accion(a, b) for m in METRICAS] for b in range(16)]
+                           for a in range(len(ACCIONES))], dtype=np.int64)
+
+# Las mismas tablas como listas para el ciclo de un solo robot
+_EFECTIVIDAD = TABLA_EFECTIVIDAD.tolist()
+_PUNTUACION = TABLA_PUNTUACION.tolist()
+
+# Probabilidad de girar ante una celda ya visitada al explorar
+PROBABILIDAD_GIRO_VISITADA = 0.3
+
+
+def _protocolo_comunicacion(id_menor: bool) -> int:
+    """
+    Protocolo de comunicación robot-robot según especificaciones del examen:
+    - Ambos rotan 90° O
+    - Uno continúa de frente y el otro rota 90° a algún lado
+    El de id menor continúa de frente; el de id mayor rota 90°
+    """
+    return MOVER_ADELANTE if id_menor else ROTAR_90
+
+
+def _estrategia_caza(vacia_conocida: bool, libre_adelante: bool) -> int:
+    """Estrategia cuando hay monstruo cercano: avanzar si se puede y, si no, rotar para explorar"""
+    return MOVER_ADELANTE if libre_adelante and not vacia_conocida else ROTAR_90
+
+
+def _estrategia_exploracion(vacia_conocida: bool, visitada: bool):
+    """
+    Estrategia de exploración cuando no hay monstruos cerca: evitar zonas
+    vacías conocidas, preferir las no visitadas y, ante una ya visitada,
+    probar otra dirección con probabilidad PROBABILIDAD_GIRO_VISITADA
+    """
+    if vacia_conocida:
+        return ROTAR_90
+    if visitada:
+        return MOVER_ADELANTE, ROTAR_90, PROBABILIDAD_GIRO_VISITADA
+    return MOVER_ADELANTE
+
+
+def reglas_jerarquicas(monstruo_cercano: bool, robot_delante: bool, monstruo_en_celda: bool,
+                       vacia_conocida: bool, visitada: bool, libre_adelante: bool, id_menor: bool):
+    """
+    Jerarquía de reglas del examen (formato de decision.compilar_reglas):
+    1. Si monstruo en celda → VACUUMATOR (destruir)
+    2. Si robot delante → protocolo de comunicación
+    3. Si monstruo cercano → caza
+    4. Si no → exploración (la estrategia 'gradiente' del entorno la sustituye donde el campo da dirección)
+    """
+    if monstruo_en_celda:
+        return VACUUMATOR
+    if robot_delante:
+        return _protocolo_comunicacion(id_menor)
+    if monstruo_cercano:
+        return _estrategia_caza(vacia_conocida, libre_adelante)
+    return _estrategia_exploracion(vacia_conocida, visitada)
+
+
+TABLA_DECISION = compilar_reglas(reglas_jerarquicas)
+
+
+def _rango_en_grupo(grupos: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Posición de cada id dentro de su grupo, ordenando cada grupo por id"""
+    orden = np.lexsort((ids, grupos))
+    g = grupos[orden]
+    inicio = np.r_[True, g[1:] != g[:-1]]
+    posicion = np.arange(len(g))
+    rango = np.empty(len(g), dtype=np.int64)
+    rango[orden] = posicion - np.maximum.accumulate(np.where(inicio, posicion, 0))
+    return rango
+
+
+def menor_id_por_celda(celdas: np.ndarray, ids: np.ndarray, consultas: np.ndarray, ausente: int) -> np.ndarray:
+    """Menor id de los agentes (celdas[i], ids[i]) en cada celda consultada (`ausente` si no hay)"""
+    if len(ids) == 0:
+        return np.full(np.shape(consultas), ausente, dtype=np.int64)
+    orden = np.lexsort((ids, celdas))
+    ocupadas = celdas[orden]
+    primeros = np.r_[True, ocupadas[1:] != ocupadas[:-1]]
+    ocupadas, menores = ocupadas[primeros], ids[orden][primeros]
+    
+    i = np.minimum(np.searchsorted(ocupadas, consultas), len(ocupadas) - 1)
+    return np.where(ocupadas[i] == consultas, menores[i], ausente)
+
+
+def emparejar_victimas(celdas_robots: np.ndarray, ids_robots: np.ndarray,
+                       celdas_monstruos: np.ndarray, ids_monstruos: np.ndarray) -> np.ndarray:
+    """
+    Monstruo que destruye cada robot que activa VACUUMATOR (-1 si no queda
+    ninguno): el k-ésimo robot de una celda, por id, con el k-ésimo monstruo
+    """
+    rango_robots = _rango_en_grupo(celdas_robots, ids_robots)
+    rango_monstruos = _rango_en_grupo(celdas_monstruos, ids_monstruos)
+    pares = {(c, r): m for c, r, m in zip(celdas_monstruos.tolist(), rango_monstruos.tolist(),
+                                          ids_monstruos.tolist())}
+    return np.array([pares.get((c, r), -1) for c, r in zip(celdas_robots.tolist(), rango_robots.tolist())],
+                    dtype=np.int64)
+
+
+def decidir_acciones(ids: np.ndarray, menor_id_delante: np.ndarray, monstruo_en_celda: np.ndarray,
+                     robot_delante: np.ndarray, monstruo_cercano: np.ndarray, libre_adelante: np.ndarray,
+                     vacia_conocida: np.ndarray, visitada: np.ndarray, uniformes: np.ndarray,
+                     tabla: TablaDecision = TABLA_DECISION) -> np.ndarray:
+    """Decisión de toda la flota: clave de condiciones de cada robot y una consulta a la tabla compilada"""
+    claves = clave_decision(monstruo_cercano, robot_delante, monstruo_en_celda, vacia_conocida, visitada,
+                            libre_adelante, ids < menor_id_delante)
+    return tabla.resolver(claves, uniformes)
+
+
+def empaquetar_bits(monstruo_cercano: np.ndarray, robot_delante: np.ndarray, monstruo_en_celda: np.ndarray,
+                    colision: np.ndarray) -> np.ndarray:
+    """Bits de percepción (uint8) de la flota a partir de la máscara de cada sensor"""
+    return (monstruo_cercano * BIT_MONSTRUO_CERCANO | robot_delante * BIT_ROBOT_DELANTE |
+            monstruo_en_celda * BIT_MONSTRUO_EN_CELDA | colision * BIT_COLISION).astype(np.uint8)
+
+
+def contar_trigramas(acciones: np.ndarray) -> np.ndarray:
+    """Repeticiones de cada trigrama distinto en una secuencia de códigos de acción"""
+    acciones = acciones.astype(np.int64)
+    trigramas = (acciones[:-2] * len(ACCIONES) + acciones[1:-1]) * len(ACCIONES) + acciones[2:]
+    return np.unique(trigramas, return_counts=True)[1]
+
+
+def acciones_gradiente(direccion: np.ndarray, orient: np.ndarray, direccion_orientacion: np.ndarray,
+                       lado_hacia: np.ndarray) -> tuple:
+    """
+    Acción para seguir la bajada del campo de distancias en `direccion`:
+    MOVER_ADELANTE si está al frente y, si no, ROTAR_90 con el lado que
+    orienta hacia ella (-1: está detrás, cualquier lado sirve)
+    """
+    al_frente = direccion == direccion_orientacion[orient]
+    accion = np.where(al_frente, MOVER_ADELANTE, ROTAR_90).astype(np.int8)
+    lado = np.where(al_frente, -1, lado_hacia[orient, direccion])
+    return accion, lado
+
+
+class MotorRobots:
+    """
+    Motor vectorizado de la flota de robots
+    - Estado en arrays NumPy: celda, orientación (código), vivo, puntuación y contadores
+    - Percepción de toda la flota como arrays booleanos y decisión con una
+      consulta a la jerarquía de reglas compilada (tabla_decision)
+    - Rotaciones, movimientos y puntuación se aplican en bloque
+    - Las creencias (celdas visitadas y zonas vacías) se guardan por flota en
+      CreenciasFlota y la confianza de las reglas aprendidas en ReglasFlota,
+      actualizada para toda la flota en cada tick, igual que los detectores
+      de bucles (DetectorBucles, uno por ventana de VENTANAS_BUCLE), el
+      historial percepción-acción acotado (HistorialFlota) y las métricas de
+      racionalidad (MetricasFlota): la memoria de cada robot es una vista
+    - Mantiene al día vivos, monstruos destruidos y puntuación total, y un
+      orden de iteración compacto sin robots muertos
+    - Con la estrategia 'gradiente' la exploración sigue el campo de
+      distancias del entorno y le notifica las celdas visitadas y las zonas
+      vacías descubiertas
+    """
+    
+    def __init__(self, entorno: 'EntornoHexaedrico', celdas: np.ndarray, orientaciones: np.ndarray):
+        n = len(celdas)
+        self.entorno = entorno
+        self.celda = np.asarray(celdas, dtype=np.int64)
+        self.orientacion = np.asarray(orientaciones, dtype=np.int8)
+        self.vivo = np.ones(n, dtype=bool)
+        self.puntuacion = np.zeros(n, dtype=np.int64)
+        self.monstruos_destruidos = np.zeros(n, dtype=np.int64)
+        self.movimientos = np.zeros(n, dtype=np.int64)
+        self.colisiones = np.zeros(n, dtype=np.int64)
+        # Posición relativa (desplazamiento acumulado) y celda previa al último movimiento
+        self.relativa = np.zeros((n, 3), dtype=np.int64)
+        self.ultima_celda = self.celda.copy()
+        self.n_vivos = n
+        self.monstruos_destruidos_total = 0
+        self.puntuacion_total = 0
+        self._ids_vivos = np.arange(n)
+        self._compactar = False
+        self.robots: List['AgenteRobot'] = []  # Vistas (las registra el entorno)
+        
+        self.n_celdas = (entorno.N + 2) ** 3
+        denso = isinstance(entorno.mascaras, np.ndarray)
+        self.ocupacion = IndiceOcupacionVectorizado(self.celda, self.vivo, self.n_celdas if denso else None)
+        
+        # Tablas por código de orientación
+        self._adelante = np.array([entorno.desplazamiento_adelante[o] for o in ORIENTACIONES], dtype=np.int64)
+        self._visibles = np.array([entorno.desplazamientos_visibles[o] for o in ORIENTACIONES], dtype=np.int64)
+        self._vector = np.array(VECTOR_ORIENTACION, dtype=np.int64)
+        # Las mismas tablas como listas para el ciclo de un solo robot (sin escalares NumPy)
+        self.adelante_por_codigo = self._adelante.tolist()
+        self.visibles_por_codigo = self._visibles.tolist()
+        self._rotacion = np.array(TABLA_ROTACION, dtype=np.int8)
+        # Dirección (índice en DIRECCIONES) de cada orientación y lado de
+        # rotación que lleva de una orientación a cada dirección (-1 si ninguno)
+        self._direccion = np.array([DIRECCIONES.index(o.value) for o in ORIENTACIONES], dtype=np.int64)
+        self._lado_hacia = np.full((len(ORIENTACIONES), len(DIRECCIONES)), -1, dtype=np.int64)
+        for o in range(len(ORIENTACIONES)):
+            for lado in range(4):
+                self._lado_hacia[o, self._direccion[self._rotacion[o, lado]]] = lado
+        
+        # Jerarquía de reglas compilada (ver decision.compilar_reglas)
+        self.tabla_decision = TABLA_DECISION
+        
+        # Creencias de la flota (mapa_creencias y zonas_vacias_conocidas de cada robot)
+        self.creencias = CreenciasFlota(n, entorno.N)
+        
+        # Reglas aprendidas de la flota (reglas_aprendidas de cada robot)
+        self.reglas = ReglasFlota(n)
+        
+        # Trigramas de las últimas acciones de cada robot, por ventana (detectar_bucle_infinito)
+        self.bucles = {ventana: DetectorBucles(n, ventana) for ventana in VENTANAS_BUCLE}
+        
+        # Historial percepción-acción y métricas de racionalidad de la flota
+        # (percepciones_acciones y metricas_racionalidad de cada robot)
+        self.historial = HistorialFlota(n)
+        self.metricas = MetricasFlota(n, TABLA_METRICAS)
+    
+    def __len__(self) -> int:
+        return len(self.celda)
+    
+    def avanzar(self, id: int, destino: int):
+        """Movimiento de un robot hacia delante: traslada y actualiza su posición relativa"""
+        self.relativa[id] += self._vector[self.orientacion[id]]
+        self.ultima_celda[id] = self.celda[id]
+        self.mover(id, destino)
+    
+    def mover(self, id: int, celda: int):
+        """Traslada un robot a otra celda manteniendo el índice de ocupación"""
+        if self.vivo[id]:
+            self.ocupacion.mover(id, int(self.celda[id]), celda)
+        self.celda[id] = celda
+    
+    def fijar_vivo(self, id: int, valor: bool):
+        """Al morir (o revivir) se retira (o registra) en el índice de ocupación"""
+        if valor and not self.vivo[id]:
+            self.ocupacion.agregar(id, int(self.celda[id]))
+            self.n_vivos += 1
+            self._ids_vivos = None
+        elif not valor and self.vivo[id]:
+            self.ocupacion.quitar(id, int(self.celda[id]))
+            self.n_vivos -= 1
+            self._compactar = True
+        self.vivo[id] = valor
+    
+    def ids_vivos(self) -> np.ndarray:
+        """Ids de los robots vivos en orden; los muertos se compactan fuera al pedirlos"""
+        if self._ids_vivos is None:
+            self._ids_vivos = np.flatnonzero(self.vivo)
+        elif self._compactar:
+            self._ids_vivos = self._ids_vivos[self.vivo[self._ids_vivos]]
+        self._compactar = False
+        return self._ids_vivos
+    
+    def reconstruir(self):
+        """Recalcula índice de ocupación y contadores tras reescribir los arrays de estado"""
+        self.ocupacion.reconstruir()
+        self.n_vivos = int(self.vivo.sum())
+        self.monstruos_destruidos_total = int(self.monstruos_destruidos.sum())
+        self.puntuacion_total = int(self.puntuacion.sum())
+        self._ids_vivos = None
+    
+    def sumar_puntuacion(self, ids, delta):
+        """Suma `delta` (escalar o uno por robot) a la puntuación de los robots dados y al total de la flota"""
+        self.puntuacion[ids] += delta
+        if np.ndim(delta):
+            self.puntuacion_total += int(delta.sum())
+        else:
+            self.puntuacion_total += delta * np.size(ids)
+    
+    def paso(self):
+        """
+        Ciclo percepción-decisión-acción de todos los robots vivos a la vez.
+        Todos perciben el mismo estado del mundo (modo síncrono); si varios
+        robots activan VACUUMATOR en la misma celda, los monstruos se reparten
+        por orden de id.
+        """
+        entorno = self.entorno
+        ids = self.ids_vivos()
+        if len(ids) == 0:
+            return
+        celda = self.celda[ids]
+        orient = self.orientacion[ids]
+        adelante = celda + self._adelante[orient]
+        libre_adelante = np.asarray(entorno.libre[adelante], dtype=bool)
+        monstruos = entorno.ocupacion_monstruos
+        
+        # 1. Percibir (Energómetro, Monstroscopio y Roboscanner)
+        monstruo_en_celda = monstruos.conteos(celda) > 0
+        visibles = celda[:, None] + self._visibles[orient]
+        monstruo_cercano = (np.asarray(entorno.libre[visibles], dtype=bool) &
+                            (monstruos.conteos(visibles) > 0)).any(axis=1)
+        robot_delante = libre_adelante & (self.ocupacion.conteos(adelante) > 0)
+        
+        creencia = self.creencias.leer(ids, adelante)
+        vacia_conocida = creencia == ZONA_VACIA
+        visitada = creencia == VISITADA
+        
+        # 2. Decidir: jerarquía de reglas como máscaras
+        menor_id_delante = menor_id_por_celda(self.celda[ids], ids, adelante, len(self))
+        accion = decidir_acciones(ids, menor_id_delante, monstruo_en_celda, robot_delante,
+                                  monstruo_cercano, libre_adelante, vacia_conocida, visitada,
+                                  entorno.rng_robots.uniformes(len(ids)), self.tabla_decision)
+        
+        campo = entorno.campo_exploracion
+        lado_preferido = None
+        if campo is not None:
+            # Exploración guiada: seguir la bajada del campo donde la haya
+            explorando = np.flatnonzero(~(monstruo_en_celda | robot_delante | monstruo_cercano))
+            direccion = campo.direccion_descendente(celda[explorando], self._direccion[orient[explorando]])
+            guiados = explorando[direccion >= 0]
+            lado_preferido = np.full(len(ids), -1, dtype=np.int64)
+            accion[guiados], lado_preferido[guiados] = acciones_gradiente(
+                direccion[direccion >= 0], orient[guiados], self._direccion, self._lado_hacia)
+        
+        # 3. Actuar en bloque
+        mueve = accion == MOVER_ADELANTE
+        exito = mueve & libre_adelante
+        colision = mueve & ~libre_adelante
+        rota = accion == ROTAR_90
+        
+        self.celda[ids[exito]] = adelante[exito]
+        self.ocupacion.mover_lote(celda[exito], adelante[exito])
+        self.relativa[ids[exito]] += self._vector[orient[exito]]
+        self.ultima_celda[ids[exito]] = celda[exito]
+        self.movimientos[ids[exito]] += 1
+        self.colisiones[ids[colision]] += 1
+        bits = empaquetar_bits(monstruo_cercano, robot_delante, monstruo_en_celda, colision)
+        self.sumar_puntuacion(ids, TABLA_PUNTUACION[accion, bits])
+        self.registrar_experiencias(ids, orient, bits, accion, entorno.iteracion)
+        
+        lados = entorno.rng_robots.enteros(4, int(rota.sum()))
+        if lado_preferido is not None:
+            lados = np.where(lado_preferido[rota] >= 0, lado_preferido[rota], lados)
+        self.orientacion[ids[rota]] = self._rotacion[orient[rota], lados]
+        if campo is not None:
+            campo.quitar_fuentes(adelante[exito])
+        
+        self.creencias.escribir(ids[exito], adelante[exito], VISITADA)
+        self.creencias.escribir(ids[colision], adelante[colision], ZONA_VACIA)
+        if campo is not None:
+            campo.bloquear(adelante[colision])
+        
+        vacuumator = accion == VACUUMATOR
+        if vacuumator.any():
+            self._vacuumator(ids[vacuumator])
+    
+    def registrar_experiencias(self, ids: np.ndarray, orient: np.ndarray, bits: np.ndarray,
+                               accion: np.ndarray, iteracion: int):
+        """Reglas aprendidas, historial, métricas y ventanas de bucles de una iteración (ids distintos)"""
+        self.reglas.actualizar(ids, bits, accion, TABLA_EFECTIVIDAD[accion, bits])
+        self.historial.registrar(ids, orient, bits, accion, iteracion)
+        self.metricas.registrar(ids, accion, bits)
+        for detector in self.bucles.values():
+            detector.registrar(ids, accion)
+    
+    def _vacuumator(self, ids: np.ndarray):
+        """Cada robot destruye un monstruo de su celda (por orden de id) y se autodestruye (los -1000 ya están en TABLA_PUNTUACION)"""
+        motor_monstruos = self.entorno.motor_monstruos
+        celdas = self.celda[ids]
+        candidatos = np.flatnonzero(motor_monstruos.vivo & np.isin(motor_monstruos.celda, celdas))
+        victimas = emparejar_victimas(celdas, ids, motor_monstruos.celda[candidatos], candidatos)
+        
+        for id, celda, victima in zip(ids.tolist(), celdas.tolist(), victimas.tolist()):
+            if victima >= 0:
+                motor_monstruos.fijar_vivo(victima, False)
+                self.monstruos_destruidos[id] += 1
+                self.monstruos_destruidos_total += 1
+                self.sumar_puntuacion(id, 1000)
+                print(f"  🎯 Robot-{id} destruyó Monstruo-{victima} en {self.entorno.posicion_de(celda)}")
+            self.fijar_vivo(id, False)
+            print(f"  💀 Robot-{id} se autodestruyó")
+    
+    def racionalidad(self, ids=None) -> np.ndarray:
+        """
+        Medida de racionalidad (0-1) por robot, para toda la flota a la vez.
+        Basada en efectividad, eficiencia y adaptabilidad (0 sin acciones)
+        """
+        total = self.historial.total if ids is None else self.historial.total[ids]
+        movimientos_exitosos, colisiones, acciones_caza, comunicaciones = self.metricas.conteos(ids).T
+        total_acciones = np.maximum(total, 1)
+        
+        # Factor 1: Efectividad general (30%)
+        efectividad = movimientos_exitosos / np.maximum(movimientos_exitosos + colisiones, 1)
+        
+        # Factor 2: Eficiencia en caza (25%)
+        eficiencia_caza = np.minimum(acciones_caza / total_acciones, 1.0)
+        
+        # Factor 3: Adaptabilidad (25%): reglas aprendidas y su confianza media
+        adaptabilidad = self.reglas.adaptabilidad(ids)
+        
+        # Factor 4: Comunicación (20%)
+        eficiencia_comunicacion = np.minimum(comunicaciones / total_acciones, 1.0)
+        
+        # Puntuación final ponderada
+        racionalidad = (0.30 * efectividad + 
+                        0.25 * eficiencia_caza + 
+                        0.25 * adaptabilidad + 
+                        0.20 * eficiencia_comunicacion)
+        
+        return np.where(total > 0, np.clip(racionalidad, 0.0, 1.0), 0.0)
+
+
 class AgenteRobot:
     """
     Agente con memoria interna (basado en modelo)
     - Mantiene creencias sobre el mundo
     - Usa historial percepción-acción
     - Aplica reglas jerárquicas
+    - Vista sobre su fila en MotorRobots (el estado vive en arrays)
     """
     
-    def __init__(self, id: int, posicion: Posicion, orientacion: Orientacion, entorno: 'EntornoHexaedrico'):
+    def __init__(self, id: int, motor: MotorRobots):
         self.id = id
-        self.posicion = posicion
-        self.orientacion = orientacion
-        self.entorno = entorno
-        self.vivo = True
+        self.motor = motor
+        self.entorno = motor.entorno
         
-        # Memoria interna
-        self.memoria = MemoriaRobot()
-        self.memoria.posicion_relativa = Posicion(0, 0, 0)
-        self.memoria.ultima_posicion = posicion
+        # Lado de ROTAR_90 elegido por la estrategia (-1: al azar)
+        self._lado_preferido = -1
         
-        # Métricas de rendimiento
-        self.puntuacion = 0
-        self.monstruos_destruidos = 0
-        self.movimientos = 0
-        self.colisiones = 0
+        # Memoria interna
+        self._memoria = MemoriaRobot()
+        self._memoria.mapa_creencias = MapaCreencias(motor.creencias, id, self.entorno)
+        self._memoria.zonas_vacias_conocidas = ZonasVaciasConocidas(motor.creencias, id, self.entorno)
+        self._memoria.reglas_aprendidas = ReglasAprendidas(motor.reglas, id)
+        self._memoria.percepciones_acciones = HistorialPercepcionAccion(flota=motor.historial, id=id)
+        self._memoria.metricas_racionalidad = MetricasRacionalidad(motor.metricas, id)
+    
+    @property
+    def memoria(self) -> MemoriaRobot:
+        """Memoria al día; la posición relativa y la última posición se leen del motor"""
+        memoria = self._memoria
+        memoria.posicion_relativa = Posicion(*self.motor.relativa[self.id].tolist())
+        memoria.ultima_posicion = self.entorno.posicion_de(int(self.motor.ultima_celda[self.id]))
+        return memoria
+    
+    @property
+    def _celda(self) -> int:
+        """Índice lineal acolchado de la celda actual"""
+        return int(self.motor.celda[self.id])
+    
+    @property
+    def posicion(self) -> Posicion:
+        return self.entorno.posicion_de(self._celda)
+    
+    @posicion.setter
+    def posicion(self, nueva: Posicion):
+        self.motor.mover(self.id, self.entorno.celda_de(nueva))
+    
+    @property
+    def _codigo_orientacion(self) -> int:
+        return int(self.motor.orientacion[self.id])
+    
+    @property
+    def _celda_adelante(self) -> int:
+        """Índice lineal acolchado de la celda de delante"""
+        return self._celda + self.motor.adelante_por_codigo[self._codigo_orientacion]
+    
+    @property
+    def orientacion(self) -> Orientacion:
+        return ORIENTACIONES[self.motor.orientacion[self.id]]
+    
+    @orientacion.setter
+    def orientacion(self, valor: Orientacion):
+        self.motor.orientacion[self.id] = CODIGO_ORIENTACION[valor]
+    
+    @property
+    def vivo(self) -> bool:
+        return bool(self.motor.vivo[self.id])
+    
+    @vivo.setter
+    def vivo(self, valor: bool):
+        self.motor.fijar_vivo(self.id, valor)
+    
+    @property
+    def puntuacion(self) -> int:
+        return int(self.motor.puntuacion[self.id])
+    
+    @puntuacion.setter
+    def puntuacion(self, valor: int):
+        self.motor.sumar_puntuacion(self.id, valor - self.puntuacion)
+    
+    @property
+    def monstruos_destruidos(self) -> int:
+        return int(self.motor.monstruos_destruidos[self.id])
+    
+    @monstruos_destruidos.setter
+    def monstruos_destruidos(self, valor: int):
+        self.motor.monstruos_destruidos_total += valor - self.monstruos_destruidos
+        self.motor.monstruos_destruidos[self.id] = valor
+    
+    @property
+    def movimientos(self) -> int:
+        return int(self.motor.movimientos[self.id])
+    
+    @movimientos.setter
+    def movimientos(self, valor: int):
+        self.motor.movimientos[self.id] = valor
+    
+    @property
+    def colisiones(self) -> int:
+        return int(self.motor.colisiones[self.id])
+    
+    @colisiones.setter
+    def colisiones(self, valor: int):
+        self.motor.colisiones[self.id] = valor
     
     def percibir(self) -> Percepcion:
         """
         Obtiene percepciones del entorno usando sensores
         """
+        return Percepcion.desde_bits(self._codigo_orientacion, self._percibir_bits(), self.entorno.iteracion)
+    
+    def _percibir_bits(self) -> int:
+        """Sensores como máscara de bits (el Vacuscopio se activa al actuar, si choca)"""
+        entorno = self.entorno
+        monstruos = entorno.ocupacion_monstruos
+        celda = self._celda
+        bits = 0
+        
         # Giroscopio: orientación actual
-        orientacion_actual = self.orientacion
+        codigo = self._codigo_orientacion
         
         # Energómetro Espectral: monstruo en mi celda
-        monstruo_en_celda = self.entorno.hay_monstruo_en(self.posicion)
-        
-        # Monstroscopio: monstruo en 5 lados (sin parte posterior)
-        monstruo_cercano = False
-        pos_adelante = self._calcular_posicion_adelante()
-        vecinos = self.entorno.obtener_vecinos(self.posicion)
-        
-        # Excluir la parte posterior
-        pos_atras = self._calcular_posicion_atras()
-        vecinos_visibles = [v for v in vecinos if v != pos_atras]
-        
-        for vecino in vecinos_visibles:
-            if self.entorno.es_posicion_valida(vecino) and self.entorno.hay_monstruo_en(vecino):
-                monstruo_cercano = True
+        if monstruos.hay_agente_en(celda):
+            bits |= BIT_MONSTRUO_EN_CELDA
+        
+        # Monstroscopio: monstruo en 5 lados (tabla de vecinos visibles, sin parte posterior)
+        for d in self.motor.visibles_por_codigo[codigo]:
+            vecino = celda + d
+            if entorno.libre[vecino] and monstruos.hay_agente_en(vecino):
+                bits |= BIT_MONSTRUO_CERCANO
                 break
         
         # Roboscanner: robot delante
-        robot_delante = (self.entorno.es_posicion_valida(pos_adelante) and 
-                        self.entorno.hay_robot_en(pos_adelante))
+        celda_adelante = celda + self.motor.adelante_por_codigo[codigo]
+        if entorno.libre[celda_adelante] and entorno.ocupacion_robots.hay_agente_en(celda_adelante):
+            bits |= BIT_ROBOT_DELANTE
         
-        # Vacuscopio: se activa cuando choca (lo detectaremos en la acción)
-        colision_zona_vacia = False
-        
-        return Percepcion(
-            orientacion=orientacion_actual,
-            monstruo_cercano=monstruo_cercano,
-            colision_zona_vacia=colision_zona_vacia,
-            monstruo_en_celda=monstruo_en_celda,
-            robot_delante=robot_delante,
-            iteracion=self.entorno.iteracion
-        )
+        return bits
     
     def decidir_accion(self, percepcion: Percepcion) -> str:
         """
-        Lógica de decisión con reglas jerárquicas
-        
-        JERARQUÍA DE REGLAS:
-        1. Si monstruo en celda → VACUUMATOR (destruir)
-        2. Si robot delante → COMUNICAR_EVADIR (protocolo coordinado)
-        3. Si monstruo cercano → EXPLORAR_MONSTRUO (caza)
-        4. Si memoria indica zona peligrosa → EVITAR
-        5. Si no → EXPLORAR (búsqueda sistemática)
+        Decisión con la jerarquía de reglas compilada (motor.tabla_decision)
+        
+        La percepción, lo que el robot cree de la celda de delante (visitada o
+        zona vacía conocida), si esa celda es libre y si tiene el id menor
+        frente al robot de delante forman la clave de decision.clave_decision;
+        la acción es la entrada de la tabla para esa clave (ver
+        reglas_jerarquicas). Con la estrategia 'gradiente', la exploración
+        sigue el campo de distancias cuando este da una dirección
         """
-        
-        # REGLA 1: Destruir monstruo (PRIORIDAD MÁXIMA)
-        if percepcion.monstruo_en_celda:
-            return "VACUUMATOR"
-        
-        # REGLA 2: Protocolo de evasión con otro robot
-        if percepcion.robot_delante:
-            return self._protocolo_comunicacion_robot()
-        
-        # REGLA 3: Caza de monstruo cercano
-        if percepcion.monstruo_cercano:
-            # Explorar las 5 direcciones visibles
-            return self._estrategia_caza()
-        
-        # REGLA 4: Exploración sistemática
-        return self._estrategia_exploracion()
+        return ACCIONES[self._decidir(bits_percepcion(percepcion))]
     
-    def _protocolo_comunicacion_robot(self) -> str:
-        """
-        Protocolo de comunicación robot-robot según especificaciones del examen:
-        - Ambos rotan 90° O
-        - Uno continúa de frente y el otro rota 90° a algún lado
-        """
-        # Obtener robot delante
-        pos_adelante = self._calcular_posicion_adelante()
-        robot_delante = None
-        for robot in self.entorno.robots:
-            if robot.vivo and robot.posicion == pos_adelante and robot.id != self.id:
-                robot_delante = robot
-                break
-        
-        if not robot_delante:
-            return "ROTAR_90"  # Fallback
-        
-        # Protocolo basado en ID para consistencia
-        if self.id < robot_delante.id:
-            # Robot con ID menor: continúa de frente
-            return "MOVER_ADELANTE"
-        else:
-            # Robot con ID mayor: rota 90°
-            return "ROTAR_90"
+    def _decidir(self, bits: int) -> int:
+        """Decisión con la tabla compilada del motor a partir de los bits de percepción (código de acción)"""
+        self._lado_preferido = -1
+        
+        # REGLA 4 guiada por el campo de distancias (si lo hay) cuando no
+        # hay monstruo en la celda, robot delante ni monstruo cercano
+        if not bits & (BIT_MONSTRUO_EN_CELDA | BIT_ROBOT_DELANTE | BIT_MONSTRUO_CERCANO) and \
+                self.entorno.campo_exploracion is not None:
+            accion = self._estrategia_gradiente()
+            if accion is not None:
+                return accion
+        return self.motor.tabla_decision.resolver_uno(self._clave_decision(bits), self.entorno.rng_robots)
     
-    def _estrategia_caza(self) -> str:
-        """Estrategia cuando hay monstruo cercano"""
-        # Intentar moverse hacia direcciones no exploradas
-        pos_adelante = self._calcular_posicion_adelante()
-        
-        if pos_adelante not in self.memoria.zonas_vacias_conocidas:
-            if self.entorno.es_posicion_valida(pos_adelante):
-                return "MOVER_ADELANTE"
-        
-        # Si adelante no es viable, rotar para explorar
-        return "ROTAR_90"
+    def _clave_decision(self, bits: int) -> int:
+        """Clave de decisión: percepción, creencia y validez de la celda de delante y comparación de ids"""
+        celda_adelante = self._celda_adelante
+        creencia = self.motor.creencias.codigo(self.id, celda_adelante)
+        id_menor = False
+        if bits & BIT_ROBOT_DELANTE:
+            # Protocolo basado en ID para consistencia
+            ids_delante = [i for i in self.entorno.ocupacion_robots.ocupantes(celda_adelante) if i != self.id]
+            id_menor = bool(ids_delante) and self.id < min(ids_delante)
+        return clave_decision(bool(bits & BIT_MONSTRUO_CERCANO), bool(bits & BIT_ROBOT_DELANTE),
+                              bool(bits & BIT_MONSTRUO_EN_CELDA), creencia == ZONA_VACIA, creencia == VISITADA,
+                              bool(self.entorno.libre[celda_adelante]), id_menor)
     
-    def _estrategia_exploracion(self) -> str:
-        """Estrategia de exploración cuando no hay monstruos cerca"""
-        pos_adelante = self._calcular_posicion_adelante()
-        
-        # Evitar zonas vacías conocidas
-        if pos_adelante in self.memoria.zonas_vacias_conocidas:
-            return "ROTAR_90"
-        
-        # Preferir moverse a zonas no visitadas
-        if pos_adelante not in self.memoria.mapa_creencias:
-            return "MOVER_ADELANTE"
-        
-        # Si ya visitamos esa celda, explorar otra dirección
-        if random.random() < 0.3:
-            return "ROTAR_90"
-        
-        return "MOVER_ADELANTE"
+    def _estrategia_gradiente(self):
+        """Avanza o gira hacia la zona no visitada (ni sabida vacía) más cercana (None si el campo no da dirección)"""
+        motor = self.motor
+        celda = np.array([self._celda])
+        orient = motor.orientacion[self.id:self.id + 1]
+        direccion = self.entorno.campo_exploracion.direccion_descendente(celda, motor._direccion[orient])
+        if direccion[0] < 0:
+            return None
+        accion, lado = acciones_gradiente(direccion, orient, motor._direccion, motor._lado_hacia)
+        self._lado_preferido = int(lado[0])
+        return int(accion[0])
     
     def ejecutar_accion(self, accion: str, percepcion: Percepcion):
         """Ejecuta la acción decidida y actualiza el mundo"""
-        
-        if accion == "VACUUMATOR":
+        bits = self._ejecutar(CODIGO_ACCION[accion], bits_percepcion(percepcion))
+        percepcion.colision_zona_vacia = bool(bits & BIT_COLISION)
+    
+    def _ejecutar(self, accion: int, bits: int) -> int:
+        """
+        Aplica una acción (código) y su variación de puntuación de TABLA_PUNTUACION;
+        retorna los bits de percepción con el del Vacuscopio si hubo colisión
+        """
+        if accion == VACUUMATOR:
             # Destruir monstruo y autodestruirse
-            for monstruo in self.entorno.monstruos:
-                if monstruo.posicion == self.posicion and monstruo.vivo:
-                    monstruo.vivo = False
-                    self.monstruos_destruidos += 1
-                    self.puntuacion += 1000
-                    print(f"  🎯 Robot-{self.id} destruyó Monstruo-{monstruo.id} en {self.posicion}")
-                    break
+            ids_victimas = self.entorno.ocupacion_monstruos.ocupantes(self._celda)
+            if ids_victimas:
+                monstruo = self.entorno.monstruos[min(ids_victimas)]
+                monstruo.vivo = False
+                self.monstruos_destruidos += 1
+                self.motor.sumar_puntuacion(self.id, 1000)
+                print(f"  🎯 Robot-{self.id} destruyó Monstruo-{monstruo.id} en {self.posicion}")
             
             # El robot también se destruye
             self.vivo = False
-            self.puntuacion -= 1000
             print(f"  💀 Robot-{self.id} se autodestruyó")
         
-        elif accion == "MOVER_ADELANTE":
-            pos_adelante = self._calcular_posicion_adelante()
+        elif accion == MOVER_ADELANTE:
+            celda_adelante = self._celda_adelante
             
-            if self.entorno.es_posicion_valida(pos_adelante):
-                # Actualizar posición relativa en memoria
-                dx, dy, dz = self.orientacion.value
-                self.memoria.posicion_relativa.x += dx
-                self.memoria.posicion_relativa.y += dy
-                self.memoria.posicion_relativa.z += dz
-                
-                self.memoria.ultima_posicion = self.posicion
-                self.posicion = pos_adelante
-                self.movimientos += 1
-                self.puntuacion -= 10
-                
-                # Actualizar creencias: marcar como visitado
-                self.memoria.mapa_creencias[pos_adelante] = "visitado"
+            if self.entorno.libre[celda_adelante]:
+                self.motor.avanzar(self.id, celda_adelante)
+                self.motor.movimientos[self.id] += 1
+                self.motor.creencias.anotar(self.id, celda_adelante, VISITADA)
+                if self.entorno.campo_exploracion is not None:
+                    self.entorno.campo_exploracion.quitar_fuentes([celda_adelante])
             else:
                 # Colisión con Zona Vacía (Vacuscopio activado)
-                self.memoria.zonas_vacias_conocidas.add(pos_adelante)
-                self.memoria.mapa_creencias[pos_adelante] = "zona_vacia"
-                self.colisiones += 1
-                self.puntuacion -= 50
-                percepcion.colision_zona_vacia = True
+                self._anotar_zona_vacia(celda_adelante)
+                self.motor.colisiones[self.id] += 1
+                bits |= BIT_COLISION
         
-        elif accion == "ROTAR_90":
+        elif accion == ROTAR_90:
             # Rotar a uno de los 4 lados
-            lado = random.randint(0, 3)
-            self.orientacion = self.orientacion.rotar_90(lado)
-            self.puntuacion -= 10
-        
-        elif accion == "ESPERAR":
-            pass  # No hacer nada esta iteración
+            lado = self.entorno.rng_robots.randint(0, 3)
+            if self._lado_preferido >= 0:
+                lado = self._lado_preferido
+            self.motor.orientacion[self.id] = TABLA_ROTACION[self._codigo_orientacion][lado]
+        
+        # ESPERAR: no hacer nada esta iteración
+        self.motor.sumar_puntuacion(self.id, _PUNTUACION[accion][bits])
+        return bits
     
     def actualizar_memoria(self, percepcion: Percepcion, accion: str):
         """Actualiza la memoria interna del agente"""
-        # Registrar percepción-acción
-        self.memoria.percepciones_acciones.append((percepcion, accion))
-        
-        # Actualizar creencias sobre zonas vacías
-        if percepcion.colision_zona_vacia:
-            pos_adelante = self._calcular_posicion_adelante()
-            self.memoria.zonas_vacias_conocidas.add(pos_adelante)
+        self._actualizar_memoria(percepcion.iteracion, CODIGO_ORIENTACION[percepcion.orientacion],
+                                 bits_percepcion(percepcion), CODIGO_ACCION[accion])
+    
+    def _actualizar_memoria(self, iteracion: int, orientacion: int, bits: int, accion: int):
+        self._registrar(iteracion, orientacion, bits, accion)
         
         # Aprender nuevas reglas basadas en experiencias
-        self._aprender_reglas(percepcion, accion)
+        self._aprender_reglas(bits, accion)
+        
+        for detector in self.motor.bucles.values():
+            detector.registrar_uno(self.id, accion)
+    
+    def _registrar(self, iteracion: int, orientacion: int, bits: int, accion: int):
+        # Registrar percepción-acción (códigos empaquetados en el historial de la flota);
+        # la zona vacía de una colisión ya la anota _ejecutar
+        self.motor.historial.registrar_uno(self.id, orientacion, bits, accion, iteracion)
         
         # Actualizar métricas de racionalidad
-        self._actualizar_metricas_racionalidad(percepcion, accion)
+        self._actualizar_metricas_racionalidad(bits, accion)
+    
+    def _anotar_zona_vacia(self, celda: int):
+        self.motor.creencias.anotar(self.id, celda, ZONA_VACIA)
+        if self.entorno.campo_exploracion is not None:
+            self.entorno.campo_exploracion.bloquear([celda])
     
     def ejecutar_ciclo(self):
-        """Ciclo percepción-decisión-acción-aprendizaje"""
+        """Ciclo percepción-decisión-acción-aprendizaje (sobre códigos enteros)"""
         if not self.vivo:
             return
         
         # 1. Percibir
-        percepcion = self.percibir()
+        orientacion = self._codigo_orientacion
+        bits = self._percibir_bits()
         
         # 2. Decidir
-        accion = self.decidir_accion(percepcion)
+        accion = self._decidir(bits)
         
         # 3. Actuar
-        self.ejecutar_accion(accion, percepcion)
+        bits = self._ejecutar(accion, bits)
         
         # 4. Aprender (actualizar memoria)
-        self.actualizar_memoria(percepcion, accion)
-    
-    def _calcular_posicion_adelante(self) -> Posicion:
-        """Calcula la posición adelante según orientación"""
-        dx, dy, dz = self.orientacion.value
-        return Posicion(self.posicion.x + dx, self.posicion.y + dy, self.posicion.z + dz)
-    
-    def _calcular_posicion_atras(self) -> Posicion:
-        """Calcula la posición atrás (opuesta a orientación)"""
-        dx, dy, dz = self.orientacion.value
-        return Posicion(self.posicion.x - dx, self.posicion.y - dy, self.posicion.z - dz)
+        self._actualizar_memoria(self.entorno.iteracion, orientacion, bits, accion)
     
-    def _aprender_reglas(self, percepcion: Percepcion, accion: str):
+    def _aprender_reglas(self, bits: int, accion: int):
         """Aprende nuevas reglas basadas en experiencias exitosas"""
-        # Crear clave de regla basada en percepción
-        clave_regla = f"{percepcion.monstruo_cercano}_{percepcion.robot_delante}_{percepcion.monstruo_en_celda}_{percepcion.colision_zona_vacia}"
-        
-        # Evaluar efectividad de la acción
-        efectividad = self._evaluar_efectividad_accion(percepcion, accion)
-        
-        # Actualizar confianza en la regla
-        if clave_regla in self.memoria.reglas_aprendidas:
-            # Promedio ponderado con factor de olvido
-            confianza_actual = self.memoria.reglas_aprendidas[clave_regla]
-            self.memoria.reglas_aprendidas[clave_regla] = 0.9 * confianza_actual + 0.1 * efectividad
-        else:
-            self.memoria.reglas_aprendidas[clave_regla] = efectividad
+        # Confianza en la regla (percepción, acción) según la efectividad de la acción
+        self.motor.reglas.actualizar_uno(self.id, bits, accion, _EFECTIVIDAD[accion][bits])
     
     def _evaluar_efectividad_accion(self, percepcion: Percepcion, accion: str) -> float:
-        """Evalúa la efectividad de una acción (0-1)"""
-        if accion == "VACUUMATOR" and percepcion.monstruo_en_celda:
-            return 1.0  # Acción perfecta
-        elif accion == "MOVER_ADELANTE" and not percepcion.colision_zona_vacia:
-            return 0.8  # Movimiento exitoso
-        elif accion == "ROTAR_90" and percepcion.robot_delante:
-            return 0.7  # Evasión exitosa
-        elif accion == "MOVER_ADELANTE" and percepcion.colision_zona_vacia:
-            return 0.1  # Colisión
-        else:
-            return 0.5  # Neutral
-    
-    def _actualizar_metricas_racionalidad(self, percepcion: Percepcion, accion: str):
-        """Actualiza métricas de racionalidad del agente"""
-        # Eficiencia de movimiento
-        if accion == "MOVER_ADELANTE":
-            if not percepcion.colision_zona_vacia:
-                self.memoria.metricas_racionalidad['movimientos_exitosos'] = \
-                    self.memoria.metricas_racionalidad.get('movimientos_exitosos', 0) + 1
-            else:
-                self.memoria.metricas_racionalidad['colisiones'] = \
-                    self.memoria.metricas_racionalidad.get('colisiones', 0) + 1
-        
-        # Efectividad en caza
-        if percepcion.monstruo_cercano and accion in ["MOVER_ADELANTE", "ROTAR_90"]:
-            self.memoria.metricas_racionalidad['acciones_caza'] = \
-                self.memoria.metricas_racionalidad.get('acciones_caza', 0) + 1
-        
-        # Comunicación efectiva
-        if percepcion.robot_delante and accion in ["MOVER_ADELANTE", "ROTAR_90"]:
-            self.memoria.metricas_racionalidad['comunicaciones_exitosas'] = \
-                self.memoria.metricas_racionalidad.get('comunicaciones_exitosas', 0) + 1
+        """Evalúa la efectividad de una acción (0-1) según TABLA_EFECTIVIDAD"""
+        return _EFECTIVIDAD[CODIGO_ACCION[accion]][bits_percepcion(percepcion)]
+    
+    def _actualizar_metricas_racionalidad(self, bits: int, accion: int):
+        """Actualiza métricas de racionalidad del agente (eficiencia de movimiento, caza y comunicación)"""
+        self.motor.metricas.registrar_uno(self.id, accion, bits)
     
     def calcular_racionalidad(self) -> float:
         """
         Calcula medida de racionalidad del agente (0-1)
         Basado en efectividad, eficiencia y adaptabilidad
         """
-        total_acciones = len(self.memoria.percepciones_acciones)
-        if total_acciones == 0:
-            return 0.0
-        
-        # Factor 1: Efectividad general (30%)
-        movimientos_exitosos = self.memoria.metricas_racionalidad.get('movimientos_exitosos', 0)
-        colisiones = self.memoria.metricas_racionalidad.get('colisiones', 0)
-        total_movimientos = movimientos_exitosos + colisiones
-        efectividad = movimientos_exitosos / max(total_movimientos, 1)
-        
-        # Factor 2: Eficiencia en caza (25%)
-        acciones_caza = self.memoria.metricas_racionalidad.get('acciones_caza', 0)
-        eficiencia_caza = min(acciones_caza / max(total_acciones, 1), 1.0)
-        
-        # Factor 3: Adaptabilidad (25%)
-        reglas_aprendidas = len(self.memoria.reglas_aprendidas)
-        confianza_promedio = sum(self.memoria.reglas_aprendidas.values()) / max(reglas_aprendidas, 1)
-        adaptabilidad = min(reglas_aprendidas / 10.0, 1.0) * confianza_promedio
-        
-        # Factor 4: Comunicación (20%)
-        comunicaciones = self.memoria.metricas_racionalidad.get('comunicaciones_exitosas', 0)
-        eficiencia_comunicacion = min(comunicaciones / max(total_acciones, 1), 1.0)
-        
-        # Puntuación final ponderada
-        racionalidad = (0.30 * efectividad + 
-                       0.25 * eficiencia_caza + 
-                       0.25 * adaptabilidad + 
-                       0.20 * eficiencia_comunicacion)
-        
-        return min(max(racionalidad, 0.0), 1.0)
+        return float(self.motor.racionalidad([self.id])[0])
     
     def detectar_bucle_infinito(self, ventana: int = 10) -> bool:
         """
         Detecta si el agente está en un bucle infinito
         Analiza patrones repetitivos en las últimas acciones
         """
-        if len(self.memoria.percepciones_acciones) < ventana * 2:
-            return False
+        detector = self.detector_bucles(ventana)
+        if detector is not None:
+            # Trigramas de la ventana mantenidos por el motor al registrar cada acción
+            return bool(detector.en_bucle([self.id])[0])
         
-        # Obtener últimas acciones
-        ultimas_acciones = [accion for _, accion in self.memoria.percepciones_acciones[-ventana:]]
+        historial = self.memoria.percepciones_acciones
+        if historial.total < ventana * 2:
+            return False
         
-        # Detectar patrones repetitivos
-        patrones = {}
-        for i in range(len(ultimas_acciones) - 2):
-            patron = tuple(ultimas_acciones[i:i+3])
-            patrones[patron] = patrones.get(patron, 0) + 1
+        # Detectar patrones repetitivos (trigramas de códigos de las últimas acciones)
+        patrones = contar_trigramas(historial.ultimas_acciones(ventana))
         
         # Si hay un patrón que se repite más de 2 veces, es un bucle
-        max_repeticiones = max(patrones.values()) if patrones else 0
+        max_repeticiones = patrones.max() if len(patrones) else 0
         return max_repeticiones >= 3
+    
+    def detector_bucles(self, ventana: int):
+        """
+        DetectorBucles del motor para la ventana (None si no se mantiene),
+        alineado con el historial del robot
+        """
+        detector = self.motor.bucles.get(ventana)
+        if detector is None:
+            return None
+        historial = self.memoria.percepciones_acciones
+        if detector.registradas(self.id) != historial.total:
+            # Historial escrito por fuera del ciclo (append directo)
+            detector.reconstruir(self.id, historial.ultimas_acciones(ventana), historial.total)
+        return detector
@@ -19,13 +19,22 @@ class Simulador:
     def __init__(self, entorno: 'EntornoHexaedrico'):
         self.entorno = entorno
         self.historial_estadisticas = []
+        self.resultado = None
     
-    def ejecutar(self, max_iteraciones: int = 100, verbose: bool = True):
-        """Ejecuta la simulación"""
+    def ejecutar(self, max_iteraciones: int = 100, verbose: bool = True, terminar_si_imposible: bool = False):
+        """
+        Ejecuta la simulación. Con terminar_si_imposible (solo almacenamiento
+        'denso') etiqueta las componentes conexas de zona libre y se detiene en
+        cuanto ningún robot vivo comparte componente con un monstruo vivo; como
+        los agentes no salen de su componente, se comprueba al empezar y tras
+        cada tick en que muere algún agente.
+        """
+        vivos_comprobados = None
         print(f"\n{'='*60}")
         print(f"INICIANDO SIMULACIÓN - Máximo {max_iteraciones} iteraciones")
         print(f"{'='*60}\n")
         
+        self.resultado = 'tiempo_agotado'
         for i in range(max_iteraciones):
             # Condición de parada: todos los monstruos destruidos o robots muertos
             stats = self.entorno.estadisticas()
@@ -39,32 +48,53 @@ class Simulador:
             
             if stats['monstruos_vivos'] == 0:
                 print(f"\n🎉 ¡MISIÓN CUMPLIDA! Todos los monstruos destruidos en {stats['iteracion']} iteraciones")
+                self.resultado = 'mision_cumplida'
                 break
             
             if stats['robots_vivos'] == 0:
                 print(f"\n💀 MISIÓN FALLIDA: Todos los robots destruidos. Quedan {stats['monstruos_vivos']} monstruos")
+                self.resultado = 'mision_fallida'
                 break
             
+            # La alcanzabilidad solo cambia cuando muere algún agente
+            vivos = (stats['robots_vivos'], stats['monstruos_vivos'])
+            if terminar_si_imposible and vivos != vivos_comprobados:
+                vivos_comprobados = vivos
+                if not self.entorno.mision_posible():
+                    print(f"\n🚧 MISIÓN IMPOSIBLE: Ningún robot puede alcanzar a los {stats['monstruos_vivos']} "
+                          f"monstruos restantes (iteración {stats['iteracion']})")
+                    self.resultado = 'mision_imposible'
+                    break
+            
             # Actualizar entorno
             self.entorno.actualizar()
         
         return self.generar_reporte()
     
+    def checkpoint(self, ruta: str):
+        """Guarda el estado completo (mundo, agentes, memorias, RNG e historial) en `ruta`"""
+        from .persistencia import guardar_checkpoint
+        guardar_checkpoint(self, ruta)
+    
+    @classmethod
+    def restore(cls, ruta: str) -> 'Simulador':
+        """Reanuda una simulación desde un punto de control: continúa de forma idéntica"""
+        from .persistencia import cargar_checkpoint
+        return cargar_checkpoint(ruta)
+    
     def generar_reporte(self) -> Dict:
         """Genera reporte final con métricas"""
         stats_final = self.entorno.estadisticas()
         
-        # Calcular métricas de racionalidad
-        racionalidad_robots = []
-        bucles_detectados = 0
+        # Calcular métricas de racionalidad (para toda la flota a la vez)
+        vivos = self.entorno.robots_vivos()
+        racionalidad_robots = self.entorno.motor_robots.racionalidad(self.entorno.motor_robots.ids_vivos()).tolist()
+        en_bucle_por_robot = {}
+        
+        for robot in vivos:
+            en_bucle_por_robot[robot.id] = robot.detectar_bucle_infinito()
         
-        for robot in self.entorno.robots:
-            if robot.vivo:
-                racionalidad = robot.calcular_racionalidad()
-                racionalidad_robots.append(racionalidad)
-                
-                if robot.detectar_bucle_infinito():
-                    bucles_detectados += 1
+        bucles_detectados = sum(en_bucle_por_robot.values())
         
         racionalidad_promedio = sum(racionalidad_robots) / max(len(racionalidad_robots), 1)
         
@@ -77,7 +107,9 @@ class Simulador:
             'eficiencia': stats_final['monstruos_destruidos'] / max(stats_final['iteracion'], 1),
             'racionalidad_promedio': racionalidad_promedio,
             'bucles_infinitos_detectados': bucles_detectados,
-            'es_episodico': bucles_detectados == 0
+            'es_episodico': bucles_detectados == 0,
+            'resultado': self.resultado,
+            **self.entorno.estadisticas_componentes()
         }
         
         print(f"\n{'='*60}")
@@ -93,13 +125,11 @@ class Simulador:
         # Reporte detallado de racionalidad por robot
         print("ANÁLISIS DE RACIONALIDAD POR ROBOT:")
         print("-" * 50)
-        for i, robot in enumerate(self.entorno.robots):
-            if robot.vivo:
-                racionalidad = robot.calcular_racionalidad()
-                en_bucle = robot.detectar_bucle_infinito()
-                reglas_aprendidas = len(robot.memoria.reglas_aprendidas)
-                print(f"Robot-{robot.id}: Racionalidad={racionalidad:.3f}, "
-                      f"Reglas={reglas_aprendidas}, Bucle={'Sí' if en_bucle else 'No'}")
+        for robot, racionalidad in zip(vivos, racionalidad_robots):
+            en_bucle = en_bucle_por_robot[robot.id]
+            reglas_aprendidas = len(robot.memoria.reglas_aprendidas)
+            print(f"Robot-{robot.id}: Racionalidad={racionalidad:.3f}, "
+                  f"Reglas={reglas_aprendidas}, Bucle={'Sí' if en_bucle else 'No'}")
         print("-" * 50)
         
         return reporte
@@ -120,19 +150,22 @@ class Simulador:
                     visual[y, x] = [1, 1, 1]  # Blanco para libre
         
         # Agregar robots (azul)
-        for robot in self.entorno.robots:
-            if robot.vivo and robot.posicion.z == z:
-                visual[robot.posicion.y, robot.posicion.x] = [0, 0, 1]
+        for robot in self.entorno.robots_vivos():
+            pos = robot.posicion
+            if pos.z == z:
+                visual[pos.y, pos.x] = [0, 0, 1]
         
         # Agregar monstruos (rojo)
-        for monstruo in self.entorno.monstruos:
-            if monstruo.vivo and monstruo.posicion.z == z:
-                visual[monstruo.posicion.y, monstruo.posicion.x] = [1, 0, 0]
+        for monstruo in self.entorno.monstruos_vivos():
+            pos = monstruo.posicion
+            if pos.z == z:
+                visual[pos.y, pos.x] = [1, 0, 0]
         
         ax.imshow(visual)
+        stats = self.entorno.estadisticas()
         ax.set_title(f'Corte Z={z} | Iter={self.entorno.iteracion} | '
-                     f'Robots={sum(1 for r in self.entorno.robots if r.vivo)} | '
-                     f'Monstruos={sum(1 for m in self.entorno.monstruos if m.vivo)}')
+                     f'Robots={stats["robots_vivos"]} | '
+                     f'Monstruos={stats["monstruos_vivos"]}')
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
         plt.grid(True, alpha=0.3)
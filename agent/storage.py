@@ -0,0 +1,226 @@
+"""
+ALMACENAMIENTO DEL GRID 3D
+Representaciones compactas del mundo (libre/vacío) para el entorno hexaédrico
+"""
+
+import numpy as np
+
+from .ontology import TipoCelda
+from .octree import GridOctree
+
+
+ALMACENAMIENTOS = ('denso', 'bits', 'octree')
+
+
+class GridEmpaquetado:
+    """
+    Grid 3D empaquetado a 1 bit por celda
+    - Bits empaquetados a lo largo del eje Z (orden little-endian)
+    - Se indexa como un array NxNxN: grid[x, y, z], grid[:, :, z], ...
+    - Ocupa N*N*ceil(N/8) bytes
+    """
+
+    def __init__(self, N: int):
+        self.N = N
+        self.shape = (N, N, N)
+        self.ndim = 3
+        self.dtype = np.dtype(np.uint8)
+        self._bits = np.zeros((N, N, (N + 7) // 8), dtype=np.uint8)
+
+    @classmethod
+    def desde_indices(cls, N: int, indices_vacios: np.ndarray) -> 'GridEmpaquetado':
+        """
+        Construye el grid marcando como vacías las celdas dadas por índice plano.
+        Trabaja por losas de X para no materializar nunca el mundo denso.
+        """
+        grid = cls(N)
+        indices_vacios = np.asarray(indices_vacios, dtype=np.int64)
+        por_x = N * N
+        bloque = max(1, min(N, (1 << 24) // por_x))
+        
+        # Agrupar los índices por losa con un único ordenamiento estable (radix)
+        losas = (indices_vacios // (bloque * por_x)).astype(np.uint16)
+        orden = np.argsort(losas, kind='stable')
+        cortes = np.cumsum(np.bincount(losas, minlength=(N + bloque - 1) // bloque))
+        
+        inicio = 0
+        for i, fin in enumerate(cortes):
+            x0, x1 = i * bloque, min(N, (i + 1) * bloque)
+            losa = np.zeros((x1 - x0) * por_x, dtype=np.uint8)
+            losa[indices_vacios[orden[inicio:fin]] - x0 * por_x] = TipoCelda.ZONA_VACIA.value
+            grid._bits[x0:x1] = np.packbits(losa.reshape(x1 - x0, N, N), axis=-1, bitorder='little')
+            inicio = fin
+        return grid
+
+    @property
+    def size(self) -> int:
+        return self.N ** 3
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+    def _normalizar(self, clave):
+        if not isinstance(clave, tuple):
+            clave = (clave,)
+        if any(k is Ellipsis for k in clave):
+            i = clave.index(Ellipsis)
+            clave = clave[:i] + (slice(None),) * (4 - len(clave)) + clave[i + 1:]
+        return clave + (slice(None),) * (3 - len(clave))
+
+    @staticmethod
+    def _es_coordenada(k) -> bool:
+        return isinstance(k, (int, np.integer, np.ndarray, list))
+
+    def __getitem__(self, clave):
+        kx, ky, kz = self._normalizar(clave)
+        if isinstance(kz, (int, np.integer)) and isinstance(kx, (int, np.integer)) \
+                and isinstance(ky, (int, np.integer)):
+            if kz < 0:
+                kz += self.N
+            return (int(self._bits[kx, ky, kz >> 3]) >> (kz & 7)) & 1
+        if self._es_coordenada(kx) and self._es_coordenada(ky) and self._es_coordenada(kz):
+            kz = np.asarray(kz) % self.N
+            return (self._bits[kx, ky, kz >> 3] >> (kz & 7)).astype(np.uint8) & 1
+        filas = np.unpackbits(self._bits[kx, ky], axis=-1, count=self.N, bitorder='little')
+        return filas[..., kz]
+
+    def __setitem__(self, clave, valor):
+        kx, ky, kz = self._normalizar(clave)
+        filas = np.unpackbits(self._bits[kx, ky], axis=-1, count=self.N, bitorder='little')
+        filas[..., kz] = valor
+        self._bits[kx, ky] = np.packbits(filas, axis=-1, bitorder='little')
+
+    def __array__(self, dtype=None, copy=None):
+        denso = np.unpackbits(self._bits, axis=-1, count=self.N, bitorder='little')
+        return denso if dtype is None else denso.astype(dtype)
+
+    def indices_libres(self, bloque: int = 64) -> np.ndarray:
+        """Índices planos de las celdas libres, desempaquetando por bloques de X"""
+        partes = []
+        por_x = self.N * self.N
+        for x0 in range(0, self.N, bloque):
+            losa = np.unpackbits(self._bits[x0:x0 + bloque], axis=-1, count=self.N, bitorder='little')
+            partes.append(np.flatnonzero(losa == TipoCelda.ZONA_LIBRE.value) + x0 * por_x)
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.int64)
+
+
+def crear_grid(N: int, indices_vacios: np.ndarray, almacenamiento: str = 'denso'):
+    """
+    Crea el grid del mundo con el almacenamiento pedido
+    - 'denso': np.ndarray uint8 (1 byte por celda)
+    - 'bits': GridEmpaquetado (1 bit por celda)
+    - 'octree': GridOctree (memoria proporcional a la superficie de las zonas vacías)
+    """
+    if almacenamiento == 'denso':
+        grid = np.zeros((N, N, N), dtype=np.uint8)
+        grid.reshape(-1)[indices_vacios] = TipoCelda.ZONA_VACIA.value
+        return grid
+    if almacenamiento == 'bits':
+        return GridEmpaquetado.desde_indices(N, indices_vacios)
+    if almacenamiento == 'octree':
+        return GridOctree.desde_indices(N, indices_vacios)
+    raise ValueError(f"Almacenamiento desconocido: {almacenamiento!r} (opciones: {ALMACENAMIENTOS})")
+
+
+def indices_libres(grid) -> np.ndarray:
+    """Índices planos de las celdas libres del grid, sea cual sea su almacenamiento"""
+    if isinstance(grid, np.ndarray):
+        return np.flatnonzero(grid.reshape(-1) == TipoCelda.ZONA_LIBRE.value)
+    return grid.indices_libres()
+
+
+# Vecinos en el mismo orden que EntornoHexaedrico.obtener_vecinos: el bit d de
+# una máscara de movimientos indica que el vecino en DIRECCIONES[d] es libre
+DIRECCIONES = ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1))
+
+# Para cada máscara de 6 bits, las direcciones libres en orden
+DIRECCIONES_POR_MASCARA = tuple(
+    tuple(d for d in range(6) if mascara >> d & 1) for mascara in range(64)
+)
+
+# Las mismas tablas en forma de array para los motores vectorizados:
+# NUM_DIRECCIONES[m] direcciones libres, TABLA_DIRECCIONES[m, k] la k-ésima
+NUM_DIRECCIONES = np.array([len(d) for d in DIRECCIONES_POR_MASCARA], dtype=np.int64)
+TABLA_DIRECCIONES = np.array([d + (-1,) * (6 - len(d)) for d in DIRECCIONES_POR_MASCARA], dtype=np.int64)
+
+
+def desplazamientos_vecinos(N: int) -> tuple:
+    """Desplazamiento de índice lineal acolchado hacia cada uno de los 6 vecinos"""
+    L = N + 2
+    return tuple(dx * L * L + dy * L + dz for dx, dy, dz in DIRECCIONES)
+
+
+def indices_acolchados(indices_planos: np.ndarray, N: int) -> np.ndarray:
+    """Convierte índices planos de NxNxN en índices lineales acolchados de (N+2)³"""
+    x, y, z = np.unravel_index(np.asarray(indices_planos, dtype=np.int64), (N, N, N))
+    L = N + 2
+    return ((x + 1) * L + (y + 1)) * L + (z + 1)
+
+
+class _LibreAcolchado:
+    """Vista perezosa libre[celda] sobre un grid compacto, con borde de zona vacía"""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.N = grid.shape[0]
+
+    def __getitem__(self, celda):
+        L = self.N + 2
+        xy, z = np.divmod(celda, L)
+        x, y = np.divmod(xy, L)
+        if np.ndim(celda) == 0:
+            x, y, z = int(x) - 1, int(y) - 1, int(z) - 1
+            if not (0 <= x < self.N and 0 <= y < self.N and 0 <= z < self.N):
+                return False
+            return self.grid[x, y, z] == TipoCelda.ZONA_LIBRE.value
+        x, y, z = x - 1, y - 1, z - 1
+        dentro = ((x >= 0) & (x < self.N) & (y >= 0) & (y < self.N) & (z >= 0) & (z < self.N))
+        libre = np.zeros(np.shape(celda), dtype=bool)
+        libre[dentro] = self.grid[x[dentro], y[dentro], z[dentro]] == TipoCelda.ZONA_LIBRE.value
+        return libre
+
+
+class _MascarasAcolchadas:
+    """Vista perezosa mascaras[celda] calculada a partir de libre[celda + desplazamiento]"""
+
+    def __init__(self, libre, desplazamientos: tuple):
+        self.libre = libre
+        self.desplazamientos = desplazamientos
+
+    def __getitem__(self, celda):
+        if np.ndim(celda) == 0:
+            if not self.libre[celda]:
+                return 0
+            return sum(1 << d for d, o in enumerate(self.desplazamientos) if self.libre[celda + o])
+        celda = np.asarray(celda)
+        mascara = np.zeros(celda.shape, dtype=np.uint8)
+        for d, o in enumerate(self.desplazamientos):
+            mascara |= self.libre[celda + o].astype(np.uint8) << d
+        mascara[~self.libre[celda]] = 0
+        return mascara
+
+
+def construir_vecindad(grid):
+    """
+    Prepara las tablas de vecindad sobre un grid acolchado (borde de una celda
+    de zona vacía), indexadas por índice lineal en (N+2)³:
+    - libre[celda]: la celda es zona libre (el borde nunca lo es)
+    - mascaras[celda]: 6 bits con los movimientos válidos desde la celda
+    Con el grid denso son arrays precalculados; con los almacenamientos
+    compactos son vistas que calculan bajo demanda sin materializar el mundo.
+    """
+    desplazamientos = desplazamientos_vecinos(grid.shape[0])
+    if not isinstance(grid, np.ndarray):
+        libre = _LibreAcolchado(grid)
+        return libre, _MascarasAcolchadas(libre, desplazamientos)
+
+    libre = np.pad(grid == TipoCelda.ZONA_LIBRE.value, 1, constant_values=False).reshape(-1)
+    mascaras = np.zeros(libre.shape, dtype=np.uint8)
+    for d, o in enumerate(desplazamientos):
+        if o > 0:
+            mascaras[:-o] |= libre[o:].astype(np.uint8) << d
+        else:
+            mascaras[-o:] |= libre[:o].astype(np.uint8) << d
+    mascaras[~libre] = 0
+    return libre, mascaras
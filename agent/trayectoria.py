@@ -0,0 +1,415 @@
+"""
+REGISTRO DE TRAYECTORIAS
+Escritura en streaming de la simulación tick a tick y lectura con acceso aleatorio
+"""
+
+import json
+import mmap
+import struct
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .robot_agent import emparejar_victimas, ORIENTACIONES
+from .ontology import Orientacion, Posicion
+from .storage import GridEmpaquetado
+
+if TYPE_CHECKING:
+    from .environment import EntornoHexaedrico
+
+
+MAGIA = b'TRAY3D\x00\x02'
+MAGIA_INDICE = b'INDTRAY\x00'
+
+DELTA, CLAVE = b'D', b'K'
+CABECERA_REGISTRO = struct.Struct('<cI')      # tipo de registro, bytes de la carga
+ESTADISTICAS = struct.Struct('<5q')           # iteracion, robots_vivos, monstruos_vivos, destruidos, puntuacion
+CLAVES_ESTADISTICAS = ('iteracion', 'robots_vivos', 'monstruos_vivos', 'monstruos_destruidos', 'puntuacion_total')
+
+# Eventos: ROTACION (antes/despues = orientación), MUERTE de un robot y
+# DESTRUCCION de un monstruo (antes = celda, despues = robot que lo destruyó o -1),
+# SALTO de un agente que no se movió a una celda vecina (antes/despues = celda)
+# y REAPARICION de un agente muerto (antes = celda, despues = -1)
+ROTACION, MUERTE, DESTRUCCION = 0, 1, 2
+SALTO_ROBOT, SALTO_MONSTRUO, REAPARICION_ROBOT, REAPARICION_MONSTRUO = 3, 4, 5, 6
+EVENTO = np.dtype([('tipo', 'u1'), ('agente', '<i4'), ('antes', '<i8'), ('despues', '<i8')])
+
+
+def empaquetar_codigos(codigos: np.ndarray) -> bytes:
+    """Códigos de movimiento (0 = quieto, 1..6 = DIRECCIONES) a 3 bits cada uno"""
+    bits = np.unpackbits(codigos.astype(np.uint8)[:, None], axis=1)[:, 5:]
+    return np.packbits(bits.ravel()).tobytes()
+
+
+def desempaquetar_codigos(datos, n: int) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(datos, dtype=np.uint8))[:3 * n].reshape(n, 3)
+    return (bits[:, 0] << 2 | bits[:, 1] << 1 | bits[:, 2]).astype(np.uint8)
+
+
+def bytes_codigos(n: int) -> int:
+    return (3 * n + 7) // 8
+
+
+class EscritorTrayectoria:
+    """
+    Registro binario de solo adición de una simulación
+    - Un registro por tick: estadísticas, movimiento de cada agente como código
+      de dirección de 3 bits y eventos (rotaciones, destrucciones y muertes)
+    - Los cambios que no caben en un código (saltos de más de una celda,
+      agentes que reaparecen) van como eventos con el valor anterior, de modo
+      que cualquier registro se puede aplicar en ambos sentidos
+    - Cada `intervalo_clave` ticks el registro incluye además el estado completo
+      (fotograma clave) para poder saltar a cualquier tick
+    - Al cerrar se añade un índice de desplazamientos de los registros
+    - Con guardar_grid, la cabecera va seguida del grid a 1 bit por celda
+      (como GridEmpaquetado) para poder reproducir la ejecución sin el entorno
+    """
+
+    def __init__(self, ruta: str, entorno: 'EntornoHexaedrico', intervalo_clave: int = 1000,
+                 guardar_grid: bool = True):
+        self.entorno = entorno
+        self.intervalo_clave = intervalo_clave
+        self._archivo = open(ruta, 'wb')
+        self._desplazamientos: List[int] = []
+        self._previo = None
+
+        cabecera = json.dumps({
+            'N': entorno.N, 'n_robots': len(entorno.robots), 'n_monstruos': len(entorno.monstruos),
+            'intervalo_clave': intervalo_clave, 'desplazamientos': list(entorno.desplazamientos),
+            'grid': guardar_grid,
+        }).encode()
+        self._archivo.write(MAGIA + struct.pack('<I', len(cabecera)) + cabecera)
+        if guardar_grid:
+            grid = entorno.grid
+            if isinstance(grid, GridEmpaquetado):
+                self._archivo.write(grid._bits.tobytes())
+            else:
+                for x in range(entorno.N):
+                    self._archivo.write(np.packbits(np.asarray(grid[x], dtype=np.uint8), axis=-1,
+                                                    bitorder='little').tobytes())
+        self.registrar()
+
+    def _estado(self) -> tuple:
+        motor_r, motor_m = self.entorno.motor_robots, self.entorno.motor_monstruos
+        return (motor_r.celda.copy(), motor_r.orientacion.copy(), motor_r.vivo.copy(),
+                motor_m.celda.copy(), motor_m.vivo.copy())
+
+    def _codigos(self, antes: np.ndarray, despues: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Código de movimiento por agente (0 si no se movió a una celda vecina) y agentes que saltaron"""
+        delta = despues - antes
+        codigos = np.zeros(len(delta), dtype=np.uint8)
+        for k, d in enumerate(self.entorno.desplazamientos):
+            codigos[delta == d] = k + 1
+        return codigos, np.flatnonzero((delta != 0) & (codigos == 0))
+
+    def _eventos(self, previo: tuple, actual: tuple, saltos_r: np.ndarray, saltos_m: np.ndarray) -> np.ndarray:
+        celda_r, orient_r, vivo_r, celda_m, vivo_m = actual
+        rotados = np.flatnonzero(orient_r != previo[1])
+        muertos = np.flatnonzero(previo[2] & ~vivo_r)
+        destruidos = np.flatnonzero(previo[4] & ~vivo_m)
+        reaparecidos_r = np.flatnonzero(~previo[2] & vivo_r)
+        reaparecidos_m = np.flatnonzero(~previo[4] & vivo_m)
+        # Autoría de cada destrucción: el k-ésimo robot muerto de la celda (por id) con el k-ésimo monstruo
+        autores = np.full(len(destruidos), -1, dtype=np.int64)
+        if len(destruidos):
+            victimas = emparejar_victimas(celda_r[muertos], muertos, celda_m[destruidos], destruidos)
+            cazadores = victimas >= 0
+            autores[np.searchsorted(destruidos, victimas[cazadores])] = muertos[cazadores]
+
+        grupos = (rotados, muertos, destruidos, saltos_r, saltos_m, reaparecidos_r, reaparecidos_m)
+        eventos = np.empty(sum(map(len, grupos)), dtype=EVENTO)
+        eventos['tipo'] = np.repeat([ROTACION, MUERTE, DESTRUCCION, SALTO_ROBOT, SALTO_MONSTRUO,
+                                     REAPARICION_ROBOT, REAPARICION_MONSTRUO], [len(g) for g in grupos])
+        eventos['agente'] = np.concatenate(grupos)
+        eventos['antes'] = np.concatenate((previo[1][rotados], celda_r[muertos], celda_m[destruidos],
+                                           previo[0][saltos_r], previo[3][saltos_m],
+                                           celda_r[reaparecidos_r], celda_m[reaparecidos_m]))
+        eventos['despues'] = np.concatenate((orient_r[rotados], np.full(len(muertos), -1), autores,
+                                             celda_r[saltos_r], celda_m[saltos_m],
+                                             np.full(len(reaparecidos_r) + len(reaparecidos_m), -1)))
+        return eventos
+
+    def registrar(self):
+        """Añade el registro del tick actual del entorno"""
+        actual = self._estado()
+        previo = self._previo if self._previo is not None else actual
+        codigos_r, saltos_r = self._codigos(previo[0], actual[0])
+        codigos_m, saltos_m = self._codigos(previo[3], actual[3])
+        clave = self.entorno.iteracion % self.intervalo_clave == 0 or not self._desplazamientos
+
+        eventos = self._eventos(previo, actual, saltos_r, saltos_m)
+        stats = self.entorno.estadisticas()
+        partes = [ESTADISTICAS.pack(*(stats[k] for k in CLAVES_ESTADISTICAS)),
+                  empaquetar_codigos(codigos_r), empaquetar_codigos(codigos_m),
+                  struct.pack('<I', len(eventos)), eventos.tobytes()]
+        if clave:
+            partes += [actual[0].astype('<i8').tobytes(), actual[1].astype(np.int8).tobytes(),
+                       actual[2].tobytes(), actual[3].astype('<i8').tobytes(), actual[4].tobytes()]
+        carga = b''.join(partes)
+
+        self._desplazamientos.append(self._archivo.tell())
+        self._archivo.write(CABECERA_REGISTRO.pack(CLAVE if clave else DELTA, len(carga)) + carga)
+        self._previo = actual
+
+    def cerrar(self):
+        """Escribe el índice de registros y cierra el archivo"""
+        if self._archivo.closed:
+            return
+        indice = np.array(self._desplazamientos, dtype='<i8')
+        self._archivo.write(indice.tobytes() + struct.pack('<Q', len(indice)) + MAGIA_INDICE)
+        self._archivo.close()
+
+    def __enter__(self) -> 'EscritorTrayectoria':
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class LectorTrayectoria:
+    """
+    Lectura de un registro de EscritorTrayectoria sobre un mmap del archivo
+    - estado_en(t) parte del fotograma clave anterior y aplica como mucho
+      `intervalo_clave` deltas: no se carga la ejecución completa
+    - avanzar / retroceder aplican un registro hacia delante o hacia atrás
+    - Un archivo sin índice (escritura interrumpida) se recorre una vez al abrirlo
+    """
+
+    def __init__(self, ruta: str):
+        self._archivo = open(ruta, 'rb')
+        self._mmap = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+        if self._mmap[:len(MAGIA)] != MAGIA:
+            raise ValueError(f"{ruta} no es un registro de trayectoria")
+
+        n = struct.unpack_from('<I', self._mmap, len(MAGIA))[0]
+        inicio = len(MAGIA) + 4
+        cabecera = json.loads(self._mmap[inicio:inicio + n])
+        self.N = cabecera['N']
+        self.n_robots, self.n_monstruos = cabecera['n_robots'], cabecera['n_monstruos']
+        self.intervalo_clave = cabecera['intervalo_clave']
+        self.desplazamientos = np.array(cabecera['desplazamientos'], dtype=np.int64)
+        con_grid = cabecera.get('grid', False)
+        self._inicio_grid = inicio + n if con_grid else None
+        bytes_grid = self.N * self.N * ((self.N + 7) // 8) if con_grid else 0
+        self._registros = self._leer_indice(inicio + n + bytes_grid)
+
+        tipos = self._buffer[self._registros]
+        self._claves = np.flatnonzero(tipos == CLAVE[0])
+        self.primera_iteracion = self._estadisticas(0)['iteracion']
+
+    def _leer_indice(self, inicio: int) -> np.ndarray:
+        fin = len(self._mmap)
+        if self._mmap[fin - len(MAGIA_INDICE):] == MAGIA_INDICE:
+            n = struct.unpack_from('<Q', self._mmap, fin - len(MAGIA_INDICE) - 8)[0]
+            return np.frombuffer(self._mmap, dtype='<i8', count=n, offset=fin - len(MAGIA_INDICE) - 8 - 8 * n).copy()
+        # Registro sin cerrar: recorrer las cabeceras, descartando un registro final incompleto
+        registros, pos = [], inicio
+        while pos + CABECERA_REGISTRO.size <= fin:
+            _, tam = CABECERA_REGISTRO.unpack_from(self._mmap, pos)
+            if pos + CABECERA_REGISTRO.size + tam > fin:
+                break
+            registros.append(pos)
+            pos += CABECERA_REGISTRO.size + tam
+        return np.array(registros, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+    def grid(self) -> Optional[GridEmpaquetado]:
+        """Grid del mundo registrado (None si se escribió sin guardar_grid)"""
+        if self._inicio_grid is None:
+            return None
+        grid = GridEmpaquetado(self.N)
+        grid._bits[...] = np.frombuffer(self._mmap, dtype=np.uint8, count=grid._bits.size,
+                                        offset=self._inicio_grid).reshape(grid._bits.shape)
+        return grid
+
+    @property
+    def ultima_iteracion(self) -> int:
+        return self.primera_iteracion + len(self) - 1
+
+    def _indice(self, iteracion: int) -> int:
+        i = iteracion - self.primera_iteracion
+        if not 0 <= i < len(self):
+            raise IndexError(f"Iteración {iteracion} fuera del registro "
+                             f"[{self.primera_iteracion}, {self.ultima_iteracion}]")
+        return i
+
+    def _estadisticas(self, i: int) -> Dict:
+        valores = ESTADISTICAS.unpack_from(self._mmap, int(self._registros[i]) + CABECERA_REGISTRO.size)
+        return dict(zip(CLAVES_ESTADISTICAS, valores))
+
+    def estadisticas(self, iteracion: int) -> Dict:
+        """Estadísticas del tick, como EntornoHexaedrico.estadisticas()"""
+        return self._estadisticas(self._indice(iteracion))
+
+    def registro(self, iteracion: int) -> Dict:
+        """Registro decodificado: estadísticas, códigos de movimiento, eventos y estado si es clave"""
+        i = self._indice(iteracion)
+        pos = int(self._registros[i])
+        tipo, tam = CABECERA_REGISTRO.unpack_from(self._mmap, pos)
+        pos += CABECERA_REGISTRO.size
+        registro = {'estadisticas': self._estadisticas(i), 'clave': tipo == CLAVE}
+        pos += ESTADISTICAS.size
+
+        nr, nm = bytes_codigos(self.n_robots), bytes_codigos(self.n_monstruos)
+        registro['movimientos_robots'] = desempaquetar_codigos(self._buffer[pos:pos + nr], self.n_robots)
+        registro['movimientos_monstruos'] = desempaquetar_codigos(self._buffer[pos + nr:pos + nr + nm],
+                                                                  self.n_monstruos)
+        pos += nr + nm
+        n_eventos = struct.unpack_from('<I', self._mmap, pos)[0]
+        registro['eventos'] = np.frombuffer(self._mmap, dtype=EVENTO, count=n_eventos, offset=pos + 4).copy()
+        pos += 4 + n_eventos * EVENTO.itemsize
+
+        if registro['clave']:
+            R, M = self.n_robots, self.n_monstruos
+            campos = (('robots_celda', '<i8', R), ('robots_orientacion', np.int8, R), ('robots_vivo', bool, R),
+                      ('monstruos_celda', '<i8', M), ('monstruos_vivo', bool, M))
+            for nombre, dtype, n in campos:
+                registro[nombre] = np.frombuffer(self._mmap, dtype=dtype, count=n, offset=pos).copy()
+                pos += n * np.dtype(dtype).itemsize
+        return registro
+
+    def iteraciones_clave(self) -> np.ndarray:
+        return self._claves + self.primera_iteracion
+
+    def estado_en(self, iteracion: int) -> Dict[str, np.ndarray]:
+        """Estado completo (celdas, orientaciones, vivos, estadísticas) en un tick cualquiera"""
+        i = self._indice(iteracion)
+        clave = int(self._claves[np.searchsorted(self._claves, i, side='right') - 1])
+        registro = self.registro(self.primera_iteracion + clave)
+        estado = {nombre: registro[nombre]
+                  for nombre in ('robots_celda', 'robots_orientacion', 'robots_vivo',
+                                 'monstruos_celda', 'monstruos_vivo')}
+        estado['estadisticas'] = registro['estadisticas']
+        for t in range(self.primera_iteracion + clave + 1, iteracion + 1):
+            self.avanzar(estado, self.registro(t))
+        return estado
+
+    def _aplicar(self, estado: Dict, registro: Dict, sentido: int):
+        for agentes in ('robots', 'monstruos'):
+            codigos = registro[f'movimientos_{agentes}']
+            movidos = np.flatnonzero(codigos)
+            estado[f'{agentes}_celda'][movidos] += sentido * self.desplazamientos[codigos[movidos] - 1]
+
+        eventos = registro['eventos']
+        valor = 'despues' if sentido > 0 else 'antes'
+        rotaciones = eventos[eventos['tipo'] == ROTACION]
+        estado['robots_orientacion'][rotaciones['agente']] = rotaciones[valor]
+        for agentes, salto in (('robots', SALTO_ROBOT), ('monstruos', SALTO_MONSTRUO)):
+            saltos = eventos[eventos['tipo'] == salto]
+            estado[f'{agentes}_celda'][saltos['agente']] = saltos[valor]
+        estado['robots_vivo'][eventos['agente'][eventos['tipo'] == MUERTE]] = sentido < 0
+        estado['monstruos_vivo'][eventos['agente'][eventos['tipo'] == DESTRUCCION]] = sentido < 0
+        estado['robots_vivo'][eventos['agente'][eventos['tipo'] == REAPARICION_ROBOT]] = sentido > 0
+        estado['monstruos_vivo'][eventos['agente'][eventos['tipo'] == REAPARICION_MONSTRUO]] = sentido > 0
+
+    def avanzar(self, estado: Dict, registro: Dict):
+        """Aplica sobre `estado` (del tick anterior) el registro de un tick"""
+        self._aplicar(estado, registro, 1)
+        estado['estadisticas'] = registro['estadisticas']
+
+    def retroceder(self, estado: Dict, registro: Dict):
+        """Deshace sobre `estado` (del tick del registro) el registro, dejando el tick anterior"""
+        self._aplicar(estado, registro, -1)
+        estado['estadisticas'] = self.estadisticas(registro['estadisticas']['iteracion'] - 1)
+
+    def cerrar(self):
+        self._buffer = self._registros = None
+        self._mmap.close()
+        self._archivo.close()
+
+    def __enter__(self) -> 'LectorTrayectoria':
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class _AgenteRegistrado:
+    """Vista de un robot o monstruo en el tick actual de una ReproduccionTrayectoria"""
+
+    __slots__ = ('fuente', 'tipo', 'id')
+
+    def __init__(self, fuente: 'ReproduccionTrayectoria', tipo: str, id: int):
+        self.fuente = fuente
+        self.tipo = tipo
+        self.id = id
+
+    @property
+    def vivo(self) -> bool:
+        return bool(self.fuente._estado[f'{self.tipo}_vivo'][self.id])
+
+    @property
+    def posicion(self) -> Posicion:
+        return self.fuente.posicion_de(int(self.fuente._estado[f'{self.tipo}_celda'][self.id]))
+
+    @property
+    def orientacion(self) -> Orientacion:
+        return ORIENTACIONES[self.fuente._estado['robots_orientacion'][self.id]]
+
+
+class ReproduccionTrayectoria:
+    """
+    Fuente de reproducción de un registro de trayectoria
+    - Expone lo que VisualizadorPygame lee de EntornoHexaedrico (N, grid,
+      robots, monstruos, estadisticas()) para el tick actual del cursor
+    - ir_a salta a cualquier tick desde el fotograma clave anterior
+    - avanzar / retroceder recorren n ticks aplicando deltas; los saltos
+      mayores que el intervalo entre fotogramas clave pasan por ir_a
+    """
+
+    def __init__(self, ruta: str):
+        self.lector = LectorTrayectoria(ruta)
+        self.N = self.lector.N
+        self.grid = self.lector.grid()
+        if self.grid is None:
+            self.lector.cerrar()
+            raise ValueError(f"{ruta} se registró sin grid: no se puede reproducir")
+        self.robots = [_AgenteRegistrado(self, 'robots', i) for i in range(self.lector.n_robots)]
+        self.monstruos = [_AgenteRegistrado(self, 'monstruos', i) for i in range(self.lector.n_monstruos)]
+        self.ir_a(self.lector.primera_iteracion)
+
+    @property
+    def iteracion(self) -> int:
+        return self._estado['estadisticas']['iteracion']
+
+    @property
+    def primera_iteracion(self) -> int:
+        return self.lector.primera_iteracion
+
+    @property
+    def ultima_iteracion(self) -> int:
+        return self.lector.ultima_iteracion
+
+    def posicion_de(self, celda: int) -> Posicion:
+        L = self.N + 2
+        xy, z = divmod(celda, L)
+        x, y = divmod(xy, L)
+        return Posicion(x - 1, y - 1, z - 1)
+
+    def ir_a(self, iteracion: int):
+        """Coloca el cursor en un tick (acotado al rango registrado)"""
+        iteracion = min(max(iteracion, self.primera_iteracion), self.ultima_iteracion)
+        self._estado = self.lector.estado_en(iteracion)
+
+    def avanzar(self, n: int = 1):
+        destino = min(self.iteracion + n, self.ultima_iteracion)
+        if destino - self.iteracion > self.lector.intervalo_clave:
+            return self.ir_a(destino)
+        for t in range(self.iteracion + 1, destino + 1):
+            self.lector.avanzar(self._estado, self.lector.registro(t))
+
+    def retroceder(self, n: int = 1):
+        destino = max(self.iteracion - n, self.primera_iteracion)
+        if self.iteracion - destino > self.lector.intervalo_clave:
+            return self.ir_a(destino)
+        for t in range(self.iteracion, destino, -1):
+            self.lector.retroceder(self._estado, self.lector.registro(t))
+
+    def estadisticas(self) -> Dict:
+        return dict(self._estado['estadisticas'])
+
+    def cerrar(self):
+        self.lector.cerrar()
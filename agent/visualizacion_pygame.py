@@ -20,6 +20,8 @@ class VisualizadorPygame:
     - Muestra el entorno en tiempo real
     - Permite rotar la vista
     - Muestra estadísticas en pantalla
+    - Reproduce ejecuciones registradas (ReproduccionTrayectoria) con
+      avance, retroceso y salto a cualquier iteración
     """
     
     # Colores
@@ -70,6 +72,11 @@ class VisualizadorPygame:
         self.velocidad = 500  # ms por iteración
         self.ultimo_tick = pygame.time.get_ticks()
         
+        # Control de reproducción (ejecutar_reproduccion)
+        self.reproduccion = False
+        self.ticks_por_segundo = 10.0
+        self.sentido = 1  # 1 hacia delante, -1 hacia atrás
+        
         # Reloj para FPS
         self.clock = pygame.time.Clock()
         self.fps = 60
@@ -189,10 +196,11 @@ class VisualizadorPygame:
         # Dibujar monstruos
         for monstruo in self.entorno.monstruos:
             if monstruo.vivo:
+                pos = monstruo.posicion
                 self.dibujar_esfera(
-                    monstruo.posicion.x,
-                    monstruo.posicion.y,
-                    monstruo.posicion.z,
+                    pos.x,
+                    pos.y,
+                    pos.z,
                     self.COLOR_MONSTRUO,
                     radio=12
                 )
@@ -200,24 +208,25 @@ class VisualizadorPygame:
         # Dibujar robots
         for robot in self.entorno.robots:
             if robot.vivo:
+                pos = robot.posicion
                 self.dibujar_esfera(
-                    robot.posicion.x,
-                    robot.posicion.y,
-                    robot.posicion.z,
+                    pos.x,
+                    pos.y,
+                    pos.z,
                     self.COLOR_ROBOT,
                     radio=15
                 )
                 
                 # Dibujar dirección del robot
                 dx, dy, dz = robot.orientacion.value
-                end_x = robot.posicion.x + 0.5 + dx * 0.7
-                end_y = robot.posicion.y + 0.5 + dy * 0.7
-                end_z = robot.posicion.z + 0.5 + dz * 0.7
+                end_x = pos.x + 0.5 + dx * 0.7
+                end_y = pos.y + 0.5 + dy * 0.7
+                end_z = pos.z + 0.5 + dz * 0.7
                 
                 start_x, start_y = self.proyecto_3d_a_2d(
-                    robot.posicion.x + 0.5,
-                    robot.posicion.y + 0.5,
-                    robot.posicion.z + 0.5
+                    pos.x + 0.5,
+                    pos.y + 0.5,
+                    pos.z + 0.5
                 )
                 end_screen_x, end_screen_y = self.proyecto_3d_a_2d(end_x, end_y, end_z)
                 
@@ -255,6 +264,10 @@ class VisualizadorPygame:
         # Controles
         y_pos += 10
         estado = "PAUSADO" if self.pausado else "EJECUTANDO"
+        if self.reproduccion:
+            estado = (f"{'PAUSADO' if self.pausado else 'REPRODUCIENDO'} "
+                      f"{'>>' if self.sentido > 0 else '<<'} {self.ticks_por_segundo:g} it/s "
+                      f"({self.entorno.primera_iteracion}-{self.entorno.ultima_iteracion})")
         texto_estado = self.fuente_pequeña.render(f"Estado: {estado}", True, 
                                                   (255, 255, 0) if self.pausado else (0, 255, 0))
         self.screen.blit(texto_estado, (20, y_pos))
@@ -269,9 +282,18 @@ class VisualizadorPygame:
             "+ - - Zoom in/out",
             "ESC - Salir"
         ]
-        
-        y_pos = self.alto - 150
-        panel_rect = pygame.Rect(10, y_pos - 10, 250, 140)
+        if self.reproduccion:
+            controles[-1:] = [
+                ", . - Retroceder/Avanzar una iteración",
+                "[ ] - Velocidad /2 x2",
+                "R - Invertir sentido",
+                "INICIO FIN - Primera/Última iteración",
+                "RE PÁG AV PÁG - Saltar 10%",
+                "ESC - Salir"
+            ]
+        
+        y_pos = self.alto - 30 - 20 * len(controles)
+        panel_rect = pygame.Rect(10, y_pos - 10, 250 if not self.reproduccion else 300, 20 * len(controles) + 20)
         pygame.draw.rect(self.screen, self.COLOR_PANEL, panel_rect)
         pygame.draw.rect(self.screen, self.COLOR_TEXTO, panel_rect, 1)
         
@@ -307,9 +329,34 @@ class VisualizadorPygame:
                     self.zoom = min(2.0, self.zoom + 0.1)
                 elif evento.key == pygame.K_MINUS:
                     self.zoom = max(0.5, self.zoom - 0.1)
+                elif self.reproduccion:
+                    self._manejar_tecla_reproduccion(evento.key)
         
         return True
     
+    def _manejar_tecla_reproduccion(self, tecla: int):
+        """Controles de cursor y velocidad de la reproducción"""
+        fuente = self.entorno
+        salto = max(1, (fuente.ultima_iteracion - fuente.primera_iteracion) // 10)
+        if tecla == pygame.K_PERIOD:
+            fuente.avanzar()
+        elif tecla == pygame.K_COMMA:
+            fuente.retroceder()
+        elif tecla == pygame.K_RIGHTBRACKET:
+            self.ticks_por_segundo = min(1e6, self.ticks_por_segundo * 2)
+        elif tecla == pygame.K_LEFTBRACKET:
+            self.ticks_por_segundo = max(0.25, self.ticks_por_segundo / 2)
+        elif tecla == pygame.K_r:
+            self.sentido = -self.sentido
+        elif tecla == pygame.K_HOME:
+            fuente.ir_a(fuente.primera_iteracion)
+        elif tecla == pygame.K_END:
+            fuente.ir_a(fuente.ultima_iteracion)
+        elif tecla == pygame.K_PAGEUP:
+            fuente.ir_a(fuente.iteracion + salto)
+        elif tecla == pygame.K_PAGEDOWN:
+            fuente.ir_a(fuente.iteracion - salto)
+    
     def renderizar_frame(self):
         """Renderiza un frame completo"""
         # Limpiar pantalla
@@ -369,4 +416,43 @@ class VisualizadorPygame:
         
         # Retornar estadísticas finales
         return self.entorno.estadisticas()
-
+    
+    def ejecutar_reproduccion(self, ticks_por_segundo: float = 10.0):
+        """
+        Reproduce una ejecución registrada; el visualizador debe haberse creado
+        con una ReproduccionTrayectoria en lugar de un entorno
+        
+        Args:
+            ticks_por_segundo: Velocidad inicial de reproducción
+        
+        Returns:
+            Estadísticas de la iteración mostrada al salir
+        """
+        self.reproduccion = True
+        self.ticks_por_segundo = ticks_por_segundo
+        fuente = self.entorno
+        pendiente = 0.0
+        ejecutando = True
+        
+        while ejecutando:
+            ejecutando = self.manejar_eventos()
+            
+            # El coste por frame solo depende de los ticks recorridos (o de un
+            # salto desde el fotograma clave), no del coste de simularlos
+            transcurrido = self.clock.tick(self.fps) / 1000
+            if not self.pausado:
+                pendiente += transcurrido * self.ticks_por_segundo
+                n = int(pendiente)
+                pendiente -= n
+                if n and self.sentido > 0:
+                    fuente.avanzar(n)
+                elif n:
+                    fuente.retroceder(n)
+                if fuente.iteracion in (fuente.primera_iteracion, fuente.ultima_iteracion) and n:
+                    self.pausado = True
+            
+            self.renderizar_frame()
+        
+        pygame.quit()
+        
+        return fuente.estadisticas()
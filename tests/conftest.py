@@ -0,0 +1,25 @@
+"""
+UTILIDADES COMUNES DE LAS PRUEBAS
+Entornos pequeños construidos sin la salida por consola
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from agent import EntornoHexaedrico
+
+
+def silencioso(funcion, *args, **kwargs):
+    """Ejecuta `funcion` descartando lo que imprime"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args, **kwargs)
+
+
+@pytest.fixture
+def crear_entorno():
+    """Fábrica de entornos: crear_entorno(N=8, n_robots=6, n_monstruos=6, seed=42, **opciones)"""
+    def crear(N=8, n_robots=6, n_monstruos=6, seed=42, pfree=0.8, pvacio=0.2, **opciones):
+        return silencioso(EntornoHexaedrico, N, pfree, pvacio, n_robots, n_monstruos, seed=seed, **opciones)
+    return crear
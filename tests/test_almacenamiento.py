@@ -0,0 +1,62 @@
+"""
+PRUEBAS DEL GRID EMPAQUETADO
+Disposición de los bits, bits de relleno y construcción por losas de GridEmpaquetado
+"""
+
+import numpy as np
+import pytest
+
+from agent.ontology import TipoCelda
+from agent.storage import GridEmpaquetado, crear_grid, indices_libres
+
+
+VACIA, LIBRE = TipoCelda.ZONA_VACIA.value, TipoCelda.ZONA_LIBRE.value
+
+
+@pytest.mark.parametrize("N", [1, 7, 8, 13])
+def test_un_bit_por_celda_a_lo_largo_de_z(N):
+    grid = GridEmpaquetado(N)
+    assert grid._bits.shape == (N, N, (N + 7) // 8) and grid.nbytes == N * N * ((N + 7) // 8)
+
+    x, y, z = N // 2, N - 1, N - 1
+    grid[x, y, z] = VACIA
+    esperado = np.zeros_like(grid._bits)
+    esperado[x, y, z >> 3] = 1 << (z & 7)
+    assert grid._bits.tolist() == esperado.tolist()
+    assert grid[x, y, z] == VACIA and grid[x, y, -1] == VACIA and np.asarray(grid).sum() == 1
+
+
+def test_escrituras_dejan_a_cero_los_bits_de_relleno():
+    N = 13
+    grid = GridEmpaquetado(N)
+    grid[:, :, :] = VACIA
+    assert (grid._bits[..., -1] >> (N % 8) == 0).all()
+    assert np.asarray(grid).all() and len(grid.indices_libres()) == 0
+
+    grid[3, :, 4] = LIBRE
+    assert indices_libres(grid).tolist() == np.ravel_multi_index((3, np.arange(N), 4), (N, N, N)).tolist()
+    assert (grid._bits[..., -1] >> (N % 8) == 0).all()
+
+
+def test_lecturas_coherentes_con_el_array_desempaquetado():
+    N = 11
+    rng = np.random.default_rng(0)
+    grid = crear_grid(N, rng.choice(N ** 3, 400, replace=False), 'bits')
+    denso = np.asarray(grid)
+    x, y, z = rng.integers(0, N, (3, 40))
+    assert grid[x, y, z].tolist() == denso[x, y, z].tolist()
+    for clave in [(slice(None), 0), (N - 1,), (slice(1, None), slice(None, -1), slice(None, None, 2))]:
+        assert np.array_equal(grid[clave], denso[clave])
+    assert grid.indices_libres(bloque=3).tolist() == np.flatnonzero(denso == LIBRE).tolist()
+
+
+def test_construccion_por_losas_de_x():
+    # Con N = 260 desde_indices trabaja en dos losas (248 planos de X y el resto)
+    N = 260
+    rng = np.random.default_rng(1)
+    frontera = np.array([0, 248 * N * N - 1, 248 * N * N, N ** 3 - 1])
+    vacios = np.unique(np.r_[rng.choice(N ** 3, 5000, replace=False), frontera])
+    grid = GridEmpaquetado.desde_indices(N, vacios)
+
+    assert int(np.unpackbits(grid._bits).sum()) == len(vacios)
+    assert (grid[np.unravel_index(vacios, (N, N, N))] == VACIA).all()
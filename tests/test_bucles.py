@@ -0,0 +1,111 @@
+"""
+PRUEBAS DEL DETECTOR DE BUCLES
+Conteos de la ventana, umbrales de repetición y entrada en bucle de DetectorBucles
+"""
+
+import numpy as np
+import pytest
+
+from agent.bucles import DetectorBucles, UMBRAL_BUCLE
+
+
+def _llenar(detector, ticks, seed, n_acciones=4):
+    """Registra `ticks` acciones aleatorias por robot (mezclando registrar y registrar_uno)"""
+    rng = np.random.default_rng(seed)
+    n = len(detector.total)
+    for tick in range(ticks):
+        ids = np.flatnonzero(rng.random(n) < 0.7)
+        acciones = rng.integers(0, 2 if tick % 40 < 20 else n_acciones, len(ids))
+        if tick % 3:
+            detector.registrar(ids, acciones)
+        else:
+            for id, accion in zip(ids.tolist(), acciones.tolist()):
+                detector.registrar_uno(id, accion)
+    detector.en_bucle()
+
+
+@pytest.mark.parametrize("ventana", [3, 10, 15])
+def test_conteos_de_la_ventana(ventana):
+    detector = DetectorBucles(25, ventana)
+    _llenar(detector, 120, ventana)
+    en_ventana = np.minimum(detector.total, ventana)
+
+    # Una ventana de k acciones tiene k acciones y k - 2 trigramas
+    assert detector.acciones.sum(axis=1).tolist() == en_ventana.tolist()
+    assert detector.trigramas.sum(axis=1).tolist() == np.maximum(en_ventana - 2, 0).tolist()
+    # Los contadores de umbral son los de los conteos de trigramas
+    assert detector.repetidos.tolist() == np.count_nonzero(detector.trigramas >= 2, axis=1).tolist()
+    assert detector.en_umbral.tolist() == np.count_nonzero(detector.trigramas >= UMBRAL_BUCLE, axis=1).tolist()
+    # Los códigos del búfer circular de la ventana son sus trigramas
+    for id in range(25):
+        total = int(detector.total[id])
+        posiciones = np.arange(max(total - ventana, 0) + 2, total) % ventana
+        conteo = np.bincount(detector.codigos[id, posiciones], minlength=detector.n_trigramas)
+        assert conteo.tolist() == detector.trigramas[id].tolist()
+
+
+def test_registrar_uno_equivale_a_registrar():
+    rng = np.random.default_rng(1)
+    juntos, sueltos = DetectorBucles(8, 10), DetectorBucles(8, 10)
+    for _ in range(40):
+        ids = np.flatnonzero(rng.random(8) < 0.6)
+        acciones = rng.integers(0, 4, len(ids))
+        juntos.registrar(ids, acciones)
+        for id, accion in zip(ids.tolist(), acciones.tolist()):
+            sueltos.registrar_uno(id, accion)
+    assert sueltos.exportar()[1].tolist() == juntos.exportar()[1].tolist()
+    assert sueltos.trigramas.tolist() == juntos.trigramas.tolist()
+
+
+def test_cola_de_registrar_uno_acotada():
+    # Sin consultas entre ticks la cola nunca acumula más de un tick de acciones
+    n = 20
+    detector, referencia = DetectorBucles(n, 10), DetectorBucles(n, 10)
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        ids = np.flatnonzero(rng.random(n) < 0.9)
+        acciones = rng.integers(0, 4, len(ids))
+        referencia.registrar(ids, acciones)
+        for id, accion in zip(ids.tolist(), acciones.tolist()):
+            detector.registrar_uno(id, accion)
+            assert len(detector._por_registrar) < n
+    assert detector.exportar()[1].tolist() == referencia.exportar()[1].tolist()
+
+
+@pytest.mark.parametrize("ventana", [5, 10])
+def test_accion_constante_entra_en_bucle_con_dos_ventanas(ventana):
+    detector = DetectorBucles(1, ventana)
+    for tick in range(1, 3 * ventana):
+        detector.registrar_uno(0, 2)
+        # Con la ventana llena su único trigrama se repite W - 2 veces, pero hace falta historial de 2W
+        assert detector.en_bucle()[0] == (tick >= 2 * ventana)
+        assert detector.patrones_repetidos()[0] == (tick >= 4)
+        assert detector.variabilidad()[0] == 1 / min(tick, ventana)
+
+
+def test_restaurar_y_reconstruir_rehacen_los_conteos():
+    n, ventana = 12, 10
+    detector = DetectorBucles(n, ventana)
+    rng = np.random.default_rng(0)
+    historiales = [[] for _ in range(n)]
+    for _ in range(50):
+        ids = np.flatnonzero(rng.random(n) < 0.8)
+        acciones = rng.integers(0, 3, len(ids))
+        detector.registrar(ids, acciones)
+        for id, accion in zip(ids.tolist(), acciones.tolist()):
+            historiales[id].append(accion)
+
+    restaurado = DetectorBucles(n, ventana)
+    restaurado.restaurar(*detector.exportar())
+    reconstruido = DetectorBucles(n, ventana)
+    for id, historial in enumerate(historiales):
+        reconstruido.reconstruir(id, np.array(historial), len(historial))
+    for copia in (restaurado, reconstruido):
+        for conteo in ('total', 'trigramas', 'acciones', 'repetidos', 'en_umbral'):
+            assert getattr(copia, conteo).tolist() == getattr(detector, conteo).tolist()
+
+
+def test_ventana_fuera_de_rango():
+    for ventana in (2, 256):
+        with pytest.raises(ValueError):
+            DetectorBucles(1, ventana)
@@ -0,0 +1,94 @@
+"""
+PRUEBAS DE LA CONECTIVIDAD DEL ESPACIO LIBRE
+Etiquetado por union-find frente a un BFS y terminación por misión imposible
+"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from agent import Simulador
+from agent.conectividad import etiquetar_componentes
+
+from conftest import silencioso
+
+
+def _etiquetas_bfs(libre, desplazamientos):
+    """Componentes por BFS, numeradas en orden de su primera celda"""
+    etiquetas = np.full(libre.size, -1, dtype=np.int64)
+    siguiente = 0
+    for inicio in np.flatnonzero(libre).tolist():
+        if etiquetas[inicio] >= 0:
+            continue
+        etiquetas[inicio] = siguiente
+        cola = deque([inicio])
+        while cola:
+            celda = cola.popleft()
+            for d in desplazamientos:
+                vecino = celda + d
+                if libre[vecino] and etiquetas[vecino] < 0:
+                    etiquetas[vecino] = siguiente
+                    cola.append(vecino)
+        siguiente += 1
+    return etiquetas
+
+
+@pytest.mark.parametrize("pvacio", [0.2, 0.5, 0.7])
+def test_etiquetas_coinciden_con_bfs(pvacio):
+    rng = np.random.default_rng(int(pvacio * 10))
+    N = 9
+    L = N + 2
+    libre = np.pad(rng.random((N, N, N)) >= pvacio, 1, constant_values=False).reshape(-1)
+    desplazamientos = (L * L, -L * L, L, -L, 1, -1)
+    assert etiquetar_componentes(libre, desplazamientos).tolist() == \
+        _etiquetas_bfs(libre, desplazamientos).tolist()
+
+
+def _entorno_con_componentes(crear_entorno):
+    """Primer entorno pequeño (por semilla) con al menos dos componentes libres"""
+    for seed in range(100):
+        entorno = crear_entorno(N=6, n_robots=3, n_monstruos=3, seed=seed, pfree=0.5, pvacio=0.5)
+        if len(np.unique(entorno.componentes[entorno.componentes >= 0])) >= 2:
+            return entorno
+    raise AssertionError("Ninguna semilla da varias componentes")
+
+
+def test_mision_imposible_termina_al_empezar(crear_entorno):
+    entorno = _entorno_con_componentes(crear_entorno)
+    componentes = entorno.componentes
+    mayor = np.argmax(entorno.tamaños_componentes)
+    celdas_robots = np.flatnonzero(componentes == mayor)
+    celdas_monstruos = np.flatnonzero((componentes >= 0) & (componentes != mayor))
+    for i, robot in enumerate(entorno.robots):
+        robot.posicion = entorno.posicion_de(int(celdas_robots[i % len(celdas_robots)]))
+    for i, monstruo in enumerate(entorno.monstruos):
+        monstruo.posicion = entorno.posicion_de(int(celdas_monstruos[i % len(celdas_monstruos)]))
+
+    reporte = silencioso(Simulador(entorno).ejecutar, 50, verbose=False, terminar_si_imposible=True)
+    assert reporte['resultado'] == 'mision_imposible'
+    assert reporte['iteraciones_totales'] == 0
+    assert reporte['monstruos_inalcanzables'] == len(entorno.monstruos)
+
+
+def test_solo_se_comprueba_tras_una_muerte(crear_entorno, monkeypatch):
+    entorno = crear_entorno(N=8, n_robots=8, n_monstruos=10, seed=3)
+    llamadas = []
+    mision_posible = entorno.mision_posible
+    monkeypatch.setattr(entorno, 'mision_posible', lambda: llamadas.append(entorno.iteracion) or mision_posible())
+    simulador = Simulador(entorno)
+    silencioso(simulador.ejecutar, 60, verbose=False, terminar_si_imposible=True)
+
+    vivos = [(s['robots_vivos'], s['monstruos_vivos']) for s in simulador.historial_estadisticas]
+    cambios = [s['iteracion'] for i, s in enumerate(simulador.historial_estadisticas)
+               if i == 0 or vivos[i] != vivos[i - 1]]
+    assert llamadas == cambios
+
+
+@pytest.mark.parametrize("almacenamiento", ["bits", "octree"])
+def test_almacenamiento_compacto_no_etiqueta(crear_entorno, almacenamiento):
+    entorno = crear_entorno(almacenamiento=almacenamiento)
+    reporte = silencioso(Simulador(entorno).ejecutar, 10, verbose=False)
+    assert 'componentes_libres' not in reporte and entorno._componentes is None
+    with pytest.raises(ValueError):
+        silencioso(Simulador(entorno).ejecutar, 10, verbose=False, terminar_si_imposible=True)
@@ -0,0 +1,109 @@
+"""
+PRUEBAS DE LA TABLA DE DECISIÓN
+Disposición de la clave, alcance de cada regla y entradas estocásticas de TABLA_DECISION
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from agent import EntornoHexaedrico, Simulador
+from agent.decision import CONDICIONES, N_CLAVES, clave_decision, compilar_reglas
+from agent.ontology import (VACUUMATOR, MOVER_ADELANTE, ROTAR_90, ESPERAR,
+                            BIT_MONSTRUO_CERCANO, BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA)
+from agent.robot_agent import TABLA_DECISION, PROBABILIDAD_GIRO_VISITADA
+
+
+BIT = {c: 1 << i for i, c in enumerate(CONDICIONES)}
+CLAVES = np.arange(N_CLAVES)
+
+
+def _con(*condiciones):
+    """Máscara de las claves con todas las condiciones dadas activas"""
+    return np.all([CLAVES & BIT[c] > 0 for c in condiciones], axis=0)
+
+
+def _sin(*condiciones):
+    return np.all([CLAVES & BIT[c] == 0 for c in condiciones], axis=0)
+
+
+def test_clave_comparte_los_bits_de_percepcion():
+    # Los bits de percepción del motor son directamente los tres bits bajos de la clave
+    assert (BIT['monstruo_cercano'], BIT['robot_delante'], BIT['monstruo_en_celda']) == \
+        (BIT_MONSTRUO_CERCANO, BIT_ROBOT_DELANTE, BIT_MONSTRUO_EN_CELDA)
+    assert N_CLAVES == 128 and len(TABLA_DECISION.accion) == N_CLAVES
+    condiciones = {c: (CLAVES & BIT[c]) > 0 for c in CONDICIONES}
+    assert clave_decision(**condiciones).tolist() == CLAVES.tolist()
+    assert clave_decision(**dict.fromkeys(CONDICIONES, True)) == N_CLAVES - 1
+
+
+def test_cada_regla_solo_depende_de_sus_condiciones():
+    accion, probabilidad = TABLA_DECISION.accion, TABLA_DECISION.probabilidad
+    # 1. Monstruo en la celda: VACUUMATOR sea cual sea el resto de la clave
+    assert (accion[_con('monstruo_en_celda')] == VACUUMATOR).all()
+    # 2. Robot delante: solo decide el id
+    protocolo = _sin('monstruo_en_celda') & _con('robot_delante')
+    assert (accion[protocolo & _con('id_menor')] == MOVER_ADELANTE).all()
+    assert (accion[protocolo & _sin('id_menor')] == ROTAR_90).all()
+    # 3. Caza: avanza solo a una celda libre que no se sabe vacía
+    caza = _sin('monstruo_en_celda', 'robot_delante') & _con('monstruo_cercano')
+    assert (accion[caza & _con('libre_adelante') & _sin('vacia_conocida')] == MOVER_ADELANTE).all()
+    assert (accion[caza & (_sin('libre_adelante') | _con('vacia_conocida'))] == ROTAR_90).all()
+    # 4. Exploración: no mira si la celda de delante es libre
+    exploracion = _sin('monstruo_en_celda', 'robot_delante', 'monstruo_cercano')
+    assert (accion[exploracion & _con('vacia_conocida')] == ROTAR_90).all()
+    assert (accion[exploracion & _sin('vacia_conocida')] == MOVER_ADELANTE).all()
+    assert not (probabilidad[~exploracion] > 0).any()
+
+
+def test_solo_es_estocastica_la_exploracion_de_celdas_visitadas():
+    estocasticas = TABLA_DECISION.probabilidad > 0
+    visitada = _sin('monstruo_en_celda', 'robot_delante', 'monstruo_cercano', 'vacia_conocida') & _con('visitada')
+    assert estocasticas.tolist() == visitada.tolist()
+    assert (TABLA_DECISION.probabilidad[visitada] == PROBABILIDAD_GIRO_VISITADA).all()
+    assert (TABLA_DECISION.alternativa[visitada] == ROTAR_90).all()
+    # En las deterministas la alternativa nunca se toma, ni con uniforme 0
+    assert TABLA_DECISION.resolver(CLAVES, np.zeros(N_CLAVES))[~visitada].tolist() == \
+        TABLA_DECISION.accion[~visitada].tolist()
+    clave = int(np.flatnonzero(visitada)[0])
+    uniformes = np.array([0.0, PROBABILIDAD_GIRO_VISITADA - 1e-9, PROBABILIDAD_GIRO_VISITADA, 0.999])
+    assert TABLA_DECISION.resolver(np.full(4, clave), uniformes).tolist() == \
+        [ROTAR_90, ROTAR_90, MOVER_ADELANTE, MOVER_ADELANTE]
+
+
+def test_resolver_uno_solo_consume_aleatorios_estocasticos():
+    rng, referencia = np.random.default_rng(0), np.random.default_rng(0)
+    for clave in range(N_CLAVES):
+        estocastica = TABLA_DECISION.probabilidad[clave] > 0
+        uniforme = referencia.random() if estocastica else 0.5
+        accion = TABLA_DECISION.resolver_uno(clave, rng)
+        assert accion == TABLA_DECISION.resolver(np.array([clave]), np.array([uniforme]))[0]
+    assert rng.random() == referencia.random()
+
+
+def test_reglas_con_nombres_y_ternas():
+    def reglas(monstruo_en_celda, robot_delante, **_):
+        if monstruo_en_celda:
+            return "VACUUMATOR"
+        return ("ESPERAR", "ROTAR_90", 1.0) if robot_delante else MOVER_ADELANTE
+
+    tabla = compilar_reglas(reglas)
+    esperado = np.where(_con('monstruo_en_celda'), VACUUMATOR,
+                        np.where(_con('robot_delante'), ROTAR_90, MOVER_ADELANTE))
+    assert tabla.resolver(CLAVES, np.full(N_CLAVES, 0.99)).tolist() == esperado.tolist()
+    assert tabla.resolver_uno(BIT['robot_delante'], None) == ROTAR_90
+    assert tabla.describir(BIT['robot_delante']) == "robot_delante → ESPERAR / ROTAR_90 (p=1)"
+    assert tabla.describir(0) == "- → MOVER_ADELANTE"
+
+
+@pytest.mark.parametrize("vectorizados", [False, True])
+def test_reglas_propias_en_el_entorno(vectorizados):
+    with contextlib.redirect_stdout(io.StringIO()):
+        entorno = EntornoHexaedrico(8, 0.8, 0.2, 6, 6, seed=42, robots_vectorizados=vectorizados,
+                                    reglas=lambda **_: ESPERAR)
+        celdas = entorno.motor_robots.celda.copy()
+        Simulador(entorno).ejecutar(20, verbose=False)
+    assert entorno.motor_robots.celda.tolist() == celdas.tolist()
+    assert entorno.motor_robots.movimientos.sum() == 0
@@ -0,0 +1,72 @@
+"""
+PRUEBAS DEL CAMPO DE DISTANCIAS
+Actualización incremental frente a un BFS completo y campo construido sobre las creencias
+"""
+
+from collections import deque
+
+import numpy as np
+
+from agent import Simulador
+from agent.creencias import ZONA_VACIA
+from agent.distancias import CampoDistancias
+
+from conftest import silencioso
+
+
+def _distancias_bfs(libre, fuentes, desplazamientos, radio):
+    """Distancia truncada por BFS desde todas las fuentes (radio + 1 si más lejos o no libre)"""
+    distancia = np.full(libre.size, radio + 1, dtype=np.int64)
+    cola = deque()
+    for celda in np.flatnonzero(fuentes & libre).tolist():
+        distancia[celda] = 0
+        cola.append(celda)
+    while cola:
+        celda = cola.popleft()
+        if distancia[celda] == radio:
+            continue
+        for d in desplazamientos:
+            vecino = celda + d
+            if libre[vecino] and distancia[vecino] > distancia[celda] + 1:
+                distancia[vecino] = distancia[celda] + 1
+                cola.append(vecino)
+    return distancia
+
+
+def test_actualizacion_incremental_coincide_con_bfs():
+    rng = np.random.default_rng(0)
+    N, radio = 10, 5
+    L = N + 2
+    libre = np.pad(rng.random((N, N, N)) >= 0.25, 1, constant_values=False).reshape(-1)
+    interiores = np.flatnonzero(libre)
+    desplazamientos = (L * L, -L * L, L, -L, 1, -1)
+    campo = CampoDistancias(libre.copy(), desplazamientos, rng.random(libre.size) < 0.05, radio=radio, olvido=4)
+
+    for _ in range(40):
+        campo.quitar_fuentes(rng.choice(interiores, 6))
+        if rng.random() < 0.5:
+            campo.bloquear(rng.choice(interiores, 2))
+        campo.avanzar_tick()
+        campo.sincronizar()
+        assert campo.distancia.tolist() == \
+            _distancias_bfs(campo.libre, campo.fuentes, desplazamientos, radio).tolist()
+
+
+def test_campo_de_exploracion_solo_usa_las_creencias(crear_entorno):
+    entorno = crear_entorno(N=8, n_robots=8, n_monstruos=4, seed=1, pvacio=0.3, estrategia='gradiente',
+                            robots_vectorizados=True)
+    campo = entorno.campo_exploracion
+    L = entorno.N + 2
+    interior = np.zeros((L, L, L), dtype=bool)
+    interior[1:-1, 1:-1, 1:-1] = True
+    assert campo.libre.tolist() == interior.reshape(-1).tolist()
+
+    silencioso(Simulador(entorno).ejecutar, 60, verbose=False)
+    vacias_conocidas = np.zeros(L ** 3, dtype=bool)
+    for id in range(len(entorno.robots)):
+        celdas, codigos = entorno.motor_robots.creencias.celdas(id)
+        vacias_conocidas[celdas[codigos == ZONA_VACIA]] = True
+    assert vacias_conocidas.any()
+    # Transitable = interior salvo las zonas vacías descubiertas; las no descubiertas siguen abiertas
+    assert campo.libre.tolist() == (interior.reshape(-1) & ~vacias_conocidas).tolist()
+    assert (campo.libre & ~np.asarray(entorno.libre, dtype=bool)).any()
@@ -0,0 +1,109 @@
+"""
+PRUEBAS DE LA SIMULACIÓN DISTRIBUIDA
+Un tick por losas, reproducibilidad por semilla, conservación de los agentes y registro de experiencias
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from agent import EntornoHexaedrico, SimuladorDistribuido
+
+
+CAMPOS = ('celda', 'vivo', 'puntuacion', 'monstruos_destruidos', 'movimientos', 'colisiones',
+          'relativa', 'ultima_celda')
+
+
+def _entorno(N=12, n_robots=20, n_monstruos=40, seed=4, **opciones):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return EntornoHexaedrico(N, 0.8, 0.2, n_robots, n_monstruos, seed=seed, **opciones)
+
+
+@pytest.mark.parametrize("procesos", [1, 3])
+def test_un_tick_igual_que_el_motor(procesos):
+    local = _entorno(n_robots=30, seed=2, robots_vectorizados=True)
+    distribuido = _entorno(n_robots=30, seed=2, robots_vectorizados=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        local.actualizar()
+    SimuladorDistribuido(distribuido, procesos=procesos, seed=0).ejecutar(1, verbose=False)
+
+    # Todo salvo el lado de cada giro, que sale del flujo aleatorio de cada losa
+    for campo in CAMPOS:
+        assert getattr(distribuido.motor_robots, campo).tolist() == getattr(local.motor_robots, campo).tolist()
+    girados = local.motor_robots.orientacion != distribuido.motor_robots.orientacion
+    assert (local.motor_robots.puntuacion[girados] < 0).all()
+    # Las experiencias registradas son las del motor (la orientación es la previa al giro)
+    for registro in ('historial', 'metricas', 'reglas'):
+        a, b = getattr(local.motor_robots, registro).exportar(), getattr(distribuido.motor_robots, registro).exportar()
+        assert np.array_equal(a, b, equal_nan=True) if isinstance(a, np.ndarray) else \
+            all(np.array_equal(x, y) for x, y in zip(a, b))
+    for ventana, detector in local.motor_robots.bucles.items():
+        assert distribuido.motor_robots.bucles[ventana].exportar()[1].tolist() == detector.exportar()[1].tolist()
+
+
+@pytest.mark.parametrize("procesos", [2, 5])
+def test_agentes_conservados_y_en_zona_libre(procesos):
+    entorno = _entorno()
+    n_monstruos = len(entorno.motor_monstruos)
+    reporte = SimuladorDistribuido(entorno, procesos=procesos, seed=9).ejecutar(40, verbose=False)
+
+    libre = np.asarray(entorno.libre, dtype=bool)
+    robots, monstruos = entorno.motor_robots, entorno.motor_monstruos
+    assert libre[robots.celda].all() and libre[monstruos.celda].all()
+    # Cada monstruo destruido lo cuenta un único robot, que murió con VACUUMATOR
+    destruidos = int(robots.monstruos_destruidos.sum())
+    assert destruidos == (~monstruos.vivo).sum() == reporte['monstruos_destruidos']
+    assert robots.monstruos_destruidos.max() <= 1 and (~robots.vivo[robots.monstruos_destruidos > 0]).all()
+    assert reporte['robots_supervivientes'] == robots.vivo.sum()
+    assert monstruos.vivo.sum() == n_monstruos - destruidos
+    assert reporte['iteraciones_totales'] == entorno.iteracion
+
+
+@pytest.mark.parametrize("procesos", [3, 6])
+def test_estadisticas_cuentan_los_agentes_que_migran(procesos):
+    # Pocos agentes y losas estrechas: casi todos los ticks alguno cruza una frontera
+    entorno = _entorno(n_robots=4, n_monstruos=3, seed=1)
+    simulador = SimuladorDistribuido(entorno, procesos=procesos, seed=3)
+    simulador.ejecutar(60, verbose=False)
+    for stats in simulador.historial_estadisticas:
+        assert stats['monstruos_vivos'] + stats['monstruos_destruidos'] == 3
+    # Solo para antes de tiempo si de verdad no quedan monstruos o robots
+    if entorno.iteracion < 60:
+        assert not entorno.motor_monstruos.vivo.any() or not entorno.motor_robots.vivo.any()
+
+
+def test_experiencias_registradas_en_el_motor():
+    entorno = _entorno()
+    inicio = entorno.motor_robots.celda.copy()
+    SimuladorDistribuido(entorno, procesos=3, seed=9).ejecutar(40, verbose=False)
+
+    robots = entorno.motor_robots
+    L = entorno.N + 2
+    # Una experiencia por iteración en la que el robot estaba vivo, en todos los registros
+    assert (robots.historial.total[robots.vivo] == entorno.iteracion).all()
+    assert robots.metricas.experiencias.sum(axis=1).tolist() == robots.historial.total.tolist()
+    for detector in robots.bucles.values():
+        assert detector.total.tolist() == robots.historial.total.tolist()
+    assert (robots.reglas.n_reglas() > 0).all()
+    # La posición relativa acumula los movimientos hechos en todas las losas
+    assert (robots.celda - inicio).tolist() == (robots.relativa @ [L * L, L, 1]).tolist()
+
+
+def test_reproducible_para_una_semilla_y_unos_procesos():
+    estados = []
+    for _ in range(2):
+        entorno = _entorno()
+        simulador = SimuladorDistribuido(entorno, procesos=3, seed=9)
+        simulador.ejecutar(30, verbose=False)
+        estados.append(([getattr(entorno.motor_robots, c).tolist() for c in CAMPOS + ('orientacion',)],
+                        entorno.motor_monstruos.celda.tolist(), simulador.historial_estadisticas))
+    assert estados[0] == estados[1]
+
+
+def test_requiere_almacenamiento_denso_y_sin_gradiente():
+    with pytest.raises(ValueError):
+        SimuladorDistribuido(_entorno(N=8, almacenamiento='bits'), procesos=2)
+    with pytest.raises(ValueError):
+        SimuladorDistribuido(_entorno(N=8, estrategia='gradiente'), procesos=2)
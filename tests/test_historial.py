@@ -0,0 +1,91 @@
+"""
+PRUEBAS DEL HISTORIAL Y LAS MÉTRICAS DE LA FLOTA
+Búfer circular frente a una lista completa y métricas frente al historial
+"""
+
+import numpy as np
+import pytest
+
+from agent import Simulador
+from agent.ontology import (HistorialFlota, HistorialPercepcionAccion, Percepcion, ORIENTACIONES, ACCIONES,
+                            CAPACIDAD_HISTORIAL)
+from agent.robot_agent import _metricas_accion
+
+from conftest import silencioso
+
+
+@pytest.mark.parametrize("capacidad", [1, 5, 16, 40])
+def test_historial_circular_conserva_los_ultimos(capacidad):
+    rng = np.random.default_rng(capacidad)
+    historial, referencia = HistorialPercepcionAccion(capacidad), []
+    for t in range(200):
+        percepcion = Percepcion(ORIENTACIONES[rng.integers(6)], *(bool(b) for b in rng.integers(0, 2, 4)), t)
+        registro = (percepcion, ACCIONES[rng.integers(4)])
+        historial.append(registro)
+        referencia.append(registro)
+
+        conservados = referencia[-capacidad:]
+        assert historial.total == len(referencia) and len(historial) == len(conservados)
+        assert list(historial) == conservados and historial[-1] == conservados[-1]
+        assert historial.ultimas_acciones(3).tolist() == [ACCIONES.index(a) for _, a in conservados[-3:]]
+
+    copia = HistorialPercepcionAccion(capacidad)
+    copia.restaurar(*historial.ultimos(), total=historial.total)
+    assert list(copia) == list(historial) and copia.total == historial.total
+
+
+def test_registro_en_lote_equivale_a_uno_a_uno():
+    rng = np.random.default_rng(1)
+    lote, sueltos = HistorialFlota(30, 24), HistorialFlota(30, 24)
+    for iteracion in range(60):
+        ids = np.flatnonzero(rng.random(30) < 0.6)
+        orientaciones, bits, acciones = rng.integers(0, 6, len(ids)), rng.integers(0, 16, len(ids)), \
+            rng.integers(0, 4, len(ids))
+        lote.registrar(ids, orientaciones, bits, acciones, iteracion)
+        for fila in zip(ids.tolist(), orientaciones.tolist(), bits.tolist(), acciones.tolist()):
+            sueltos.registrar_uno(*fila, iteracion)
+
+    for id in range(30):
+        a = HistorialPercepcionAccion(flota=lote, id=id)
+        b = HistorialPercepcionAccion(flota=sueltos, id=id)
+        assert a.total == b.total and list(a) == list(b)
+    assert lote._codigo.shape[1] <= 24
+
+
+@pytest.mark.parametrize("vectorizados", [False, True])
+def test_metricas_y_racionalidad_coinciden_con_el_historial(crear_entorno, vectorizados):
+    entorno = crear_entorno(robots_vectorizados=vectorizados)
+    silencioso(Simulador(entorno).ejecutar, max_iteraciones=80)
+
+    for robot in entorno.robots:
+        memoria = robot.memoria
+        historial = memoria.percepciones_acciones
+        assert historial.total == len(historial) <= CAPACIDAD_HISTORIAL
+        esperado = {}
+        for _, bits, accion, _ in zip(*historial.ultimos()):
+            for nombre in _metricas_accion(int(accion), int(bits)):
+                esperado[nombre] = esperado.get(nombre, 0) + 1
+        assert dict(memoria.metricas_racionalidad) == esperado
+
+    racionalidad = entorno.motor_robots.racionalidad()
+    assert racionalidad.tolist() == [robot.calcular_racionalidad() for robot in entorno.robots]
+    assert ((0.0 <= racionalidad) & (racionalidad <= 1.0)).all()
+
+
+def test_historial_acotado_sobrevive_al_punto_de_control(crear_entorno, tmp_path):
+    entorno = crear_entorno(robots_vectorizados=True)
+    motor = entorno.motor_robots
+    motor.historial = HistorialFlota(len(motor), 8)
+    for robot in entorno.robots:
+        robot._memoria.percepciones_acciones.flota = motor.historial
+    simulador = Simulador(entorno)
+    silencioso(simulador.ejecutar, max_iteraciones=40)
+    assert motor.historial._codigo.shape[1] == 8
+
+    simulador.checkpoint(str(tmp_path / "historial.npz"))
+    restaurado = Simulador.restore(str(tmp_path / "historial.npz")).entorno
+    for a, b in zip(entorno.robots, restaurado.robots):
+        ha, hb = a.memoria.percepciones_acciones, b.memoria.percepciones_acciones
+        assert ha.total == hb.total and list(ha) == list(hb)
+        assert dict(a.memoria.metricas_racionalidad) == dict(b.memoria.metricas_racionalidad)
+    assert restaurado.motor_robots.racionalidad().tolist() == motor.racionalidad().tolist()
@@ -0,0 +1,86 @@
+"""
+PRUEBAS DEL OCTREE DISPERSO
+Forma canónica del árbol, memoria según la superficie y consultas de región
+"""
+
+import numpy as np
+import pytest
+
+from agent.octree import GridOctree, HOJA_LIBRE, HOJA_VACIA, codigo_morton
+
+
+def _octree(denso):
+    return GridOctree.desde_indices(denso.shape[0], np.flatnonzero(denso))
+
+
+def _cubo(N, origen, lado):
+    """Índices planos de un cubo de celdas vacías"""
+    r = np.arange(origen, origen + lado)
+    return np.ravel_multi_index(tuple(c.ravel() for c in np.meshgrid(r, r, r, indexing='ij')), (N, N, N))
+
+
+def test_codigo_morton_intercala_los_bits():
+    # x = 101, y = 011, z = 110: octantes (x<<2 | y<<1 | z) 5, 3, 6 de la raíz a las hojas
+    assert int(codigo_morton(5, 3, 6, 3)) == 5 << 6 | 3 << 3 | 6
+    assert [GridOctree.profundidad_para(N) for N in (1, 2, 3, 8, 9)] == [1, 1, 2, 3, 4]
+
+
+def test_arbol_canonico():
+    N = 16
+    rng = np.random.default_rng(0)
+    denso = (rng.random((N, N, N)) < 0.3).astype(np.uint8)
+    denso[:8, :8, :8] = 1
+    denso[8:, 8:, 8:] = 0
+    hijos = _octree(denso)._hijos
+
+    # Las regiones homogéneas son una sola hoja: ningún nodo tiene 8 hojas iguales
+    assert not (hijos[1:] == HOJA_VACIA).all(axis=1).any()
+    assert not (hijos[1:] == HOJA_LIBRE).all(axis=1).any()
+    assert hijos[0, 0] == HOJA_VACIA and hijos[0, 7] == HOJA_LIBRE
+    # Cada nodo salvo la raíz cuelga de un único padre construido antes que él
+    padres, _ = np.nonzero(hijos >= 0)
+    assert sorted(hijos[hijos >= 0].tolist()) == list(range(1, len(hijos)))
+    assert (padres < hijos[hijos >= 0]).all()
+    # El árbol no depende del orden de los índices de entrada
+    desordenados = rng.permutation(np.flatnonzero(denso))
+    assert GridOctree.desde_indices(N, desordenados)._hijos.tolist() == hijos.tolist()
+
+
+def test_memoria_crece_con_la_superficie():
+    assert GridOctree.desde_indices(64, np.empty(0, dtype=np.int64)).n_nodos == 1
+    nodos = []
+    for N in (32, 64, 128, 256):
+        # El mismo cubo vacío (desalineado) escalado con el mundo: volumen x8, superficie x4
+        nodos.append(GridOctree.desde_indices(N, _cubo(N, N // 8 + 1, N // 4)).n_nodos)
+    assert all(b < 4.5 * a for a, b in zip(nodos, nodos[1:]))
+    assert nodos[-1] * 8 < 64 ** 3
+
+
+@pytest.mark.parametrize("N", [1, 5, 16, 19])
+def test_lecturas(N):
+    rng = np.random.default_rng(N)
+    denso = (rng.random((N, N, N)) < 0.2).astype(np.uint8)
+    grid = _octree(denso)
+    assert grid.shape == (N, N, N) and np.array_equal(np.asarray(grid), denso)
+    for x, y, z in rng.integers(-N, N, (30, 3)).tolist():
+        assert grid[x, y, z] == grid.valor_en(x % N, y % N, z % N) == denso[x, y, z]
+    x, y, z = rng.integers(0, N, (3, 30))
+    assert grid.valores_en(x, y, z).tolist() == denso[x, y, z].tolist()
+    assert np.array_equal(grid[:, N // 2], denso[:, N // 2])
+    with pytest.raises(TypeError):
+        grid[0, 0, 0] = 1
+
+
+def test_consultas_de_region():
+    N = 32
+    denso = np.zeros((N, N, N), dtype=np.uint8)
+    denso.reshape(-1)[_cubo(N, 5, 9)] = 1
+    denso[30, 1, 6] = 1
+    grid = _octree(denso)
+    rng = np.random.default_rng(2)
+    for _ in range(60):
+        minimo = rng.integers(0, N, 3)
+        maximo = minimo + rng.integers(1, 12, 3)
+        caja = tuple(slice(lo, hi) for lo, hi in zip(minimo, maximo))
+        assert grid.hay_vacio_en_caja(tuple(minimo), tuple(maximo)) == bool(denso[caja].any())
+        assert np.array_equal(grid.bloque(tuple(minimo), tuple(np.minimum(maximo, N))), denso[caja])
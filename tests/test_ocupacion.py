@@ -0,0 +1,73 @@
+"""
+PRUEBAS DEL ÍNDICE DE OCUPACIÓN
+Conteos e ids por celda frente a un recorrido completo de la población
+"""
+
+import numpy as np
+import pytest
+
+from agent.occupancy import IndiceOcupacionVectorizado
+
+
+def _ocupantes_fuerza_bruta(celdas, vivos, celda):
+    return np.flatnonzero((celdas == celda) & vivos).tolist()
+
+
+@pytest.mark.parametrize("denso", [True, False])
+def test_operaciones_sueltas_y_en_lote(denso):
+    rng = np.random.default_rng(0)
+    n, n_celdas = 300, 50
+    celdas = rng.integers(0, n_celdas, n)
+    vivos = rng.random(n) < 0.8
+    indice = IndiceOcupacionVectorizado(celdas, vivos, n_celdas if denso else None)
+
+    for _ in range(2000):
+        operacion, id = rng.integers(0, 5), int(rng.integers(n))
+        if operacion == 0 and vivos[id]:
+            destino = int(rng.integers(n_celdas))
+            indice.mover(id, int(celdas[id]), destino)
+            celdas[id] = destino
+        elif operacion == 1 and vivos[id]:
+            indice.quitar(id, int(celdas[id]))
+            vivos[id] = False
+        elif operacion == 2 and not vivos[id]:
+            indice.agregar(id, int(celdas[id]))
+            vivos[id] = True
+        elif operacion == 3:
+            ids = np.flatnonzero(vivos)[rng.random(int(vivos.sum())) < 0.3]
+            destinos = rng.integers(0, n_celdas, len(ids))
+            indice.mover_lote(celdas[ids].copy(), destinos)
+            celdas[ids] = destinos
+
+        celda = int(rng.integers(n_celdas))
+        esperados = _ocupantes_fuerza_bruta(celdas, vivos, celda)
+        assert indice.ocupantes(celda) == esperados
+        assert indice.conteo(celda) == len(esperados)
+        assert indice.hay_agente_en(celda) == bool(esperados)
+
+    todas = np.arange(n_celdas)
+    assert (indice.conteos(todas) == np.bincount(celdas[vivos], minlength=n_celdas)).all()
+
+
+def test_reconstruir_tras_reescribir_arrays():
+    celdas = np.array([3, 3, 5, 7])
+    vivos = np.array([True, True, True, False])
+    indice = IndiceOcupacionVectorizado(celdas, vivos, 10)
+    assert indice.ocupantes(3) == [0, 1]
+
+    celdas[:] = [5, 5, 5, 5]
+    vivos[:] = True
+    indice.reconstruir()
+    assert indice.ocupantes(3) == []
+    assert indice.ocupantes(5) == [0, 1, 2, 3]
+    assert indice.conteo(5) == 4
+
+
+def test_ocupantes_del_entorno_coinciden_con_los_motores(crear_entorno):
+    entorno = crear_entorno(n_robots=20, n_monstruos=20)
+    for _ in range(15):
+        entorno.actualizar()
+        for motor, indice in ((entorno.motor_robots, entorno.ocupacion_robots),
+                              (entorno.motor_monstruos, entorno.ocupacion_monstruos)):
+            for celda in np.unique(motor.celda).tolist():
+                assert indice.ocupantes(celda) == _ocupantes_fuerza_bruta(motor.celda, motor.vivo, celda)
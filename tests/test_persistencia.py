@@ -0,0 +1,83 @@
+"""
+PRUEBAS DE LOS PUNTOS DE CONTROL
+Una simulación restaurada continúa exactamente igual que la original
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from agent import Simulador
+from agent.persistencia import VERSION
+
+from conftest import silencioso
+
+
+def _estado(simulador):
+    """Estado observable completo: motores, creencias, memorias, historial y flujos aleatorios"""
+    entorno = simulador.entorno
+    robots, monstruos = entorno.motor_robots, entorno.motor_monstruos
+    memorias = [(list(r.memoria.percepciones_acciones), dict(r.memoria.mapa_creencias.items()),
+                 set(r.memoria.zonas_vacias_conocidas), r.memoria.posicion_relativa, r.memoria.ultima_posicion,
+                 dict(r.memoria.reglas_aprendidas), dict(r.memoria.metricas_racionalidad),
+                 r.detectar_bucle_infinito())
+                for r in entorno.robots]
+    return (entorno.iteracion,
+            [getattr(robots, c).tolist() for c in ('celda', 'orientacion', 'vivo', 'puntuacion',
+                                                    'monstruos_destruidos', 'movimientos', 'colisiones')],
+            [getattr(monstruos, c).tolist() for c in ('celda', 'K', 'p', 'vivo')],
+            [a.tolist() for a in robots.creencias.exportar()], memorias, entorno.estadisticas(),
+            simulador.historial_estadisticas, entorno.rng_robots.random(), entorno.rng_monstruos.random(),
+            float(entorno._rng_mundo.random()))
+
+
+@pytest.mark.parametrize("almacenamiento", ["denso", "bits", "octree"])
+@pytest.mark.parametrize("vectorizados", [False, True])
+def test_restaurar_continua_igual(crear_entorno, tmp_path, almacenamiento, vectorizados):
+    entorno = crear_entorno(N=10, n_robots=10, n_monstruos=15, seed=5, almacenamiento=almacenamiento,
+                            robots_vectorizados=vectorizados)
+    simulador = Simulador(entorno)
+    silencioso(simulador.ejecutar, 15, verbose=False)
+    comunicaciones = [(7, '3', 'MOVER_ADELANTE'), (12, '0', 'ROTAR_90')]
+    entorno.robots[1].memoria.comunicaciones_robots = list(comunicaciones)
+    ruta = str(tmp_path / "punto.npz")
+    simulador.checkpoint(ruta)
+
+    silencioso(simulador.ejecutar, 20, verbose=False)
+    restaurado = Simulador.restore(ruta)
+    # Las comunicaciones vuelven con el tipo de cada campo (iteración entera, robot y acción texto)
+    restauradas = [r.memoria.comunicaciones_robots for r in restaurado.entorno.robots]
+    assert restauradas[1] == comunicaciones and restauradas[0] == []
+    assert [tuple(map(type, c)) for c in restauradas[1]] == [(int, str, str)] * 2
+    silencioso(restaurado.ejecutar, 20, verbose=False)
+    assert _estado(restaurado) == _estado(simulador)
+
+
+@pytest.mark.parametrize("vectorizados", [False, True])
+def test_restaurar_con_campo_de_exploracion(crear_entorno, tmp_path, vectorizados):
+    entorno = crear_entorno(N=10, n_robots=10, n_monstruos=15, seed=5, estrategia='gradiente',
+                            robots_vectorizados=vectorizados)
+    simulador = Simulador(entorno)
+    silencioso(simulador.ejecutar, 30, verbose=False)
+    ruta = str(tmp_path / "punto.npz")
+    simulador.checkpoint(ruta)
+
+    silencioso(simulador.ejecutar, 40, verbose=False)
+    restaurado = Simulador.restore(ruta)
+    silencioso(restaurado.ejecutar, 40, verbose=False)
+    assert _estado(restaurado) == _estado(simulador)
+
+
+def test_version_desconocida_se_rechaza(crear_entorno, tmp_path):
+    simulador = Simulador(crear_entorno())
+    ruta = str(tmp_path / "punto.npz")
+    simulador.checkpoint(ruta)
+    with np.load(ruta) as datos:
+        arrays = dict(datos)
+    meta = json.loads(str(arrays['meta']))
+    meta['version'] = VERSION + 1
+    arrays['meta'] = np.array(json.dumps(meta))
+    np.savez(ruta, **arrays)
+    with pytest.raises(ValueError):
+        Simulador.restore(ruta)
@@ -0,0 +1,86 @@
+"""
+PRUEBAS DEL REGISTRO DE TRAYECTORIAS
+Reproducción hacia delante y hacia atrás frente al estado real de cada tick
+"""
+
+import numpy as np
+import pytest
+
+from agent.trayectoria import LectorTrayectoria, ReproduccionTrayectoria
+
+from conftest import silencioso
+
+
+CAMPOS = ('robots_celda', 'robots_orientacion', 'robots_vivo', 'monstruos_celda', 'monstruos_vivo')
+
+
+def _instantanea(entorno):
+    robots, monstruos = entorno.motor_robots, entorno.motor_monstruos
+    return {'robots_celda': robots.celda.tolist(), 'robots_orientacion': robots.orientacion.tolist(),
+            'robots_vivo': robots.vivo.tolist(), 'monstruos_celda': monstruos.celda.tolist(),
+            'monstruos_vivo': monstruos.vivo.tolist(), 'estadisticas': entorno.estadisticas()}
+
+
+def _como_listas(estado):
+    return {**{c: np.asarray(estado[c]).tolist() for c in CAMPOS}, 'estadisticas': dict(estado['estadisticas'])}
+
+
+def _registrar(entorno, ruta, ticks, intervalo_clave, saltos=False):
+    """Ejecuta y registra `ticks` ticks; con saltos teletransporta y revive agentes entre ticks"""
+    rng = np.random.default_rng(0)
+    libres = np.flatnonzero(np.asarray(entorno.libre, dtype=bool))
+    escritor = entorno.registrar_trayectoria(ruta, intervalo_clave=intervalo_clave)
+    instantaneas = [_instantanea(entorno)]
+    for t in range(1, ticks + 1):
+        if saltos and t % 4 == 0:
+            for agente in (entorno.robots[t % len(entorno.robots)], entorno.monstruos[t % len(entorno.monstruos)]):
+                agente.posicion = entorno.posicion_de(int(rng.choice(libres)))
+                agente.vivo = True
+        silencioso(entorno.actualizar)
+        instantaneas.append(_instantanea(entorno))
+    escritor.cerrar()
+    return instantaneas
+
+
+@pytest.mark.parametrize("saltos", [False, True])
+@pytest.mark.parametrize("vectorizados", [False, True])
+def test_estado_en_y_retroceder_coinciden(crear_entorno, tmp_path, saltos, vectorizados):
+    entorno = crear_entorno(N=10, n_robots=12, n_monstruos=20, seed=3, robots_vectorizados=vectorizados)
+    ruta = str(tmp_path / "trayectoria.bin")
+    instantaneas = _registrar(entorno, ruta, 40, intervalo_clave=7, saltos=saltos)
+
+    with LectorTrayectoria(ruta) as lector:
+        assert len(lector) == len(instantaneas)
+        for t, esperado in enumerate(instantaneas):
+            assert _como_listas(lector.estado_en(t)) == esperado
+
+        estado = lector.estado_en(lector.ultima_iteracion)
+        for t in range(lector.ultima_iteracion, 0, -1):
+            lector.retroceder(estado, lector.registro(t))
+            assert _como_listas(estado) == instantaneas[t - 1]
+
+
+def test_saltos_y_reapariciones_no_fuerzan_fotogramas_clave(crear_entorno, tmp_path):
+    entorno = crear_entorno(N=10, n_robots=12, n_monstruos=20, seed=3)
+    ruta = str(tmp_path / "trayectoria.bin")
+    _registrar(entorno, ruta, 40, intervalo_clave=7, saltos=True)
+    with LectorTrayectoria(ruta) as lector:
+        assert lector.iteraciones_clave().tolist() == list(range(0, 41, 7))
+
+
+def test_reproduccion_recorre_en_ambos_sentidos(crear_entorno, tmp_path):
+    entorno = crear_entorno(N=10, n_robots=12, n_monstruos=20, seed=4)
+    ruta = str(tmp_path / "trayectoria.bin")
+    instantaneas = _registrar(entorno, ruta, 30, intervalo_clave=5, saltos=True)
+
+    fuente = ReproduccionTrayectoria(ruta)
+    fuente.avanzar(30)
+    assert _como_listas(fuente._estado) == instantaneas[30]
+    for t in range(29, -1, -1):
+        fuente.retroceder()
+        assert fuente.iteracion == t and _como_listas(fuente._estado) == instantaneas[t]
+    for t in range(1, 31):
+        fuente.avanzar()
+        assert _como_listas(fuente._estado) == instantaneas[t]
+    assert [r.posicion for r in fuente.robots] == [r.posicion for r in entorno.robots]
+    fuente.cerrar()
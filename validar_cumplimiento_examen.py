@@ -129,13 +129,15 @@ def validar_agente_monstruo():
     elementos = [
         ("Frecuencia K", "self.K"),
         ("Probabilidad p", "self.p"),
-        ("Movimiento aleatorio", "random.choice"),
+        # Uno a uno con random.choice o vecino libre uniforme para toda la población (MotorMonstruos)
+        ("Movimiento aleatorio", ("random.choice", "sortear_destinos")),
         ("Sin memoria", "class AgenteMonstruo")
     ]
     
     monstruo_ok = []
     for nombre, patron in elementos:
-        if patron in codigo:
+        patrones = patron if isinstance(patron, tuple) else (patron,)
+        if any(p in codigo for p in patrones):
             print(f"✅ {nombre}")
             monstruo_ok.append(True)
         else: